@@ -0,0 +1,7 @@
+import os
+import uvicorn
+
+if __name__ == "__main__":
+    # Несколько воркеров uvicorn, каждый обслуживает запросы асинхронно (todo_list.asgi)
+    uvicorn.run("todo_list.asgi:application", host="0.0.0.0", port=int(os.getenv("DJANGO_PORT", 8000)),
+                workers=int(os.getenv("DJANGO_ASGI_WORKERS", 1)))
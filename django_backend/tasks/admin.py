@@ -81,7 +81,8 @@ class CategoryAdmin(admin.ModelAdmin):
     """
     Административный интерфейс для модели Category.
     """
-    list_display: Tuple[str, ...] = ('name',)
+    list_display: Tuple[str, ...] = ('name', 'user')
+    search_fields: Tuple[str, ...] = ('name',)
 
     def save_model(self, request: HttpRequest, obj: Category, form: Any, change: bool) -> None:
         """
@@ -1,9 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
 
     def ready(self):
+        import tasks.signals  # noqa: F401
+        from tasks.search import install_search_extensions, install_search_trigger
+        pre_migrate.connect(install_search_extensions, sender=self)
+        post_migrate.connect(install_search_trigger, sender=self)
+        from tasks.changefeed import install_change_log_triggers
+        post_migrate.connect(install_change_log_triggers, sender=self)
+        from tasks.archive import install_task_archive
+        post_migrate.connect(install_task_archive, sender=self)
+        from tasks.deadlines import install_deadline_trigger
+        post_migrate.connect(install_deadline_trigger, sender=self)
+
         from tasks.task_management import initialize_background_tasks
-        initialize_background_tasks()
\ No newline at end of file
+        post_migrate.connect(initialize_background_tasks, sender=self)
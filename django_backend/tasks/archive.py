@@ -0,0 +1,150 @@
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, List, Tuple
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import QuerySet
+from django.utils import timezone
+from tasks.models import ArchivedTask, Category, Task
+
+logger = settings.LOGGER.get_logger('archive')
+
+
+def install_task_archive(using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
+    """
+    Создает триггер времени выполнения задач и секционированную таблицу архива.
+
+    Триггер заполняет Task.completed_at при любой записи, отмечающей задачу
+    выполненной (в том числе bulk_create и QuerySet.update), и очищает его
+    при снятии отметки. Таблица ArchivedTask секционируется по диапазонам
+    completed_at, секции на каждый месяц создаются при переносе задач (см.
+    ensure_archive_partitions). Внешнего ключа на пользователя нет, чтобы
+    TRUNCATE таблицы пользователей не требовал CASCADE: архив пользователя
+    удаляет ORM (on_delete=CASCADE у ArchivedTask.user). Подключается к
+    сигналу post_migrate, операции идемпотентны.
+    """
+    connection = connections[using]
+    task_table: str = Task._meta.db_table
+    archive_table: str = ArchivedTask._meta.db_table
+    if task_table not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {task_table}_completed_at() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF NOT NEW.completed THEN
+                    NEW.completed_at := NULL;
+                ELSIF TG_OP = 'INSERT' OR NOT OLD.completed THEN
+                    NEW.completed_at := now();
+                ELSE
+                    NEW.completed_at := OLD.completed_at;
+                END IF;
+                RETURN NEW;
+            END
+            $$
+        """)
+        cursor.execute(f"DROP TRIGGER IF EXISTS {task_table}_completed_at_trigger ON {task_table}")
+        cursor.execute(f"""
+            CREATE TRIGGER {task_table}_completed_at_trigger BEFORE INSERT OR UPDATE OF completed ON {task_table}
+            FOR EACH ROW EXECUTE FUNCTION {task_table}_completed_at()
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {archive_table} (
+                id varchar(64) NOT NULL,
+                user_id integer NOT NULL,
+                title varchar(200) NOT NULL,
+                description text NOT NULL,
+                created_at timestamptz NOT NULL,
+                due_date timestamptz NULL,
+                completed_at timestamptz NOT NULL,
+                archived_at timestamptz NOT NULL,
+                categories varchar(100)[] NOT NULL,
+                PRIMARY KEY (id, completed_at)
+            ) PARTITION BY RANGE (completed_at)
+        """)
+        # Страница архива пользователя по убыванию времени выполнения (см. ArchivedTaskPagination)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {archive_table}_user_completed_idx "
+                       f"ON {archive_table} (user_id, completed_at, id)")
+
+
+def get_month_bounds(month: datetime) -> Tuple[datetime, datetime]:
+    """
+    Возвращает границы месяца [начало, начало следующего) в UTC.
+    """
+    start: datetime = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end: datetime = datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def parse_archive_month(raw: str) -> Tuple[datetime, datetime]:
+    """
+    Разбирает месяц в формате YYYY-MM и возвращает его границы.
+
+    Raises:
+        ValueError: Если месяц имеет неверный формат.
+    """
+    return get_month_bounds(datetime.strptime(raw, '%Y-%m'))
+
+
+def ensure_archive_partitions(months: List[datetime]) -> None:
+    """
+    Создает недостающие месячные секции архива.
+
+    Секция создается под рекомендательной блокировкой до конца транзакции,
+    поэтому параллельные переносы не создают одну секцию дважды. Вызывается
+    внутри transaction.atomic().
+    """
+    archive_table: str = ArchivedTask._meta.db_table
+    with connection.cursor() as cursor:
+        for month in months:
+            start, end = get_month_bounds(month)
+            partition: str = f"{archive_table}_{start:%Y_%m}"
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [partition])
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [archive_table])
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {archive_table} "
+                           f"FOR VALUES FROM (%s) TO (%s)", [start, end])
+            logger.info(f"Создана секция архива задач {partition}")
+
+
+def copy_to_archive(batch: QuerySet) -> List[str]:
+    """
+    Копирует пачку выполненных задач в архив одним INSERT ... SELECT.
+
+    Задачи без времени выполнения (выполненные до появления completed_at)
+    архивируются с текущим временем. Вызывается внутри transaction.atomic(),
+    удаление задач из Task — отдельный шаг (см. tasks.task_management.archive_task_batch).
+
+    Args:
+        batch (QuerySet): Выборка values('id') с LIMIT и SELECT ... FOR UPDATE SKIP LOCKED.
+
+    Returns:
+        List[str]: ID скопированных задач.
+    """
+    task_table: str = Task._meta.db_table
+    through_table: str = Task.categories.through._meta.db_table
+    category_table: str = Category._meta.db_table
+    archive_table: str = ArchivedTask._meta.db_table
+    now: datetime = timezone.now()
+    batch_sql, batch_params = batch.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(batch_sql, batch_params)
+        task_ids: List[str] = [row[0] for row in cursor.fetchall()]
+        if not task_ids:
+            return []
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', coalesce(completed_at, %s) AT TIME ZONE 'UTC') "
+                       f"FROM {task_table} WHERE id = ANY(%s)", [now, task_ids])
+        ensure_archive_partitions([row[0] for row in cursor.fetchall()])
+        cursor.execute(f"""
+            INSERT INTO {archive_table}
+                (id, user_id, title, description, created_at, due_date, completed_at, archived_at, categories)
+            SELECT t.id, t.user_id, t.title, t.description, t.created_at, t.due_date, coalesce(t.completed_at, %s), %s,
+                   coalesce(array_agg(c.name ORDER BY lower(c.name)) FILTER (WHERE c.id IS NOT NULL), '{{}}')
+            FROM {task_table} t
+            LEFT JOIN {through_table} l ON l.task_id = t.id
+            LEFT JOIN {category_table} c ON c.id = l.category_id
+            WHERE t.id = ANY(%s)
+            GROUP BY t.id
+        """, [now, now, task_ids])
+    return task_ids
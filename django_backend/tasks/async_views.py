@@ -0,0 +1,206 @@
+import math
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from tasks.authentication import CachedJWTAuthentication
+from tasks.cache import task_cache
+from tasks.filters import filter_tasks
+from tasks.models import Task
+from tasks.pagination import TaskCursorPagination
+from tasks.serializers import TaskCreateSerializer, TaskUpdateSerializer
+from tasks.versioning import build_etag, etag_matches, get_versions, user_scope
+from tasks.views import build_task_queryset, parse_task_fields
+
+logger = settings.LOGGER.get_logger('async_views')
+
+
+class AsyncTaskAPIView(View):
+    """
+    Базовое async-представление API задач.
+
+    Повторяет поведение TaskViewSet (JWT-аутентификация, ограничение запросов,
+    ETag, кэш ответов, ?fields=) без синхронного конвейера DRF. Чтение идет
+    через async ORM, поэтому под ASGI один процесс обслуживает много
+    одновременных запросов. Запись (валидация сериализатора, сохранение задачи
+    и категорий в транзакции) выполняется одним вызовом sync_to_async:
+    транзакции и m2m-операции в Django 4.2 доступны только синхронно.
+    """
+    authentication = CachedJWTAuthentication()
+    renderer = JSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs: Any) -> Callable:
+        view = super().as_view(**initkwargs)
+        # Аутентификация по JWT, cookie не используются, как и в APIView
+        view.csrf_exempt = True
+        return view
+
+    def render(self, data: Any, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+        """
+        Возвращает JSON-ответ в том же формате, что и DRF.
+        """
+        content: bytes = self.renderer.render(data) if data is not None else b''
+        return HttpResponse(content, status=status_code, content_type='application/json')
+
+    def check_access(self, request: Request) -> Optional[HttpResponse]:
+        """
+        Аутентифицирует запрос и проверяет лимиты запросов.
+
+        Returns:
+            Optional[HttpResponse]: Ответ с ошибкой или None, если запрос допущен.
+        """
+        try:
+            result = self.authentication.authenticate(request)
+        except AuthenticationFailed as e:
+            return self.render({"detail": str(e.detail)}, status.HTTP_401_UNAUTHORIZED)
+        if result is None:
+            return self.render({"detail": "Учетные данные не были предоставлены."}, status.HTTP_401_UNAUTHORIZED)
+        request.user, request.auth = result
+
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                response = self.render({"detail": "Запрос был проигнорирован из-за ограничения скорости."},
+                                       status.HTTP_429_TOO_MANY_REQUESTS)
+                wait: Optional[float] = throttle.wait()
+                if wait is not None:
+                    response['Retry-After'] = str(math.ceil(wait))
+                return response
+        return None
+
+    async def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        """
+        Проверяет доступ и вызывает обработчик метода запроса.
+        """
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return await self.http_method_not_allowed(request, *args, **kwargs)
+        drf_request: Request = Request(request, parsers=[JSONParser()])
+        error: Optional[HttpResponse] = await sync_to_async(self.check_access)(drf_request)
+        if error is not None:
+            return error
+        try:
+            return await handler(drf_request, *args, **kwargs)
+        except Task.DoesNotExist:
+            logger.warning(f"Задача не найдена для пользователя {drf_request.user}")
+            return self.render({"error": "Задача не найдена"}, status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            return self.render(e.detail, status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.log_exception(f"Ошибка в async API задач для пользователя {drf_request.user}")
+            return self.render({"error": "Произошла ошибка при обработке запроса"},
+                               status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def conditional_cached(self, request: Request, build: Callable[[], Awaitable[Any]]) -> HttpResponse:
+        """
+        Async-аналог ConditionalGetMixin.conditional_response и TaskViewSet.cached_response.
+
+        Args:
+            request (Request): Объект запроса.
+            build (Callable[[], Awaitable[Any]]): Построение данных ответа при промахе кэша.
+
+        Returns:
+            HttpResponse: 304 при актуальном ETag клиента, иначе ответ с ETag.
+        """
+        path: str = request.get_full_path()
+        scopes: List[str] = [user_scope(request.user.id)]
+        etag: str = build_etag(await sync_to_async(get_versions)(scopes), path)
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            logger.info(f"Данные не изменились для пользователя {request.user}, возвращаем 304")
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        data, key = await sync_to_async(task_cache.get)(request.user.id, path)
+        if data is None:
+            data = await build()
+            await sync_to_async(task_cache.set)(key, data)
+        response: HttpResponse = self.render(data)
+        response['ETag'] = etag
+        return response
+
+
+class AsyncTaskListView(AsyncTaskAPIView):
+    """
+    Async-список задач пользователя (GET) и создание задачи (POST).
+    """
+
+    async def get(self, request: Request) -> HttpResponse:
+        """
+        Возвращает страницу задач пользователя с фильтрами и сортировкой, как в TaskViewSet.list.
+        """
+        logger.info(f"Async-запрос списка задач от пользователя {request.user}")
+        fields: Optional[List[str]] = parse_task_fields(request.query_params.get('fields'))
+
+        async def build() -> Dict[str, Any]:
+            paginator = TaskCursorPagination()
+            queryset = filter_tasks(build_task_queryset(request.user, fields), request.query_params)
+            page: List[Task] = await paginator.apaginate_queryset(queryset, request)
+            serializer = TaskCreateSerializer(page, many=True, fields=fields, context={'request': request})
+            return paginator.get_paginated_response(serializer.data).data
+
+        try:
+            return await self.conditional_cached(request, build)
+        except NotFound as e:
+            logger.warning(f"Неверный курсор в запросе списка задач от пользователя {request.user}")
+            return self.render({"error": str(e.detail)}, status.HTTP_404_NOT_FOUND)
+
+    async def post(self, request: Request) -> HttpResponse:
+        """
+        Создает новую задачу для текущего пользователя.
+        """
+        logger.info(f"Async-создание новой задачи для пользователя {request.user}")
+
+        def save() -> Dict[str, Any]:
+            serializer = TaskCreateSerializer(data=request.data, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            serializer.save(user=request.user)
+            return serializer.data
+
+        return self.render(await sync_to_async(save)(), status.HTTP_201_CREATED)
+
+
+class AsyncTaskDetailView(AsyncTaskAPIView):
+    """
+    Async-чтение (GET) и обновление (PUT, PATCH) задачи пользователя.
+    """
+
+    async def get(self, request: Request, pk: str) -> HttpResponse:
+        """
+        Возвращает детальную информацию о задаче.
+        """
+        logger.info(f"Async-запрос детальной информации о задаче от пользователя {request.user}")
+        fields: Optional[List[str]] = parse_task_fields(request.query_params.get('fields'))
+
+        async def build() -> Dict[str, Any]:
+            task: Task = await build_task_queryset(request.user, fields).aget(pk=pk)
+            return TaskCreateSerializer(task, fields=fields, context={'request': request}).data
+
+        return await self.conditional_cached(request, build)
+
+    async def put(self, request: Request, pk: str, partial: bool = False) -> HttpResponse:
+        """
+        Обновляет задачу.
+        """
+        logger.info(f"Async-обновление задачи пользователем {request.user}")
+        task: Task = await Task.objects.filter(user=request.user).aget(pk=pk)
+
+        def save() -> Dict[str, Any]:
+            serializer = TaskUpdateSerializer(task, data=request.data, partial=partial, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return serializer.data
+
+        return self.render(await sync_to_async(save)())
+
+    async def patch(self, request: Request, pk: str) -> HttpResponse:
+        """
+        Частично обновляет задачу.
+        """
+        return await self.put(request, pk, partial=True)
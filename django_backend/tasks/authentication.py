@@ -0,0 +1,98 @@
+from typing import Any, Optional, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+logger = settings.LOGGER.get_logger('authentication')
+
+# Поля пользователя, которые хранятся в кэше: (username, is_active, is_staff, is_superuser)
+UserState = Tuple[str, bool, bool, bool]
+
+
+def get_user_cache_key(user_id: Any) -> str:
+    return f"auth:user:{user_id}"
+
+
+def invalidate_user_auth(user_id: Any) -> None:
+    """
+    Удаляет закэшированное состояние пользователя, чтобы следующий запрос
+    прочитал его из базы данных.
+
+    Args:
+        user_id (Any): ID пользователя.
+    """
+    caches[settings.AUTH_USER_CACHE_ALIAS].delete(get_user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без чтения пользователя из базы на каждый запрос.
+
+    ID пользователя берется из токена, а имя и флаги is_active, is_staff,
+    is_superuser — из кэша с коротким сроком жизни (AUTH_USER_CACHE_TIMEOUT).
+    Кэш сбрасывается при изменении и удалении пользователя (tasks.signals).
+    Возвращается несохраняемый экземпляр User с заполненным pk, которого
+    достаточно для фильтрации и привязки задач к пользователю.
+    """
+
+    def get_user(self, validated_token: Token) -> User:
+        """
+        Возвращает пользователя по проверенному токену.
+
+        Args:
+            validated_token (Token): Проверенный токен.
+
+        Returns:
+            User: Облегченный экземпляр пользователя.
+
+        Raises:
+            InvalidToken: Если в токене нет ID пользователя.
+            AuthenticationFailed: Если пользователь не найден или неактивен.
+        """
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Проверка отзыва требует хэш пароля, поэтому читаем пользователя целиком
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Токен не содержит идентификатор пользователя")
+
+        state: Optional[UserState] = self.get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("Пользователь не найден", code="user_not_found")
+        username, is_active, is_staff, is_superuser = state
+        if not is_active:
+            raise AuthenticationFailed("Пользователь неактивен", code="user_inactive")
+
+        user = User(username=username, is_active=is_active, is_staff=is_staff, is_superuser=is_superuser,
+                    **{api_settings.USER_ID_FIELD: user_id})
+        user._state.adding = False
+        return user
+
+    def get_user_state(self, user_id: Any) -> Optional[UserState]:
+        """
+        Возвращает состояние пользователя из кэша или из базы данных.
+
+        Отсутствие пользователя тоже кэшируется, чтобы токены удаленных
+        пользователей не приводили к запросу на каждый вызов.
+
+        Args:
+            user_id (Any): ID пользователя.
+
+        Returns:
+            Optional[UserState]: Состояние пользователя или None, если его нет.
+        """
+        cache = caches[settings.AUTH_USER_CACHE_ALIAS]
+        key: str = get_user_cache_key(user_id)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached or None
+        state: Optional[UserState] = (User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                                      .values_list('username', 'is_active', 'is_staff', 'is_superuser').first())
+        cache.set(key, tuple(state) if state is not None else (), settings.AUTH_USER_CACHE_TIMEOUT)
+        logger.info(f"Состояние пользователя {user_id} загружено из базы данных")
+        return tuple(state) if state is not None else None
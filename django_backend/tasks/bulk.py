@@ -0,0 +1,63 @@
+from typing import Any, Dict, List, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from tasks.categories import resolve_categories
+from tasks.models import Category, Task
+from tasks.serializers import TaskCreateSerializer
+from tasks.changes import tasks_changed
+from tasks.stats import update_category_counts, update_task_counts
+
+logger = settings.LOGGER.get_logger('bulk')
+
+
+def bulk_create_tasks(user: User, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Создает пачку задач пользователя за фиксированное число запросов.
+
+    Каждый элемент валидируется TaskCreateSerializer отдельно. Категории всех
+    валидных задач разрешаются одним запросом, недостающие категории, задачи и
+    связи задача-категория вставляются через bulk_create в одной транзакции.
+
+    Args:
+        user (User): Владелец создаваемых задач.
+        items (List[Dict[str, Any]]): Данные задач в формате TaskCreateSerializer.
+
+    Returns:
+        List[Dict[str, Any]]: Результат по каждому элементу в исходном порядке:
+            {"index", "status": "created", "id"} или {"index", "status": "error", "errors"}.
+    """
+    results: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, Task, List[str]]] = []
+
+    for index, item in enumerate(items):
+        serializer = TaskCreateSerializer(data=item)
+        if not serializer.is_valid():
+            results.append({"index": index, "status": "error", "errors": serializer.errors})
+            continue
+        data: Dict[str, Any] = dict(serializer.validated_data)
+        names: List[str] = [category['name'] for category in data.pop('categories', [])]
+        pending.append((index, Task(user=user, **data), names))
+
+    if pending:
+        with transaction.atomic():
+            categories: Dict[str, Category] = resolve_categories(user.id, (name for _, _, names in pending for name in names))
+            Task.objects.bulk_create([task for _, task, _ in pending])
+
+            Through = Task.categories.through
+            # Имена, различающиеся только регистром, дают одну категорию и одну связь
+            links = Through.objects.bulk_create([
+                Through(task_id=task.id, category_id=category_id)
+                for _, task, names in pending
+                for category_id in dict.fromkeys(categories[name].id for name in names)
+            ])
+            # bulk_create не отправляет сигналы, поэтому изменение регистрируем явно
+            tasks_changed([user.id])
+            update_task_counts((user.id, task.completed, 1) for _, task, _ in pending)
+            update_category_counts((user.id, link.category_id, 1) for link in links)
+
+        results.extend({"index": index, "status": "created", "id": task.id} for index, task, _ in pending)
+        results.sort(key=lambda result: result["index"])
+
+    logger.info(f"Массовое создание для пользователя {user}: создано {len(pending)} из {len(items)} задач")
+    return results
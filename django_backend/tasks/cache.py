@@ -0,0 +1,107 @@
+import hashlib
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+
+logger = settings.LOGGER.get_logger('cache')
+
+
+class TaskCache:
+    """
+    Кэш ответов списка и деталей задач пользователя.
+
+    Ключ ответа включает поколение задач пользователя, которое меняется и при
+    изменении его категорий. Инвалидация меняет поколение, поэтому одной операцией становятся
+    недоступны все закэшированные варианты запроса (курсоры, наборы полей).
+    Поколение читается до выборки данных, и ответ сохраняется под ключом
+    этого поколения. Запись задач меняет поколение и после фиксации своей
+    транзакции (см. tasks.changes.tasks_changed), поэтому старые строки,
+    прочитанные конкурентным запросом до фиксации, не остаются под
+    актуальным ключом.
+    """
+
+    def __init__(self, alias: str) -> None:
+        self.alias: str = alias
+
+    @property
+    def cache(self) -> Any:
+        return caches[self.alias]
+
+    @staticmethod
+    def _generation_key(name: Any) -> str:
+        return f"tasks:gen:{name}"
+
+    def _incr(self, key: str, initial: int) -> None:
+        """
+        Увеличивает счетчик, создавая его со значением initial, если его нет.
+        """
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, initial, None)
+
+    def get(self, user_id: int, path: str) -> Tuple[Optional[Any], str]:
+        """
+        Возвращает закэшированный ответ и ключ, под которым его нужно сохранить.
+
+        Args:
+            user_id (int): ID пользователя.
+            path (str): Полный путь запроса с параметрами.
+
+        Returns:
+            Tuple[Optional[Any], str]: Данные ответа или None и ключ кэша.
+        """
+        generation_key: str = self._generation_key(user_id)
+        generation: Optional[Any] = self.cache.get(generation_key)
+        if generation is None:
+            # Начальное поколение берется из времени, чтобы после вытеснения
+            # счетчика не вернуться к ключам старых ответов
+            self.cache.add(generation_key, time.time_ns(), None)
+            generation = self.cache.get(generation_key)
+        digest: str = hashlib.md5(path.encode('utf-8')).hexdigest()
+        key: str = f"tasks:{user_id}:{generation}:{digest}"
+        data: Optional[Any] = self.cache.get(key)
+        self._incr('tasks:stats:hits' if data is not None else 'tasks:stats:misses', 1)
+        return data, key
+
+    def set(self, key: str, data: Any) -> None:
+        """
+        Сохраняет ответ под ключом, полученным из get.
+
+        Args:
+            key (str): Ключ кэша.
+            data (Any): Данные ответа.
+        """
+        self.cache.set(key, data, settings.TASKS_CACHE_TIMEOUT)
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        """
+        Делает недоступными закэшированные ответы пользователей.
+
+        Args:
+            user_ids (Iterable[int]): ID пользователей, задачи которых изменились.
+        """
+        for user_id in set(user_ids):
+            self._incr(self._generation_key(user_id), time.time_ns())
+            self._incr('tasks:stats:invalidations', 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает счетчики попаданий, промахов и инвалидаций.
+
+        Returns:
+            Dict[str, Any]: Счетчики и доля попаданий.
+        """
+        counters: Dict[str, Any] = self.cache.get_many(['tasks:stats:hits', 'tasks:stats:misses', 'tasks:stats:invalidations'])
+        hits: int = counters.get('tasks:stats:hits', 0)
+        misses: int = counters.get('tasks:stats:misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+            'invalidations': counters.get('tasks:stats:invalidations', 0),
+        }
+
+
+task_cache = TaskCache(settings.TASKS_CACHE_ALIAS)
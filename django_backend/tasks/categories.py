@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, List, Set
+from django.conf import settings
+from tasks.models import Category, Task
+
+logger = settings.LOGGER.get_logger('categories')
+
+
+def find_categories(user_id: int, names: Iterable[str]) -> Dict[str, Category]:
+    """
+    Находит категории пользователя по именам без учета регистра одним запросом
+    по индексу (user, lower(name)).
+
+    Регистр сравнивает сама база, той же функцией lower(), что и уникальный
+    индекс, поэтому найденная категория совпадает с той, с которой конфликтует вставка.
+
+    Args:
+        user_id (int): ID владельца категорий.
+        names (Iterable[str]): Имена категорий.
+
+    Returns:
+        Dict[str, Category]: Найденные категории по запрошенному имени.
+    """
+    table: str = Category._meta.db_table
+    return {category.requested_name: category for category in Category.objects.raw(
+        f"SELECT c.id, c.user_id, c.name, w.name AS requested_name FROM unnest(%s::text[]) AS w(name) "
+        f"JOIN {table} c ON c.user_id = %s AND lower(c.name) = lower(w.name)",
+        [list(names), user_id],
+    )}
+
+
+def resolve_categories(user_id: int, names: Iterable[str]) -> Dict[str, Category]:
+    """
+    Находит категории пользователя по именам и создает недостающие.
+
+    Недостающие категории вставляются одним INSERT ... ON CONFLICT DO NOTHING
+    и перечитываются: если ту же категорию одновременно создал другой
+    запрос, конфликт по уникальному индексу (user, lower(name)) пропускает
+    вставку и используется его строка, поэтому дубликаты не появляются.
+    Изменение регистрирует вызывающий код, когда связывает категории с задачами.
+
+    Args:
+        user_id (int): ID владельца категорий.
+        names (Iterable[str]): Имена категорий, допускаются повторы и различия в регистре.
+
+    Returns:
+        Dict[str, Category]: Категории по запрошенному имени.
+    """
+    unique_names: List[str] = sorted(set(names))
+    if not unique_names:
+        return {}
+
+    categories: Dict[str, Category] = find_categories(user_id, unique_names)
+    missing: List[Category] = [Category(user_id=user_id, name=name) for name in unique_names if name not in categories]
+    if missing:
+        Category.objects.bulk_create(missing, ignore_conflicts=True)
+        categories.update(find_categories(user_id, [category.name for category in missing]))
+        created_ids: Set[str] = {category.id for category in missing}
+        created: List[str] = sorted({category.name for category in categories.values() if category.id in created_ids})
+        logger.info(f"Создано {len(created)} новых категорий пользователя {user_id}: {', '.join(created)}")
+    return categories
+
+
+def sync_task_categories(task: Task, names: Iterable[str], is_new: bool = False) -> None:
+    """
+    Приводит категории задачи к заданному набору имен (без учета регистра), применяя только разницу.
+
+    Текущие категории читаются одним запросом (или из prefetch-кэша), новые имена
+    разрешаются среди категорий владельца задачи через resolve_categories,
+    лишние связи удаляются одним DELETE, недостающие добавляются одной
+    вставкой. Если набор не изменился, запись в таблицу связей не выполняется.
+
+    Args:
+        task (Task): Задача.
+        names (Iterable[str]): Требуемые имена категорий.
+        is_new (bool): Задача только что создана и связей у нее еще нет.
+    """
+    desired: Dict[str, str] = {name.lower(): name for name in names}
+    current: Dict[str, str] = {} if is_new else {category.name.lower(): category.id for category in task.categories.all()}
+
+    removed_ids: List[str] = [category_id for name, category_id in current.items() if name not in desired]
+    added_names: List[str] = [name for key, name in desired.items() if key not in current]
+    if not removed_ids and not added_names:
+        logger.info(f"Категории задачи {task.id} не изменились")
+        return
+
+    if removed_ids:
+        task.categories.remove(*removed_ids)
+    if added_names:
+        task.categories.add(*resolve_categories(task.user_id, added_names).values())
+    logger.info(f"Категории задачи {task.id} обновлены: добавлено {len(added_names)}, удалено {len(removed_ids)}")
@@ -0,0 +1,229 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+from django.utils import timezone
+from tasks.models import Category, DataVersion, Task, TaskChange
+
+logger = settings.LOGGER.get_logger('changefeed')
+
+# Область DataVersion, в которой хранится наибольший ID транзакции удаленных из журнала записей
+CHANGES_HORIZON_SCOPE: str = 'task_changes:horizon'
+
+# ID текущей транзакции в виде bigint (xid8 не приводится к bigint напрямую)
+CURRENT_XID_SQL: str = "pg_current_xact_id()::text::bigint"
+
+
+class ChangeCursorExpired(Exception):
+    """
+    Курсор ссылается на изменения, уже удаленные из журнала: клиенту нужна полная синхронизация.
+    """
+
+
+def install_change_log_triggers(using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
+    """
+    Создает триггеры, которые записывают изменения задач в TaskChange.
+
+    Триггеры уровня оператора с таблицами переходов добавляют записи одним
+    INSERT ... SELECT на каждый оператор, поэтому массовая вставка и удаление
+    пачкой стоят одного дополнительного запроса. Изменение связей
+    задача-категория записывается как изменение задачи, если задача еще
+    существует, переименование категории - как изменение ее задач.
+    Подключается к сигналу post_migrate, операции идемпотентны.
+    """
+    connection = connections[using]
+    task_table: str = Task._meta.db_table
+    through_table: str = Task.categories.through._meta.db_table
+    category_table: str = Category._meta.db_table
+    change_table: str = TaskChange._meta.db_table
+    if not {task_table, change_table} <= set(connection.introspection.table_names()):
+        return
+    insert: str = f"INSERT INTO {change_table} (user_id, task_id, deleted, xid, created_at)"
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {task_table}_change_log() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    {insert} SELECT user_id, id, true, {CURRENT_XID_SQL}, now() FROM old_rows;
+                ELSE
+                    IF TG_OP = 'UPDATE' THEN
+                        -- Задача перешла к другому владельцу: для прежнего она удалена
+                        {insert} SELECT o.user_id, o.id, true, {CURRENT_XID_SQL}, now()
+                        FROM old_rows o JOIN new_rows n ON n.id = o.id WHERE n.user_id <> o.user_id;
+                    END IF;
+                    {insert} SELECT user_id, id, false, {CURRENT_XID_SQL}, now() FROM new_rows;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+        """)
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {through_table}_change_log() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    {insert} SELECT DISTINCT t.user_id, t.id, false, {CURRENT_XID_SQL}, now()
+                    FROM old_rows l JOIN {task_table} t ON t.id = l.task_id;
+                ELSE
+                    {insert} SELECT DISTINCT t.user_id, t.id, false, {CURRENT_XID_SQL}, now()
+                    FROM new_rows l JOIN {task_table} t ON t.id = l.task_id;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+        """)
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {category_table}_change_log() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                {insert} SELECT DISTINCT t.user_id, t.id, false, {CURRENT_XID_SQL}, now()
+                FROM new_rows n JOIN old_rows o ON o.id = n.id AND o.name IS DISTINCT FROM n.name
+                JOIN {through_table} l ON l.category_id = n.id JOIN {task_table} t ON t.id = l.task_id;
+                RETURN NULL;
+            END
+            $$
+        """)
+        triggers: List[Tuple[str, str, str]] = [
+            (task_table, 'INSERT', 'NEW TABLE AS new_rows'),
+            (task_table, 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+            (task_table, 'DELETE', 'OLD TABLE AS old_rows'),
+            (through_table, 'INSERT', 'NEW TABLE AS new_rows'),
+            (through_table, 'DELETE', 'OLD TABLE AS old_rows'),
+            (category_table, 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+        ]
+        for table, event, transition in triggers:
+            name: str = f"{table}_change_log_{event.lower()}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+            cursor.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} REFERENCING {transition} "
+                           f"FOR EACH STATEMENT EXECUTE FUNCTION {table}_change_log()")
+
+
+def get_completed_xid() -> int:
+    """
+    Возвращает ID транзакции, до которого все транзакции уже завершены (xmin снимка).
+
+    ID транзакций выдаются при первой записи, а не при фиксации, поэтому
+    изменения выдаются клиентам только ниже этой границы: транзакция с
+    меньшим ID не может зафиксироваться после того, как клиент получил курсор.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        return cursor.fetchone()[0]
+
+
+def encode_change_cursor(xid: int, change_id: int) -> str:
+    """
+    Кодирует позицию в журнале изменений в строку курсора "xid.id".
+    """
+    return f"{xid}.{change_id}"
+
+
+def decode_change_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Разбирает курсор журнала изменений.
+
+    Raises:
+        ValueError: Если курсор имеет неверный формат.
+    """
+    xid, change_id = cursor.split('.', 1)
+    return int(xid), int(change_id)
+
+
+def get_task_changes(user: User, since: Optional[str], limit: int) -> Dict[str, Any]:
+    """
+    Возвращает изменения задач пользователя после курсора.
+
+    Выбирается не более limit записей журнала по индексу (user_id, xid, id),
+    поэтому стоимость зависит от числа изменений, а не от числа задач. Из
+    нескольких изменений одной задачи учитывается последнее: существующие
+    задачи возвращаются в текущем состоянии, удаленные — списком ID.
+    Без курсора возвращается только текущий курсор: клиент получает его до
+    полной загрузки списка задач и затем синхронизируется от него.
+
+    Args:
+        user (User): Владелец задач.
+        since (Optional[str]): Курсор из предыдущего ответа.
+        limit (int): Максимальное количество записей журнала за запрос.
+
+    Returns:
+        Dict[str, Any]: Курсор, признак has_more, измененные задачи changed (объекты Task)
+            и ID удаленных задач deleted.
+
+    Raises:
+        ValueError: Если курсор имеет неверный формат.
+        ChangeCursorExpired: Если изменения после курсора уже удалены из журнала.
+    """
+    completed_xid: int = get_completed_xid()
+    if not since:
+        return {"cursor": encode_change_cursor(completed_xid, 0), "has_more": False, "changed": [], "deleted": []}
+
+    xid, change_id = decode_change_cursor(since)
+    horizon: int = DataVersion.objects.filter(scope=CHANGES_HORIZON_SCOPE).values_list('version', flat=True).first() or 0
+    if xid <= horizon:
+        raise ChangeCursorExpired(since)
+
+    entries: List[Tuple[int, str, bool, int]] = list(
+        TaskChange.objects.filter(Q(xid__gt=xid) | Q(xid=xid, id__gt=change_id), user_id=user.id, xid__lt=completed_xid)
+        .order_by('xid', 'id').values_list('id', 'task_id', 'deleted', 'xid')[:limit + 1]
+    )
+    has_more: bool = len(entries) > limit
+    entries = entries[:limit]
+
+    latest: Dict[str, bool] = {}
+    for _, task_id, deleted, _ in entries:
+        latest[task_id] = deleted
+    changed_ids: List[str] = [task_id for task_id, deleted in latest.items() if not deleted]
+    changed: List[Task] = list(
+        Task.objects.select_related('user').prefetch_related('categories').defer('search_vector')
+        .filter(user=user, id__in=changed_ids).order_by('id')
+    ) if changed_ids else []
+
+    if has_more:
+        cursor: str = encode_change_cursor(entries[-1][3], entries[-1][0])
+    else:
+        cursor = encode_change_cursor(completed_xid, 0)
+    logger.info(f"Выдано {len(entries)} изменений задач пользователя {user}, есть еще: {has_more}")
+    return {
+        "cursor": cursor,
+        "has_more": has_more,
+        "changed": changed,
+        "deleted": [task_id for task_id, deleted in latest.items() if deleted],
+    }
+
+
+def prune_task_changes() -> int:
+    """
+    Удаляет записи журнала старше TASK_CHANGES_RETENTION пачками по SWEEP_BATCH_SIZE.
+
+    Наибольший ID транзакции удаленных записей сохраняется в DataVersion:
+    курсоры не новее него считаются устаревшими (см. ChangeCursorExpired).
+
+    Returns:
+        int: Количество удаленных записей.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_CHANGES_RETENTION)
+    table: str = TaskChange._meta.db_table
+    total: int = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH batch AS MATERIALIZED (SELECT id FROM {table} WHERE created_at < %s ORDER BY created_at "
+                f"LIMIT %s) DELETE FROM {table} WHERE id IN (SELECT id FROM batch) RETURNING xid",
+                [cutoff, settings.SWEEP_BATCH_SIZE],
+            )
+            xids: List[int] = [row[0] for row in cursor.fetchall()]
+            if xids:
+                cursor.execute(
+                    f"INSERT INTO {DataVersion._meta.db_table} (scope, version) VALUES (%s, %s) "
+                    f"ON CONFLICT (scope) DO UPDATE SET version = GREATEST({DataVersion._meta.db_table}.version, "
+                    f"EXCLUDED.version)",
+                    [CHANGES_HORIZON_SCOPE, max(xids)],
+                )
+        total += len(xids)
+        if len(xids) < settings.SWEEP_BATCH_SIZE:
+            break
+    logger.info(f"Из журнала изменений задач удалено {total} записей")
+    return total
@@ -0,0 +1,39 @@
+from typing import Iterable, List
+from django.conf import settings
+from django.db import transaction
+from tasks.cache import task_cache
+from tasks.pubsub import task_events
+from tasks.versioning import bump_versions, user_scope
+
+logger = settings.LOGGER.get_logger('changes')
+
+
+def tasks_changed(user_ids: Iterable[int]) -> None:
+    """
+    Регистрирует изменение задач пользователей: увеличивает версии ETag,
+    сбрасывает закэшированные ответы и после фиксации транзакции уведомляет
+    потоковые соединения пользователей (tasks.pubsub).
+
+    Кэш сбрасывается дважды: сразу, чтобы запросы внутри транзакции не
+    получили старый ответ, и после фиксации. Конкурентный запрос, прочитавший
+    старые строки до фиксации, мог сохранить их под поколением первого
+    сброса; второй сброс делает этот ответ недоступным.
+
+    Вызывается из сигналов (в том числе при изменении категорий, которые
+    принадлежат одному пользователю) и явно из путей, которые пишут в обход
+    ORM (bulk_create, очистка задач).
+
+    Args:
+        user_ids (Iterable[int]): ID владельцев измененных задач.
+    """
+    user_ids: List[int] = list(set(user_ids))
+    if not user_ids:
+        return
+    bump_versions(user_scope(user_id) for user_id in user_ids)
+    task_cache.invalidate_users(user_ids)
+
+    def committed() -> None:
+        task_cache.invalidate_users(user_ids)
+        task_events.publish(user_ids)
+
+    transaction.on_commit(committed)
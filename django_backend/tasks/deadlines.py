@@ -0,0 +1,254 @@
+import heapq
+import os
+import select
+import threading
+import time
+from datetime import datetime
+from typing import Any, List, Optional
+import psycopg2
+import psycopg2.extensions
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, close_old_connections, connection, connections
+from django.utils import timezone
+from tasks.models import Task
+from tasks.task_management import expire_due_tasks
+
+logger = settings.LOGGER.get_logger('deadlines')
+
+# Ключ рекомендательной блокировки PostgreSQL: сроки обрабатывает один планировщик на базу
+DEADLINE_LOCK_KEY: int = 0x7461736B  # 'task'
+
+
+def install_deadline_trigger(using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
+    """
+    Создает триггеры, уведомляющие планировщик о новых сроках задач.
+
+    Триггеры уровня оператора на вставку и изменение задач отправляют в канал
+    DEADLINE_CHANNEL ближайший срок среди невыполненных задач оператора (в
+    секундах Unix-времени). NOTIFY доставляется при фиксации транзакции, так
+    что планировщик не узнает о сроках откаченных изменений. Подключается к
+    сигналу post_migrate, операции идемпотентны.
+    """
+    connection = connections[using]
+    task_table: str = Task._meta.db_table
+    if task_table not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {task_table}_deadline_notify() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            DECLARE
+                next_due timestamptz;
+            BEGIN
+                SELECT min(due_date) INTO next_due FROM new_rows WHERE NOT completed AND due_date IS NOT NULL;
+                IF next_due IS NOT NULL THEN
+                    PERFORM pg_notify('{settings.DEADLINE_CHANNEL}', extract(epoch FROM next_due)::text);
+                END IF;
+                RETURN NULL;
+            END
+            $$
+        """)
+        for event, transition in (('INSERT', 'NEW TABLE AS new_rows'),
+                                  ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows')):
+            name: str = f"{task_table}_deadline_{event.lower()}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name} ON {task_table}")
+            cursor.execute(f"CREATE TRIGGER {name} AFTER {event} ON {task_table} REFERENCING {transition} "
+                           f"FOR EACH STATEMENT EXECUTE FUNCTION {task_table}_deadline_notify()")
+
+
+class DeadlineHeap:
+    """
+    Минимальная куча ближайших сроков невыполненных задач.
+
+    В куче хранится не больше окна из DEADLINE_SCHEDULER_WINDOW ближайших
+    сроков из базы и сроки, о которых сообщил триггер. Если окно заполнено,
+    его последний срок становится горизонтом: более поздние сроки в куче не
+    хранятся, а после горизонта окно загружается заново. Сроки измененных
+    или удаленных задач не удаляются из кучи: лишнее пробуждение стоит одного
+    пустого запроса по частичному индексу.
+    """
+
+    def __init__(self) -> None:
+        self.heap: List[float] = []
+        # Unix-время последнего срока в заполненном окне или None, если в окно попали все сроки
+        self.horizon: Optional[float] = None
+
+    def load(self, deadlines: List[datetime], window: int) -> None:
+        """
+        Заменяет содержимое кучи сроками из базы, отсортированными по возрастанию.
+        """
+        self.heap = [deadline.timestamp() for deadline in deadlines]
+        heapq.heapify(self.heap)
+        self.horizon = deadlines[-1].timestamp() if deadlines and len(deadlines) >= window else None
+
+    def push(self, deadline: float) -> None:
+        """
+        Добавляет срок, о котором сообщил триггер. Сроки после горизонта пропускаются.
+        """
+        if self.horizon is None or deadline <= self.horizon:
+            heapq.heappush(self.heap, deadline)
+
+    def next_wake(self) -> Optional[float]:
+        """
+        Возвращает Unix-время ближайшего срока или горизонта, либо None, если ждать нечего.
+        """
+        if self.heap:
+            return self.heap[0]
+        return self.horizon
+
+    def pop_due(self, now: float) -> int:
+        """
+        Удаляет из кучи наступившие сроки и возвращает их количество.
+        """
+        count: int = 0
+        while self.heap and self.heap[0] <= now:
+            heapq.heappop(self.heap)
+            count += 1
+        return count
+
+    def needs_reload(self, now: float) -> bool:
+        """
+        Проверяет, пройден ли горизонт окна.
+        """
+        return self.horizon is not None and now >= self.horizon
+
+
+class DeadlineScheduler:
+    """
+    Планировщик удаления просроченных задач точно в срок.
+
+    Вместо периодического полного прохода планировщик держит кучу ближайших
+    сроков (DeadlineHeap), спит до первого из них и удаляет только задачи,
+    срок которых уже наступил (tasks.task_management.expire_due_tasks). О
+    новых и перенесенных сроках он узнает через LISTEN на канале
+    DEADLINE_CHANNEL (см. install_deadline_trigger), поэтому задача с близким
+    сроком, созданная во время сна, будит его сразу. Сон не длиннее
+    DEADLINE_SCHEDULER_MAX_SLEEP секунд: после него окно сроков загружается
+    заново, что страхует от потерянных уведомлений.
+
+    Из нескольких запущенных планировщиков работает один: тот, что получил
+    рекомендательную блокировку DEADLINE_LOCK_KEY. Остальные ждут ее
+    освобождения, например при падении ведущего процесса.
+    """
+
+    def __init__(self) -> None:
+        self.deadlines = DeadlineHeap()
+        self.listener: Optional[psycopg2.extensions.connection] = None
+        self.stopped = threading.Event()
+        # Канал для пробуждения из stop(): select() не прерывается сигналами и установкой событий
+        self.wakeup_read, self.wakeup_write = os.pipe()
+
+    def stop(self) -> None:
+        """
+        Останавливает планировщик. Может вызываться из любого потока и из обработчика сигнала.
+        """
+        self.stopped.set()
+        os.write(self.wakeup_write, b'\0')
+
+    def connect(self) -> psycopg2.extensions.connection:
+        """
+        Открывает отдельное соединение для LISTEN в обход пула: оно держится все время работы планировщика.
+        """
+        listener = psycopg2.connect(**connection.get_connection_params())
+        listener.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return listener
+
+    def acquire(self) -> bool:
+        """
+        Пытается получить блокировку ведущего планировщика и подписаться на канал сроков.
+        """
+        with self.listener.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [DEADLINE_LOCK_KEY])
+            if not cursor.fetchone()[0]:
+                return False
+            cursor.execute(f"LISTEN {settings.DEADLINE_CHANNEL}")
+        return True
+
+    def reload(self) -> None:
+        """
+        Загружает окно ближайших будущих сроков по частичному индексу task_open_due_idx.
+
+        Наступившие сроки не загружаются: задачи, пропущенные expire_due_tasks
+        из-за блокировки, удалит следующий проход, а не повторное пробуждение.
+        """
+        try:
+            deadlines: List[datetime] = list(
+                Task.objects.filter(completed=False, due_date__gt=timezone.now()).order_by('due_date')
+                .values_list('due_date', flat=True)[:settings.DEADLINE_SCHEDULER_WINDOW])
+        finally:
+            close_old_connections()
+        self.deadlines.load(deadlines, settings.DEADLINE_SCHEDULER_WINDOW)
+
+    def expire(self) -> None:
+        """
+        Удаляет задачи с наступившим сроком.
+        """
+        try:
+            count: int = expire_due_tasks(timezone.now())
+        finally:
+            close_old_connections()
+        if count:
+            logger.info(f"Удалено {count} просроченных задач")
+
+    def receive(self) -> None:
+        """
+        Добавляет в кучу сроки из полученных уведомлений.
+        """
+        self.listener.poll()
+        while self.listener.notifies:
+            payload: str = self.listener.notifies.pop(0).payload
+            try:
+                self.deadlines.push(float(payload))
+            except ValueError:
+                logger.warning(f"Неверное уведомление о сроке задачи: {payload}")
+
+    def step(self) -> None:
+        """
+        Ждет ближайшего срока или уведомления и обрабатывает наступившие сроки.
+        """
+        next_wake: Optional[float] = self.deadlines.next_wake()
+        timeout: float = settings.DEADLINE_SCHEDULER_MAX_SLEEP
+        waiting_deadline: bool = next_wake is not None and next_wake - time.time() < timeout
+        if waiting_deadline:
+            timeout = max(next_wake - time.time(), 0)
+        ready: List[Any] = select.select([self.listener, self.wakeup_read], [], [], timeout)[0]
+        if self.stopped.is_set():
+            return
+        if ready:
+            self.receive()
+        elif not waiting_deadline:
+            # Проснулись по максимальному сну: перечитываем окно на случай потерянных уведомлений
+            self.expire()
+            self.reload()
+            return
+        now: float = time.time()
+        if self.deadlines.pop_due(now):
+            self.expire()
+        if self.deadlines.needs_reload(now):
+            self.reload()
+
+    def run(self) -> None:
+        """
+        Работает до вызова stop(), переподключаясь после ошибок базы.
+        """
+        while not self.stopped.is_set():
+            try:
+                self.listener = self.connect()
+                if not self.acquire():
+                    self.stopped.wait(settings.DEADLINE_SCHEDULER_MAX_SLEEP)
+                    continue
+                logger.info("Планировщик сроков задач запущен")
+                # LISTEN выполнен до загрузки окна, поэтому сроки, появившиеся между ними, не теряются
+                self.expire()
+                self.reload()
+                while not self.stopped.is_set():
+                    self.step()
+            except (psycopg2.Error, DatabaseError) as e:
+                logger.log_exception(f"Ошибка планировщика сроков задач, переподключение: {str(e)}")
+                self.stopped.wait(1)
+            finally:
+                if self.listener is not None:
+                    self.listener.close()
+                    self.listener = None
+                close_old_connections()
+        connection.close()
@@ -0,0 +1,186 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, DefaultDict, Dict, Iterator, List, Optional, Tuple
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q, QuerySet
+from rest_framework import serializers
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from tasks.models import Task
+
+logger = settings.LOGGER.get_logger('export')
+
+# Поля задачи в выгрузке, в том же порядке, что и в ответах API (см. TaskCreateSerializer)
+EXPORT_FIELDS: List[str] = ['id', 'title', 'description', 'created_at', 'due_date', 'completed', 'user']
+# Разделитель названий категорий в колонке categories выгрузки CSV
+CSV_CATEGORY_SEPARATOR: str = '; '
+
+_datetime_field = serializers.DateTimeField()
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Рендерер выгрузки задач в NDJSON: одна задача в формате JSON на строку.
+
+    Сами задачи отдаются потоковым ответом (см. TaskExporter), рендерер
+    нужен для выбора формата по ?format= и Accept и отдает ответы с ошибкой в JSON.
+    """
+    media_type: str = 'application/x-ndjson'
+    format: str = 'ndjson'
+    charset: str = 'utf-8'
+
+    def render(self, data: Any, accepted_media_type: Optional[str] = None, renderer_context: Any = None) -> bytes:
+        return JSONRenderer().render(data)
+
+
+class CSVRenderer(NDJSONRenderer):
+    """
+    Рендерер выгрузки задач в CSV. Ответы с ошибкой отдаются в JSON.
+    """
+    media_type: str = 'text/csv'
+    format: str = 'csv'
+
+
+class TaskExporter:
+    """
+    Потоковая выгрузка задач в NDJSON или CSV с постоянным расходом памяти.
+
+    Задачи читаются пачками по chunk_size строк keyset-запросами по паре
+    (created_at, id) по индексу (user, created_at, id), категории пачки —
+    одним запросом к промежуточной таблице. В памяти держится только текущая
+    пачка, поэтому расход памяти не зависит от числа задач. Каждая пачка —
+    отдельный короткий запрос: выгрузка не держит открытую транзакцию и
+    соединение между пачками, но и не видит единый снимок данных: задачи,
+    созданные во время выгрузки, могут попасть в ее конец.
+
+    Части выгрузки отдаются синхронно (chunks, для WSGI) и асинхронно
+    (achunks, для ASGI): в Django 4.2 StreamingHttpResponse под ASGI собирает
+    синхронный итератор целиком в память, а под WSGI — асинхронный, поэтому
+    представление выбирает вариант по типу запроса (см. TaskViewSet.export).
+    """
+
+    def __init__(self, queryset: QuerySet, export_format: str, chunk_size: Optional[int] = None) -> None:
+        self.queryset: QuerySet = queryset.order_by('created_at', 'id').values(*EXPORT_FIELDS)
+        self.export_format: str = export_format
+        self.chunk_size: int = chunk_size or settings.TASK_EXPORT_CHUNK_SIZE
+        self.rows: int = 0
+
+    def fetch_chunk(self, position: Optional[Tuple[datetime, str]]) -> List[Dict[str, Any]]:
+        """
+        Читает пачку задач после позиции (created_at, id) вместе с категориями.
+
+        Args:
+            position (Optional[Tuple[datetime, str]]): Позиция последней выгруженной задачи или None для первой пачки.
+
+        Returns:
+            List[Dict[str, Any]]: Задачи пачки со списком категорий [{id, name}] в поле categories.
+        """
+        queryset: QuerySet = self.queryset
+        if position is not None:
+            created_at, pk = position
+            # Условие created_at >= ... задает начало диапазона индекса, без него PostgreSQL
+            # проверяет условие OR для всех уже выгруженных задач пользователя
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk),
+                                       created_at__gte=created_at)
+        rows: List[Dict[str, Any]] = list(queryset[:self.chunk_size])
+        if not rows:
+            return rows
+        categories: DefaultDict[str, List[Dict[str, str]]] = defaultdict(list)
+        links: QuerySet = Task.categories.through.objects.filter(task_id__in=[row['id'] for row in rows]) \
+            .order_by('task_id', 'category_id').values_list('task_id', 'category_id', 'category__name')
+        for task_id, category_id, name in links:
+            categories[task_id].append({'id': category_id, 'name': name})
+        for row in rows:
+            row['categories'] = categories.get(row['id'], [])
+        return rows
+
+    def header(self) -> bytes:
+        """
+        Возвращает начало выгрузки: строку заголовков для CSV, пустую строку для NDJSON.
+        """
+        if self.export_format != CSVRenderer.format:
+            return b''
+        return self.render_csv([EXPORT_FIELDS + ['categories']])
+
+    def render_csv(self, lines: List[List[Any]]) -> bytes:
+        """
+        Форматирует строки CSV.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(lines)
+        return buffer.getvalue().encode('utf-8')
+
+    def render_chunk(self, rows: List[Dict[str, Any]]) -> bytes:
+        """
+        Форматирует пачку задач в выбранном формате. Даты выводятся так же, как в ответах API.
+        """
+        for row in rows:
+            row['created_at'] = _datetime_field.to_representation(row['created_at'])
+            if row['due_date'] is not None:
+                row['due_date'] = _datetime_field.to_representation(row['due_date'])
+        if self.export_format == CSVRenderer.format:
+            return self.render_csv([
+                [row[field] for field in EXPORT_FIELDS]
+                + [CSV_CATEGORY_SEPARATOR.join(category['name'] for category in row['categories'])]
+                for row in rows
+            ])
+        return ''.join(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n' for row in rows).encode('utf-8')
+
+    def next_chunk(self, position: Optional[Tuple[datetime, str]]) -> Tuple[bytes, Optional[Tuple[datetime, str]]]:
+        """
+        Читает и форматирует пачку задач после позиции.
+
+        Returns:
+            Tuple[bytes, Optional[Tuple[datetime, str]]]: Данные пачки и позиция следующей пачки или None, если задачи закончились.
+        """
+        rows: List[Dict[str, Any]] = self.fetch_chunk(position)
+        if not rows:
+            return b'', None
+        self.rows += len(rows)
+        last: Dict[str, Any] = rows[-1]
+        next_position: Optional[Tuple[datetime, str]] = (last['created_at'], last['id']) \
+            if len(rows) == self.chunk_size else None
+        return self.render_chunk(rows), next_position
+
+    def finish(self) -> None:
+        """
+        Записывает в журнал итог выгрузки.
+        """
+        logger.info(f"Выгружено {self.rows} задач в формате {self.export_format}")
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Возвращает выгрузку по частям для WSGI.
+        """
+        yield self.header()
+        chunk, position = self.next_chunk(None)
+        yield chunk
+        while position is not None:
+            chunk, position = self.next_chunk(position)
+            yield chunk
+        self.finish()
+
+    async def achunks(self) -> AsyncIterator[bytes]:
+        """
+        Возвращает выгрузку по частям для ASGI: пачки читаются в пуле потоков, не блокируя цикл событий.
+        """
+        yield self.header()
+        chunk, position = await sync_to_async(self.read_chunk, thread_sensitive=False)(None)
+        yield chunk
+        while position is not None:
+            chunk, position = await sync_to_async(self.read_chunk, thread_sensitive=False)(position)
+            yield chunk
+        self.finish()
+
+    def read_chunk(self, position: Optional[Tuple[datetime, str]]) -> Tuple[bytes, Optional[Tuple[datetime, str]]]:
+        """
+        Вариант next_chunk для пула потоков ASGI: освобождает соединение потока после чтения.
+        """
+        try:
+            return self.next_chunk(position)
+        finally:
+            close_old_connections()
@@ -0,0 +1,102 @@
+from typing import Any, Dict, Mapping, Optional, Tuple
+from django.conf import settings
+from django.db.models import Exists, OuterRef, QuerySet
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from tasks.models import Task
+
+logger = settings.LOGGER.get_logger('filters')
+
+# Поля, по которым разрешена сортировка списка задач, и допускают ли они NULL.
+# Для каждого поля есть индекс, начинающийся с user (см. Task.Meta.indexes)
+TASK_ORDERING_FIELDS: Dict[str, bool] = {
+    'created_at': False,
+    'due_date': True,
+}
+DEFAULT_TASK_ORDERING: str = 'created_at'
+
+# Параметры запроса с границами диапазонов: параметр -> условие фильтра
+TASK_RANGE_FILTERS: Dict[str, str] = {
+    'due_after': 'due_date__gte',
+    'due_before': 'due_date__lt',
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+}
+
+_boolean_field = serializers.BooleanField()
+_datetime_field = serializers.DateTimeField()
+
+
+def _parse(field: serializers.Field, name: str, value: str) -> Any:
+    """
+    Преобразует значение параметра запроса полем сериализатора.
+
+    Raises:
+        ValidationError: Если значение имеет неверный формат.
+    """
+    try:
+        return field.to_internal_value(value)
+    except ValidationError as e:
+        logger.warning(f"Неверное значение параметра {name}: {value}")
+        raise ValidationError({name: e.detail})
+
+
+def filter_tasks(queryset: QuerySet, params: Mapping[str, str]) -> QuerySet:
+    """
+    Применяет к задачам фильтры из параметров запроса.
+
+    Поддерживаются completed, due_after/due_before, created_after/created_before
+    (нижняя граница включается, верхняя нет), category (ID категории) и
+    category_name (название без учета регистра). Все условия выполняются в
+    SQL: вместе с фильтром по пользователю они используют индексы
+    (user, completed, due_date) и (user, created_at, id), а категории
+    проверяются подзапросом EXISTS, поэтому задачи не дублируются.
+
+    Args:
+        queryset (QuerySet): Задачи пользователя.
+        params (Mapping[str, str]): Параметры запроса.
+
+    Returns:
+        QuerySet: Отфильтрованные задачи.
+
+    Raises:
+        ValidationError: Если значение параметра имеет неверный формат.
+    """
+    conditions: Dict[str, Any] = {}
+    if params.get('completed'):
+        conditions['completed'] = _parse(_boolean_field, 'completed', params['completed'])
+    for name, lookup in TASK_RANGE_FILTERS.items():
+        if params.get(name):
+            conditions[lookup] = _parse(_datetime_field, name, params[name])
+    if conditions:
+        queryset = queryset.filter(**conditions)
+
+    links: QuerySet = Task.categories.through.objects.filter(task_id=OuterRef('pk'))
+    if params.get('category'):
+        queryset = queryset.filter(Exists(links.filter(category_id=params['category'])))
+    if params.get('category_name'):
+        queryset = queryset.filter(Exists(links.filter(category__name__iexact=params['category_name'])))
+    return queryset
+
+
+def parse_task_ordering(raw: Optional[str]) -> Tuple[str, bool]:
+    """
+    Разбирает параметр ?ordering= списка задач.
+
+    Args:
+        raw (Optional[str]): Значение параметра, например "due_date" или "-created_at".
+
+    Returns:
+        Tuple[str, bool]: Поле сортировки и признак сортировки по убыванию.
+
+    Raises:
+        ValidationError: Если сортировка по полю не разрешена.
+    """
+    raw = raw or DEFAULT_TASK_ORDERING
+    field: str = raw[1:] if raw.startswith('-') else raw
+    if field not in TASK_ORDERING_FIELDS:
+        logger.warning(f"Запрошена неподдерживаемая сортировка: {raw}")
+        raise ValidationError({'ordering': [f"Допустимые значения: {', '.join(TASK_ORDERING_FIELDS)} "
+                                            f"(с '-' для сортировки по убыванию)"]})
+    return field, raw.startswith('-')
+
@@ -0,0 +1,281 @@
+import atexit
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+import psycopg2
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = settings.LOGGER.get_logger('ids')
+
+EPOCH_MS: int = 1704067200000  # 2024-01-01T00:00:00Z, начало отсчета временной части ID
+NODE_BITS: int = 10
+SEQUENCE_BITS: int = 12
+MAX_NODE_ID: int = (1 << NODE_BITS) - 1
+MAX_SEQUENCE: int = (1 << SEQUENCE_BITS) - 1
+
+
+class SnowflakeIdGenerator:
+    """
+    Генератор упорядоченных по времени идентификаторов.
+
+    ID состоит из 41 бита миллисекунд от EPOCH_MS, 10 бит номера узла и
+    12 бит последовательности внутри миллисекунды и выводится как 16 hex-символов,
+    поэтому строковый порядок совпадает с порядком создания. За одну
+    миллисекунду узел выдает до 4096 ID без обращений к базе данных.
+    """
+
+    def __init__(self, node_id: int) -> None:
+        """
+        Args:
+            node_id (int): Номер узла (0..1023), уникальный для каждого процесса.
+
+        Raises:
+            ValueError: Если номер узла вне допустимого диапазона.
+        """
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"Номер узла должен быть в диапазоне 0..{MAX_NODE_ID}, получено {node_id}")
+        self.node_id: int = node_id
+        self._lock = threading.Lock()
+        self._last_ms: int = -1
+        self._sequence: int = 0
+
+    @staticmethod
+    def _current_ms() -> int:
+        return int(time.time() * 1000) - EPOCH_MS
+
+    def _next_value(self) -> int:
+        """
+        Возвращает следующее числовое значение ID. Вызывается под блокировкой.
+        """
+        now: int = self._current_ms()
+        if now < self._last_ms:
+            # Часы ушли назад: продолжаем с последней выданной миллисекунды
+            now = self._last_ms
+        if now == self._last_ms:
+            self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+            if self._sequence == 0:
+                # Последовательность исчерпана, ждем следующую миллисекунду
+                while now <= self._last_ms:
+                    now = self._current_ms()
+        else:
+            self._sequence = 0
+        self._last_ms = now
+        return (now << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+    def generate(self) -> str:
+        """
+        Генерирует один ID.
+
+        Returns:
+            str: ID из 16 hex-символов.
+        """
+        with self._lock:
+            return format(self._next_value(), '016x')
+
+    def generate_batch(self, count: int) -> List[str]:
+        """
+        Генерирует пачку возрастающих ID за один захват блокировки.
+
+        Args:
+            count (int): Количество ID.
+
+        Returns:
+            List[str]: Список ID в порядке возрастания.
+        """
+        with self._lock:
+            return [format(self._next_value(), '016x') for _ in range(count)]
+
+    def set_node(self, node_id: int) -> None:
+        """
+        Переключает генератор на другой номер узла, например после потери аренды.
+        """
+        with self._lock:
+            self.node_id = node_id
+
+
+class NodeLease:
+    """
+    Аренда уникального номера узла генератора в PostgreSQL.
+
+    Процесс занимает свободный номер из диапазона строкой IdNodeLease со
+    сроком ttl секунд и продлевает ее из фонового потока каждую треть срока
+    (см. watch). Номер упавшего процесса снова становится свободным после
+    истечения срока. Каждый запрос выполняется в своей транзакции на
+    отдельном коротком соединении: аренда не зависит от транзакций
+    вызывающего кода и не держит соединение между продлениями.
+
+    Если продлить аренду не удалось, генератор переходит на новый номер;
+    пока аренда истекла, ID не выдаются (см. get_id_generator).
+    """
+
+    def __init__(self, first: int, last: int, ttl: int) -> None:
+        """
+        Args:
+            first (int): Первый номер диапазона.
+            last (int): Последний номер диапазона.
+            ttl (int): Срок аренды в секундах.
+
+        Raises:
+            ValueError: Если диапазон вне 0..MAX_NODE_ID.
+        """
+        if not 0 <= first <= last <= MAX_NODE_ID:
+            raise ValueError(f"Диапазон номеров узла должен лежать в 0..{MAX_NODE_ID}, получено {first}-{last}")
+        self.first: int = first
+        self.last: int = last
+        self.ttl: int = ttl
+        self.pid: int = os.getpid()
+        self.owner: str = f"{socket.gethostname()}:{self.pid}:{uuid.uuid4().hex[:8]}"
+        self.node_id: Optional[int] = None
+        # Момент (time.monotonic) окончания аренды по часам процесса
+        self.valid_until: float = 0.0
+        self.stopped = threading.Event()
+        # Параметры запоминаются, чтобы освобождение при выходе шло в ту же базу, что и аренда
+        self.connection_params: Dict[str, Any] = connection.get_connection_params()
+
+    def _execute(self, sql: str, params: List[Any]) -> List[tuple]:
+        """
+        Выполняет запрос к таблице аренды в отдельной транзакции на отдельном соединении.
+        """
+        from tasks.models import IdNodeLease
+        table: str = IdNodeLease._meta.db_table
+        lease_connection = psycopg2.connect(**self.connection_params)
+        try:
+            with lease_connection, lease_connection.cursor() as cursor:
+                # Захваты номеров выполняются по очереди, поэтому два процесса не выбирают один свободный номер
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [table])
+                cursor.execute(sql.format(table=table), params)
+                return cursor.fetchall()
+        finally:
+            lease_connection.close()
+
+    def acquire(self) -> int:
+        """
+        Арендует наименьший свободный номер диапазона: без строки аренды или с истекшей арендой.
+
+        Returns:
+            int: Номер узла.
+
+        Raises:
+            RuntimeError: Если свободных номеров в диапазоне нет.
+        """
+        started: float = time.monotonic()
+        rows: List[tuple] = self._execute("""
+            INSERT INTO {table} AS lease (node_id, owner, expires_at)
+            SELECT node, %s, now() + %s * interval '1 second'
+            FROM generate_series(%s, %s) AS node
+            WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE node_id = node AND expires_at > now())
+            ORDER BY node
+            LIMIT 1
+            ON CONFLICT (node_id) DO UPDATE SET owner = EXCLUDED.owner, expires_at = EXCLUDED.expires_at
+            RETURNING node_id
+        """, [self.owner, self.ttl, self.first, self.last])
+        if not rows:
+            raise RuntimeError(f"Нет свободных номеров узла генератора ID в диапазоне {self.first}-{self.last}")
+        self.node_id = rows[0][0]
+        self.valid_until = started + self.ttl
+        return self.node_id
+
+    def renew(self) -> bool:
+        """
+        Продлевает аренду текущего номера.
+
+        Returns:
+            bool: False, если номер больше не принадлежит процессу.
+        """
+        started: float = time.monotonic()
+        renewed: bool = bool(self._execute(
+            "UPDATE {table} SET expires_at = now() + %s * interval '1 second' "
+            "WHERE node_id = %s AND owner = %s RETURNING node_id", [self.ttl, self.node_id, self.owner]))
+        if renewed:
+            self.valid_until = started + self.ttl
+        return renewed
+
+    def release(self) -> None:
+        """
+        Освобождает номер, чтобы его можно было занять, не дожидаясь истечения срока.
+
+        Вызывается при завершении процесса. В дочернем процессе после fork
+        ничего не делает: аренда принадлежит родителю.
+        """
+        self.stopped.set()
+        if self.node_id is None or os.getpid() != self.pid:
+            return
+        try:
+            self._execute("DELETE FROM {table} WHERE node_id = %s AND owner = %s RETURNING node_id",
+                          [self.node_id, self.owner])
+        except psycopg2.Error as e:
+            logger.warning(f"Не удалось освободить номер узла {self.node_id} генератора ID: {str(e)}")
+
+    def expired(self) -> bool:
+        """
+        Проверяет, истекла ли аренда по часам процесса.
+        """
+        return time.monotonic() >= self.valid_until
+
+    def watch(self, generator: SnowflakeIdGenerator) -> None:
+        """
+        Цикл потока продления: продлевает аренду и при ее потере переключает генератор на новый номер.
+        """
+        while not self.stopped.wait(self.ttl / 3):
+            try:
+                if self.renew():
+                    continue
+                logger.error(f"Аренда номера узла {self.node_id} генератора ID потеряна, арендуется новый номер")
+                generator.set_node(self.acquire())
+                logger.info(f"Генератор ID переключен на узел {self.node_id}")
+            except (psycopg2.Error, RuntimeError) as e:
+                logger.log_exception(f"Ошибка продления аренды номера узла генератора ID: {str(e)}")
+
+
+_generator: Optional[SnowflakeIdGenerator] = None
+_generator_lease: Optional[NodeLease] = None
+_generator_pid: Optional[int] = None
+_generator_lock = threading.Lock()
+
+
+def get_id_generator() -> SnowflakeIdGenerator:
+    """
+    Возвращает генератор ID процесса, заданный настройкой ID_GENERATOR.
+
+    Номер узла арендуется в PostgreSQL из диапазона ID_GENERATOR_NODE_RANGE
+    (см. NodeLease), поэтому он уникален для каждого процесса, в том числе
+    для процессов в разных контейнерах. Генератор пересоздается после fork,
+    чтобы дочерние процессы арендовали собственный номер.
+
+    Returns:
+        SnowflakeIdGenerator: Экземпляр генератора.
+
+    Raises:
+        RuntimeError: Если свободного номера узла нет или аренда истекла и не продлена.
+        psycopg2.Error: Если номер узла не удалось арендовать из-за ошибки базы.
+    """
+    global _generator, _generator_lease, _generator_pid
+    pid: int = os.getpid()
+    if _generator is None or _generator_pid != pid:
+        with _generator_lock:
+            if _generator is None or _generator_pid != pid:
+                first, last = settings.ID_GENERATOR_NODE_RANGE
+                lease = NodeLease(first, last, settings.ID_GENERATOR_LEASE_TTL)
+                generator = import_string(settings.ID_GENERATOR)(lease.acquire())
+                threading.Thread(target=lease.watch, args=(generator,), name='id-node-lease', daemon=True).start()
+                atexit.register(lease.release)
+                _generator, _generator_lease, _generator_pid = generator, lease, pid
+                logger.info(f"Инициализирован генератор ID {settings.ID_GENERATOR} для узла {lease.node_id}")
+    if _generator_lease.expired():
+        raise RuntimeError(f"Аренда номера узла {_generator_lease.node_id} генератора ID истекла и не продлена")
+    return _generator
+
+
+def generate_id() -> str:
+    """
+    Генерирует новый ID для моделей с CustomPKModel.
+
+    Returns:
+        str: Новый ID.
+    """
+    return get_id_generator().generate()
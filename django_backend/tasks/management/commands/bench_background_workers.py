@@ -0,0 +1,91 @@
+import json
+import time
+from typing import Any, List
+from background_task import background
+from background_task.models import CompletedTask, Task as BackgroundTask
+from background_task.tasks import tasks as task_registry
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.utils import timezone
+from tasks.workers import WorkerPool
+
+logger = settings.LOGGER.get_logger('bench_background_workers')
+
+BENCH_QUEUE: str = 'bench'
+
+
+@background(name='tasks.bench.background_job', queue=BENCH_QUEUE)
+def bench_job(delay_ms: float) -> None:
+    """
+    Задание бенчмарка: ожидание, имитирующее запрос к базе или внешнему сервису.
+    """
+    time.sleep(delay_ms / 1000)
+
+
+class Command(BaseCommand):
+    """
+    Измеряет пропускную способность фоновых заданий: прежний цикл process_tasks против пула WorkerPool.
+
+    Задания ставятся в отдельную очередь bench и выполняются полностью,
+    вместе с записью CompletedTask, как обычные задания. Для прежнего цикла
+    измеряется только выбор и выполнение заданий, без пауз process_tasks
+    между заданиями. Записи очереди bench удаляются в конце.
+    """
+    help = "Бенчмарк фоновых заданий: задания в секунду при разном числе обработчиков"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--jobs', type=int, default=1000, help="Количество заданий на прогон")
+        parser.add_argument('--job-ms', type=float, default=5.0, help="Длительность одного задания, мс")
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16], help="Числа обработчиков")
+
+    def enqueue(self, jobs: int, job_ms: float) -> None:
+        now = timezone.now()
+        params: str = json.dumps([[job_ms], {}])
+        BackgroundTask.objects.bulk_create([
+            BackgroundTask(task_name=bench_job.name, task_params=params, task_hash=f"bench{index}",
+                           run_at=now, queue=BENCH_QUEUE)
+            for index in range(jobs)
+        ])
+
+    def cleanup(self) -> None:
+        BackgroundTask.objects.filter(queue=BENCH_QUEUE).delete()
+        CompletedTask.objects.filter(queue=BENCH_QUEUE).delete()
+
+    def run_legacy(self) -> float:
+        started: float = time.perf_counter()
+        while task_registry.run_next_task(BENCH_QUEUE):
+            pass
+        return time.perf_counter() - started
+
+    def run_pool(self, jobs: int, workers: int) -> float:
+        pool = WorkerPool(workers, [BENCH_QUEUE], queue_limits={})
+        started: float = time.perf_counter()
+        pool.start()
+        while pool.processed < jobs:
+            time.sleep(0.01)
+        elapsed: float = time.perf_counter() - started
+        pool.stop()
+        pool.join()
+        return elapsed
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        jobs: int = options['jobs']
+        job_ms: float = options['job_ms']
+        results: List[str] = []
+        self.cleanup()
+        try:
+            self.enqueue(jobs, job_ms)
+            elapsed: float = self.run_legacy()
+            results.append(f"process_tasks: {jobs / elapsed:.0f} заданий/с")
+            self.stdout.write(results[-1])
+            for workers in options['workers']:
+                self.cleanup()
+                self.enqueue(jobs, job_ms)
+                connection.close()
+                elapsed = self.run_pool(jobs, workers)
+                results.append(f"WorkerPool({workers}): {jobs / elapsed:.0f} заданий/с")
+                self.stdout.write(results[-1])
+        finally:
+            self.cleanup()
+        logger.info(f"Бенчмарк фоновых заданий ({jobs} заданий по {job_ms} мс): {', '.join(results)}")
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from typing import Any, List
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from tasks.categories import resolve_categories
+from tasks.models import Task
+
+logger = settings.LOGGER.get_logger('bench_task_export')
+
+PAGE_SIZE: int = os.sysconf('SC_PAGE_SIZE')
+
+
+def get_rss() -> int:
+    """
+    Возвращает текущий размер резидентной памяти процесса в байтах.
+    """
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+class RSSSampler(threading.Thread):
+    """
+    Поток, замеряющий пиковую резидентную память процесса каждые interval секунд.
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        super().__init__(daemon=True)
+        self.interval: float = interval
+        self.peak: int = get_rss()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, get_rss())
+
+    def stop(self) -> int:
+        self.stopped.set()
+        self.join()
+        return max(self.peak, get_rss())
+
+
+class Command(BaseCommand):
+    """
+    Измеряет скорость и расход памяти потоковой выгрузки задач GET /api/tasks/export/.
+
+    Задачи создаются в транзакции, которая откатывается по завершении;
+    каждая десятая задача получает две категории. Выгрузка читается через
+    тестовый клиент DRF в том же процессе, как под WSGI, без сети. Пиковая
+    память замеряется по /proc/self/statm отдельным потоком. Журнал SQL
+    отключается, чтобы не учитывать в памяти тексты запросов при DEBUG.
+    """
+    help = "Бенчмарк выгрузки задач: строки в секунду и пиковая память"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--count', type=int, default=1000000, help="Количество выгружаемых задач")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Размер пачки для bulk_create")
+        parser.add_argument('--formats', nargs='+', default=['ndjson', 'csv'], help="Форматы выгрузки")
+
+    def create_tasks(self, user: User, count: int, batch_size: int) -> None:
+        categories = list(resolve_categories(user.id, ['Work', 'Home']).values())
+        links = Task.categories.through
+        for start in range(0, count, batch_size):
+            tasks: List[Task] = Task.objects.bulk_create([
+                Task(title=f"bench {index}", description="benchmark task", user=user)
+                for index in range(start, min(start + batch_size, count))
+            ])
+            links.objects.bulk_create([links(task_id=task.id, category_id=category.id)
+                                       for task in tasks[::10] for category in categories])
+
+    def export(self, client: APIClient, export_format: str, count: int) -> str:
+        rss_before: int = get_rss()
+        sampler = RSSSampler()
+        sampler.start()
+        started: float = time.perf_counter()
+        response = client.get('/api/tasks/export/', {'format': export_format})
+        size: int = 0
+        rows: int = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            rows += chunk.count(b'\n')
+        elapsed: float = time.perf_counter() - started
+        peak: int = sampler.stop()
+        if export_format == 'csv':
+            rows -= 1
+        if rows != count:
+            self.stderr.write(f"{export_format}: выгружено {rows} строк вместо {count}")
+        mb: int = 1024 * 1024
+        return (f"{export_format}: {rows / elapsed:.0f} строк/с ({elapsed:.1f} с, {size / mb:.0f} МБ), "
+                f"пик RSS {peak / mb:.0f} МБ (+{(peak - rss_before) / mb:.0f} МБ)")
+
+    @override_settings(DEBUG=False)
+    def handle(self, *args: Any, **options: Any) -> None:
+        count: int = options['count']
+        results: List[str] = []
+        with transaction.atomic():
+            user: User = User.objects.create_user(username=f"bench_{time.time_ns()}")
+            started: float = time.perf_counter()
+            self.create_tasks(user, count, options['batch_size'])
+            self.stdout.write(f"Создано {count} задач ({time.perf_counter() - started:.1f} с)")
+            client = APIClient()
+            client.force_authenticate(user=user)
+            for export_format in options['formats']:
+                results.append(self.export(client, export_format, count))
+                self.stdout.write(results[-1])
+            transaction.set_rollback(True)
+        logger.info(f"Бенчмарк выгрузки {count} задач: {', '.join(results)}")
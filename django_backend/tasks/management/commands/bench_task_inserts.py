@@ -0,0 +1,68 @@
+import hashlib
+import time
+from typing import Any, List
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from tasks.ids import get_id_generator
+from tasks.models import Task
+
+logger = settings.LOGGER.get_logger('bench_task_inserts')
+
+
+def legacy_hash_id() -> str:
+    """
+    Прежняя схема ID: первые 10 hex-символов sha256 от текущей миллисекунды.
+    """
+    timestamp: int = int(time.time() * 1000)
+    return hashlib.sha256(str(timestamp).encode()).hexdigest()[:10]
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает пропускную способность вставки задач до и после перехода на генератор ID.
+
+    Все вставки выполняются в транзакции, которая откатывается по завершении.
+    """
+    help = "Бенчмарк вставки задач: построчный save() против bulk_create с генератором ID"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--count', type=int, default=10000, help="Количество вставляемых задач")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Размер пачки для bulk_create")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        count: int = options['count']
+        batch_size: int = options['batch_size']
+
+        started: float = time.perf_counter()
+        legacy_ids: List[str] = [legacy_hash_id() for _ in range(count)]
+        collisions: int = count - len(set(legacy_ids))
+        self.stdout.write(f"Прежняя схема ID: {collisions} коллизий на {count} ID "
+                          f"({time.perf_counter() - started:.3f} с)")
+
+        started = time.perf_counter()
+        new_ids: List[str] = get_id_generator().generate_batch(count)
+        self.stdout.write(f"Генератор ID: {count - len(set(new_ids))} коллизий на {count} ID, "
+                          f"отсортированы: {new_ids == sorted(new_ids)} ({time.perf_counter() - started:.3f} с)")
+
+        with transaction.atomic():
+            user: User = User.objects.create_user(username=f"bench_{time.time_ns()}")
+
+            # До: одна вставка на задачу. Уникальные ID берем из генератора,
+            # иначе прежняя схема падает на коллизиях первичного ключа
+            started = time.perf_counter()
+            for task_id in get_id_generator().generate_batch(count):
+                Task.objects.create(id=task_id, title="bench", user=user)
+            before: float = time.perf_counter() - started
+
+            # После: ID известны до вставки, задачи уходят пачками
+            started = time.perf_counter()
+            Task.objects.bulk_create([Task(title="bench", user=user) for _ in range(count)], batch_size=batch_size)
+            after: float = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Построчный save(): {count / before:.0f} задач/с ({before:.3f} с)")
+        self.stdout.write(f"bulk_create: {count / after:.0f} задач/с ({after:.3f} с)")
+        logger.info(f"Бенчмарк вставки: save() {count / before:.0f}/с, bulk_create {count / after:.0f}/с")
@@ -0,0 +1,95 @@
+import statistics
+import time
+from typing import Any, Callable, List, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from tasks.models import Task
+from tasks.search import SEARCH_MODE_FTS, SEARCH_MODE_TRIGRAM, search_tasks
+
+logger = settings.LOGGER.get_logger('bench_task_search')
+
+WORDS: List[str] = [
+    'купить', 'молоко', 'хлеб', 'позвонить', 'маме', 'отчет', 'встреча', 'проект', 'написать', 'письмо',
+    'оплатить', 'счет', 'заказать', 'билеты', 'подготовить', 'презентация', 'проверить', 'почта', 'врач', 'спорт',
+]
+
+
+class Command(BaseCommand):
+    """
+    Измеряет задержку поиска задач пользователя на большой таблице.
+
+    Задачи генерируются одним INSERT ... SELECT из generate_series и
+    распределяются между --users пользователями; поиск идет по задачам
+    одного из них, как в GET /api/tasks/search/. Сравнивается прежний способ
+    (icontains по заголовку и описанию) с полнотекстовым и триграммным
+    поиском. Все данные удаляются откатом транзакции.
+    """
+    help = "Бенчмарк поиска задач: icontains против полнотекстового и триграммного поиска"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Количество генерируемых задач")
+        parser.add_argument('--users', type=int, default=100, help="Количество пользователей")
+        parser.add_argument('--repeat', type=int, default=50, help="Количество запросов на каждый вариант")
+
+    def measure(self, build: Callable[[], QuerySet], repeat: int) -> Tuple[float, float]:
+        """
+        Возвращает p50 и p95 времени выборки первой страницы (20 задач) в миллисекундах.
+        """
+        timings: List[float] = []
+        for _ in range(repeat):
+            started: float = time.perf_counter()
+            list(build()[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+    def seed(self, rows: int, users: List[User]) -> None:
+        """
+        Вставляет задачи одним запросом; поисковый вектор заполняет триггер.
+        """
+        words: str = ', '.join(f"'{word}'" for word in WORDS)
+        user_ids: str = ', '.join(str(user.pk) for user in users)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {Task._meta.db_table} (id, title, description, created_at, completed, user_id)
+                SELECT 'bench' || lpad(to_hex(g), 11, '0'),
+                       w[1 + g %% 20] || ' ' || w[1 + (g / 20) %% 20] || ' ' || w[1 + (g / 400) %% 20],
+                       w[1 + (g * 7) %% 20] || ' ' || w[1 + (g * 13) %% 20] || ' ' || w[1 + (g * 17) %% 20],
+                       now() - g * interval '1 second', false, u[1 + g %% %s]
+                FROM generate_series(1, %s) AS g, (SELECT ARRAY[{words}] AS w, ARRAY[{user_ids}] AS u) AS data
+            """, [len(users), rows])
+            cursor.execute(f"ANALYZE {Task._meta.db_table}")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows: int = options['rows']
+        repeat: int = options['repeat']
+
+        with transaction.atomic():
+            prefix: str = f"bench_search_{time.time_ns()}"
+            users: List[User] = User.objects.bulk_create(
+                [User(username=f"{prefix}_{index}") for index in range(options['users'])])
+            started: float = time.perf_counter()
+            self.seed(rows, users)
+            self.stdout.write(f"Сгенерировано {rows} задач за {time.perf_counter() - started:.1f} с")
+
+            tasks: QuerySet = Task.objects.filter(user=users[0])
+            variants: List[Tuple[str, Callable[[], QuerySet]]] = [
+                ('icontains по заголовку и описанию',
+                 lambda: tasks.filter(Q(title__icontains='молоко') | Q(description__icontains='молоко'))
+                 .order_by('created_at', 'id')),
+                ('Полнотекстовый поиск',
+                 lambda: search_tasks(tasks, 'молоко', SEARCH_MODE_FTS).order_by('-rank', 'id')),
+                ('Триграммный поиск с опечаткой',
+                 lambda: search_tasks(tasks, 'малоко', SEARCH_MODE_TRIGRAM).order_by('-rank', 'id')),
+            ]
+            results: List[Tuple[str, float, float]] = []
+            for name, build in variants:
+                p50, p95 = self.measure(build, repeat)
+                results.append((name, p50, p95))
+                self.stdout.write(f"{name}: p50 {p50:.2f} мс, p95 {p95:.2f} мс")
+
+            transaction.set_rollback(True)
+        logger.info(f"Бенчмарк поиска задач на {rows} задачах: {results}")
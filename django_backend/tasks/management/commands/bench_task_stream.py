@@ -0,0 +1,125 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from tasks.changes import tasks_changed
+from tasks.models import Task
+from tasks.streaming import TASK_STREAM_PATH, task_event_stream
+
+logger = settings.LOGGER.get_logger('bench_task_stream')
+
+
+class BenchConnection:
+    """
+    Соединение потока событий с поддельными receive/send: хранит время получения событий changes.
+    """
+
+    def __init__(self, user_id: int, token: str) -> None:
+        self.user_id: int = user_id
+        self.scope: Dict[str, Any] = {'type': 'http', 'method': 'GET', 'path': TASK_STREAM_PATH,
+                                      'query_string': f"token={token}".encode(), 'headers': []}
+        self.disconnected: asyncio.Event = asyncio.Event()
+        self.ready: asyncio.Event = asyncio.Event()
+        self.received: asyncio.Event = asyncio.Event()
+        self.received_at: float = 0.0
+
+    async def receive(self) -> Dict[str, Any]:
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        body: bytes = message.get('body', b'')
+        if b'event: ready' in body:
+            self.ready.set()
+        elif b'event: changes' in body:
+            self.received_at = time.perf_counter()
+            self.received.set()
+
+
+class Command(BaseCommand):
+    """
+    Измеряет стоимость простаивающих потоков событий задач и задержку доставки изменений.
+
+    Соединения открываются в процессе через ASGI-приложение потока с
+    поддельными receive/send, поэтому измеряется сам сервер без сети.
+    Память на соединение считается через tracemalloc, задержка — от
+    фиксации транзакции с изменением задач всех пользователей до отправки
+    события changes каждому соединению. Пользователи и задачи удаляются
+    в конце; записи журнала изменений удалит его очистка.
+    """
+    help = "Бенчмарк потока событий задач: память на соединение и задержка рассылки"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--connections', type=int, default=2000, help="Количество открытых потоков")
+        parser.add_argument('--per-user', type=int, default=5, help="Количество потоков на пользователя")
+        parser.add_argument('--repeat', type=int, default=5, help="Количество рассылок")
+
+    def create_users(self, count: int) -> List[User]:
+        prefix: str = f"bench_stream_{time.time_ns()}"
+        users: List[User] = User.objects.bulk_create([User(username=f"{prefix}_{index}") for index in range(count)])
+        connection.close()
+        return users
+
+    def touch_tasks(self, users: List[User], index: int) -> float:
+        """
+        Создает по задаче каждому пользователю и возвращает время фиксации транзакции.
+        """
+        try:
+            with transaction.atomic():
+                Task.objects.bulk_create([Task(title=f"Bench {index}", user=user) for user in users])
+                tasks_changed(user.id for user in users)
+            return time.perf_counter()
+        finally:
+            connection.close()
+
+    def cleanup(self, users: List[User]) -> None:
+        User.objects.filter(id__in=[user.id for user in users]).delete()
+        connection.close()
+
+    async def run(self, connections: int, per_user: int, repeat: int) -> None:
+        users: List[User] = await sync_to_async(self.create_users)(-(-connections // per_user))
+        try:
+            streams: List[BenchConnection] = [
+                BenchConnection(user.id, str(AccessToken.for_user(user)))
+                for user in users for _ in range(per_user)
+            ][:connections]
+
+            tracemalloc.start()
+            before: int = tracemalloc.get_traced_memory()[0]
+            started: float = time.perf_counter()
+            apps: List[asyncio.Future] = [asyncio.ensure_future(task_event_stream(stream.scope, stream.receive, stream.send))
+                                          for stream in streams]
+            await asyncio.gather(*(stream.ready.wait() for stream in streams))
+            opened: float = time.perf_counter() - started
+            per_connection: float = (tracemalloc.get_traced_memory()[0] - before) / len(streams)
+            tracemalloc.stop()
+            self.stdout.write(f"Открыто {len(streams)} потоков за {opened:.2f} с, память на поток: "
+                              f"{per_connection / 1024:.1f} КиБ")
+
+            for index in range(repeat):
+                for stream in streams:
+                    stream.received.clear()
+                committed: float = await sync_to_async(self.touch_tasks, thread_sensitive=False)(users, index)
+                await asyncio.wait_for(asyncio.gather(*(stream.received.wait() for stream in streams)), 60)
+                latencies: List[float] = sorted(max(stream.received_at - committed, 0) * 1000 for stream in streams)
+                self.stdout.write(f"Рассылка {index + 1}: p50 {statistics.median(latencies):.1f} мс, "
+                                  f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} мс, "
+                                  f"max {latencies[-1]:.1f} мс")
+
+            for stream in streams:
+                stream.disconnected.set()
+            await asyncio.gather(*apps)
+        finally:
+            await sync_to_async(self.cleanup)(users)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with override_settings(TASK_STREAM_MAX_PER_USER=options['per_user']):
+            asyncio.run(self.run(options['connections'], options['per_user'], options['repeat']))
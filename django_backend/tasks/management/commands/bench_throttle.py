@@ -0,0 +1,58 @@
+import time
+from typing import Any, List, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.test import RequestFactory
+from rest_framework.request import Request
+from rest_framework.throttling import SimpleRateThrottle, UserRateThrottle
+from tasks import throttling
+from tasks.throttling import TokenBucketLimiter, UserTokenBucketThrottle
+
+logger = settings.LOGGER.get_logger('bench_throttle')
+
+
+class Command(BaseCommand):
+    """
+    Измеряет накладные расходы проверки лимита запросов на один запрос.
+
+    Сравнивает прежний UserRateThrottle (история запросов в кэше по умолчанию)
+    с token bucket на локальном лимитере и, если задан THROTTLE_REDIS_URL, на Redis.
+    Лимит выставляется заведомо большим, чтобы все проверки проходили.
+    """
+    help = "Бенчмарк проверки лимита запросов: UserRateThrottle против token bucket"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--count', type=int, default=10000, help="Количество проверок")
+
+    def measure(self, throttle_class: type, request: Request, count: int) -> float:
+        """
+        Возвращает среднее время одной проверки в микросекундах.
+        """
+        started: float = time.perf_counter()
+        for _ in range(count):
+            throttle: SimpleRateThrottle = throttle_class()
+            throttle.num_requests, throttle.duration = throttle.parse_rate(f'{count * 10}/minute')
+            throttle.allow_request(request, None)
+        return (time.perf_counter() - started) / count * 1_000_000
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        count: int = options['count']
+        request: Request = Request(RequestFactory().get('/api/tasks/'))
+        request.user = User(pk=time.time_ns() % 1_000_000_000, username='bench_throttle')
+
+        results: List[Tuple[str, float]] = [('UserRateThrottle (кэш по умолчанию)', self.measure(UserRateThrottle, request, count))]
+
+        redis_url = settings.THROTTLE_REDIS_URL
+        settings.THROTTLE_REDIS_URL = None
+        throttling.limiter = TokenBucketLimiter()
+        results.append(('Token bucket, локальный лимитер', self.measure(UserTokenBucketThrottle, request, count)))
+
+        if redis_url:
+            settings.THROTTLE_REDIS_URL = redis_url
+            throttling.limiter = TokenBucketLimiter()
+            results.append(('Token bucket, Redis', self.measure(UserTokenBucketThrottle, request, count)))
+
+        for name, micros in results:
+            self.stdout.write(f"{name}: {micros:.1f} мкс на проверку")
+        logger.info(f"Бенчмарк ограничения запросов: {results}")
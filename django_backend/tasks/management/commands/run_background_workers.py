@@ -0,0 +1,29 @@
+import signal
+from typing import Any
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from tasks.workers import WorkerPool
+
+logger = settings.LOGGER.get_logger('run_background_workers')
+
+
+class Command(BaseCommand):
+    """
+    Запускает пул обработчиков фоновых заданий (см. tasks.workers.WorkerPool).
+
+    Работает до SIGINT или SIGTERM, после сигнала дожидается завершения
+    выполняемых заданий. Можно запускать в нескольких процессах.
+    """
+    help = "Параллельное выполнение фоновых заданий"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--workers', type=int, default=settings.BACKGROUND_WORKERS, help="Количество потоков-обработчиков")
+        parser.add_argument('--queue', action='append', dest='queues',
+                            help="Обрабатываемая очередь, можно указать несколько раз. По умолчанию все очереди")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        pool = WorkerPool(options['workers'], options['queues'])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: pool.stop())
+        pool.start()
+        pool.join()
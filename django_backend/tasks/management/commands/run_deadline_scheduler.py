@@ -0,0 +1,28 @@
+import signal
+from typing import Any
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tasks.deadlines import DeadlineScheduler
+
+logger = settings.LOGGER.get_logger('run_deadline_scheduler')
+
+
+class Command(BaseCommand):
+    """
+    Запускает планировщик сроков задач (см. tasks.deadlines.DeadlineScheduler).
+
+    Работает до SIGINT или SIGTERM. Несколько экземпляров безопасны: сроки
+    обрабатывает только получивший блокировку, остальные остаются в резерве.
+    При выключенной настройке TIME_DUE_TASK команда сразу завершается.
+    """
+    help = "Удаление просроченных задач точно в срок"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not settings.TIME_DUE_TASK:
+            self.stdout.write("Удаление просроченных задач отключено (TIME_DUE_TASK)")
+            return
+        scheduler = DeadlineScheduler()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: scheduler.stop())
+        scheduler.run()
+        logger.info("Планировщик сроков задач остановлен")
@@ -0,0 +1,24 @@
+from typing import Any, Dict
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tasks.cache import task_cache
+
+logger = settings.LOGGER.get_logger('task_cache_stats')
+
+
+class Command(BaseCommand):
+    """
+    Выводит счетчики кэша задач: попадания, промахи, долю попаданий и число инвалидаций.
+
+    При Redis-кэше счетчики общие для всех процессов, при локальном — только
+    для процесса, в котором выполняется команда.
+    """
+    help = "Статистика кэша ответов задач"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stats: Dict[str, Any] = task_cache.stats()
+        self.stdout.write(f"Попадания: {stats['hits']}")
+        self.stdout.write(f"Промахи: {stats['misses']}")
+        self.stdout.write(f"Доля попаданий: {stats['hit_ratio']:.2%}")
+        self.stdout.write(f"Инвалидации: {stats['invalidations']}")
+        logger.info(f"Статистика кэша задач: {stats}")
@@ -1,42 +1,76 @@
-import time
-import hashlib
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.utils import timezone
+from tasks.ids import generate_id, get_id_generator
 
 logger = settings.LOGGER.get_logger('models')
 
 
+class CustomPKQuerySet(models.QuerySet):
+    """
+    QuerySet моделей с CustomPKModel: выдает ID экземплярам без ID перед bulk_create.
+    """
+
+    def bulk_create(self, objs: Iterable[models.Model], *args: Any, **kwargs: Any) -> List[models.Model]:
+        objs = list(objs)
+        new_objs: List[models.Model] = [obj for obj in objs if not obj.pk]
+        for obj, new_id in zip(new_objs, get_id_generator().generate_batch(len(new_objs))):
+            obj.pk = new_id
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class CustomPKModel(models.Model):
     """
     Абстрактная модель с кастомным первичным ключом.
 
-    Генерирует уникальный идентификатор на основе текущего времени.
+    ID выдается генератором из tasks.ids при сохранении: в save() и в
+    bulk_create (см. CustomPKQuerySet), поэтому после bulk_create ID
+    известны без повторного чтения. Несохраненные экземпляры (проверка
+    сериализаторами, manage.py shell) ID не получают и не арендуют номер
+    узла генератора.
     """
-    id = models.CharField(max_length=64, primary_key=True, editable=False) # Уникальный идентификатор
+    id = models.CharField(max_length=64, primary_key=True, editable=False) # Уникальный идентификатор, упорядоченный по времени
+
+    objects = CustomPKQuerySet.as_manager()
 
     def save(self, *args: Any, **kwargs: Any) -> None:
         """
         Сохраняет модель, генерируя уникальный ID, если он еще не установлен.
+
+        Raises:
+            DatabaseError: Если вставка или обновление не удались, например при совпадении ID.
         """
-        if not self.id:
-            timestamp: int = int(time.time() * 1000)
-            hash_object = hashlib.sha256(str(timestamp).encode())
-            self.id = hash_object.hexdigest()[:10]
+        if not self.pk:
+            self.id = generate_id()
+            # Новый ID не может совпасть с существующей строкой, UPDATE перед INSERT не нужен
+            kwargs['force_insert'] = True
             logger.info(f"Сгенерирован новый ID для {self.__class__.__name__}: {self.id}")
         try:
             super().save(*args, **kwargs)
         except Exception as e:
             logger.error(f"Ошибка при сохранении {self.__class__.__name__}: {str(e)}")
+            raise
 
     class Meta:
         abstract = True
 
 class Category(CustomPKModel):
-    """Модель для категорий задач."""
+    """Модель для категорий задач пользователя."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories') # Владелец категории. При удалении пользователя удаляются все его категории.
     name = models.CharField(max_length=100) # Названия категории
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(F('user'), Lower('name'), name='category_user_name_uniq'), # Название уникально у пользователя без учета регистра; индекс для поиска по названию и сортировки списка
+        ]
+
     def __str__(self) -> str:
         return self.name
 
@@ -47,8 +81,166 @@ class Task(CustomPKModel):
     created_at = models.DateTimeField(auto_now_add=True) # Дата и время создания задачи
     due_date = models.DateTimeField(null=True, blank=True) # Срок выполнения задачи
     completed = models.BooleanField(default=False) # Статус выполнения задачи
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False) # Время выполнения задачи, заполняется триггером БД (см. tasks.archive)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks') # Связь с пользователем (ForeignKey). При удалении пользователя удаляются все его задачи.
     categories = models.ManyToManyField(Category, related_name='tasks') # Связь многие-ко-многим с категориями. Одна задача может иметь несколько категорий, и одна категория может быть у нескольких задач.
+    search_vector = SearchVectorField(null=True, editable=False) # Поисковый вектор заголовка и описания, заполняется триггером БД (см. tasks.search)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='task_user_created_id_idx'), # Keyset-пагинация списка задач, фильтр и сортировка по дате создания
+            models.Index(fields=['user', 'completed', 'due_date'], name='task_user_completed_due_idx'), # Фильтр по статусу и сроку, сортировка по сроку
+            models.Index(fields=['due_date'], condition=models.Q(completed=False, due_date__isnull=False), name='task_open_due_idx'), # Ближайшие сроки невыполненных задач для планировщика (см. tasks.deadlines)
+            GinIndex(fields=['user', 'search_vector'], name='task_user_search_idx'), # Полнотекстовый поиск по задачам пользователя (btree_gin)
+            GinIndex(fields=['user', 'title'], name='task_user_title_trgm_idx', opclasses=['int4_ops', 'gin_trgm_ops']), # Нечеткий поиск по заголовку задач пользователя (pg_trgm, btree_gin)
+        ]
+
+    def __str__(self) -> str:
+        return self.title
+
+class ArchivedTask(models.Model):
+    """
+    Выполненная задача, перенесенная из Task в архив (см. tasks.archive).
+
+    Таблица секционирована по месяцу выполнения и создается обработчиком
+    post_migrate, поэтому модель не управляется миграциями. Названия
+    категорий сохраняются на момент переноса.
+    """
+    id = models.CharField(max_length=64, primary_key=True) # ID задачи, сохраненный при переносе
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks', db_constraint=False) # Владелец задачи. При удалении пользователя удаляется и его архив.
+    title = models.CharField(max_length=200) # Заголовок задачи
+    description = models.TextField(blank=True) # Описание задачи
+    created_at = models.DateTimeField() # Дата и время создания задачи
+    due_date = models.DateTimeField(null=True, blank=True) # Срок выполнения задачи
+    completed_at = models.DateTimeField() # Время выполнения задачи, ключ секционирования
+    archived_at = models.DateTimeField() # Время переноса в архив
+    categories = ArrayField(models.CharField(max_length=100), default=list) # Названия категорий задачи
+
+    class Meta:
+        managed = False
+
+    def __str__(self) -> str:
+        return self.title
+
+class SweepCursor(models.Model):
+    """
+    Позиция прохода очистки задач (см. tasks.task_management.sweep_tasks).
+
+    Хранится в базе, поэтому переживает перезапуск и общая для всех
+    процессов-обработчиков фоновых заданий.
+    """
+    name = models.CharField(max_length=64, primary_key=True) # Имя прохода
+    last_id = models.CharField(max_length=64, blank=True) # ID последней обработанной задачи
+    last_value = models.DateTimeField(null=True, blank=True) # Значение поля сортировки прохода (например, due_date) последней задачи
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.last_id}"
+
+class CommentCleanupOutbox(models.Model):
+    """
+    Очередь очистки комментариев удаленных задач (transactional outbox).
+
+    Запись добавляется в той же транзакции, что и удаление задачи, и
+    обрабатывается фоновой задачей drain_comment_outbox.
+    """
+    task_id = models.CharField(max_length=64) # ID удаленной задачи
+    created_at = models.DateTimeField(auto_now_add=True) # Время удаления задачи
+    attempts = models.PositiveIntegerField(default=0) # Количество неудачных попыток очистки
+    next_attempt_at = models.DateTimeField(default=timezone.now) # Время следующей попытки
+    last_error = models.TextField(blank=True) # Текст последней ошибки
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id'], name='outbox_next_attempt_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Очистка комментариев задачи {self.task_id}"
+
+
+class DataVersion(models.Model):
+    """
+    Счетчик версий данных для условных GET-запросов (ETag).
+
+    scope имеет вид 'user:<id>' для задач пользователя или 'categories'
+    для общего списка категорий. Увеличивается при каждой записи.
+    """
+    scope = models.CharField(max_length=64, primary_key=True) # Область данных
+    version = models.BigIntegerField(default=0) # Текущая версия
+
+    def __str__(self) -> str:
+        return f"{self.scope}: {self.version}"
+
+
+class IdNodeLease(models.Model):
+    """
+    Аренда номера узла генератора ID процессом (см. tasks.ids.NodeLease).
+
+    Строка принадлежит процессу, пока не истек expires_at: процесс продлевает
+    аренду, а номер упавшего процесса занимает другой после истечения срока.
+    """
+    node_id = models.PositiveSmallIntegerField(primary_key=True) # Номер узла
+    owner = models.CharField(max_length=255) # Процесс-арендатор: хост, PID и случайный суффикс
+    expires_at = models.DateTimeField() # Окончание аренды
+
+    def __str__(self) -> str:
+        return f"Узел {self.node_id}: {self.owner}"
+
+
+class TaskStats(models.Model):
+    """
+    Счетчики задач пользователя для GET /api/tasks/stats/.
+
+    Обновляются инкрементально сигналами и путями массовой записи
+    (см. tasks.stats) и периодически пересчитываются фоновой задачей
+    reconcile_task_stats.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='task_stats') # Владелец задач
+    open_count = models.IntegerField(default=0) # Количество невыполненных задач
+    completed_count = models.IntegerField(default=0) # Количество выполненных задач
+
+    def __str__(self) -> str:
+        return f"{self.user_id}: {self.open_count} открытых, {self.completed_count} выполненных"
+
+
+class CategoryTaskStats(models.Model):
+    """
+    Количество задач пользователя в категории, обновляется вместе с TaskStats.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='category_task_stats') # Владелец задач
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='task_stats') # Категория
+    task_count = models.IntegerField(default=0) # Количество задач пользователя в категории
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='category_stats_user_category_uniq'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id}/{self.category_id}: {self.task_count}"
+
+
+class TaskChange(models.Model):
+    """
+    Журнал изменений задач для GET /api/tasks/changes/.
+
+    Записи добавляют триггеры БД на задачах и связях задача-категория
+    (см. tasks.changefeed), поэтому в журнал попадают и массовые записи, и
+    удаления фоновыми задачами очистки. Внешнего ключа на пользователя нет:
+    записи об удалении задач переживают удаление владельца до очистки журнала.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user_id = models.IntegerField() # Владелец задачи
+    task_id = models.CharField(max_length=64) # ID задачи
+    deleted = models.BooleanField(default=False) # Задача удалена (tombstone)
+    xid = models.BigIntegerField() # ID транзакции, в которой изменена задача
+    created_at = models.DateTimeField(default=timezone.now) # Время изменения, по нему очищается журнал
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'xid', 'id'], name='task_change_user_xid_idx'), # Выборка изменений пользователя после курсора
+            models.Index(fields=['created_at'], name='task_change_created_idx'), # Очистка устаревших записей
+        ]
 
     def __str__(self) -> str:
-        return self.title
\ No newline at end of file
+        return f"{self.task_id}: {'удалена' if self.deleted else 'изменена'} в транзакции {self.xid}"
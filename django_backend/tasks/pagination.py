@@ -0,0 +1,300 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from tasks.filters import TASK_ORDERING_FIELDS, parse_task_ordering
+
+logger = settings.LOGGER.get_logger('pagination')
+
+
+class TaskCursorPagination(BasePagination):
+    """
+    Keyset-пагинация задач по паре (поле сортировки, id).
+
+    Поле сортировки задается параметром ?ordering= (см. tasks.filters), по
+    умолчанию created_at. Курсор кодирует последнюю выданную пару, поэтому
+    следующая страница выбирается условием по индексу без OFFSET, а вставка
+    новых задач не сдвигает уже выданные страницы. NULL в поле сортировки
+    идут, как в индексе PostgreSQL: в конце при сортировке по возрастанию
+    и в начале при сортировке по убыванию.
+    """
+    cursor_query_param: str = 'cursor'
+    ordering_query_param: str = 'ordering'
+    page_size_query_param: str = 'page_size'
+    page_size: int = 50
+    max_page_size: int = 200
+    invalid_cursor_message: str = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> List[Any]:
+        """
+        Возвращает одну страницу queryset, начиная с позиции курсора.
+
+        Args:
+            queryset (QuerySet): Исходный queryset.
+            request (Request): Объект запроса.
+            view (Any): Представление, вызвавшее пагинацию.
+
+        Returns:
+            List[Any]: Объекты текущей страницы.
+
+        Raises:
+            NotFound: Если курсор не удалось декодировать.
+        """
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset: QuerySet, request: Request) -> List[Any]:
+        """
+        Асинхронный вариант paginate_queryset для async-представлений.
+
+        Args:
+            queryset (QuerySet): Исходный queryset.
+            request (Request): Объект запроса.
+
+        Returns:
+            List[Any]: Объекты текущей страницы.
+
+        Raises:
+            NotFound: Если курсор не удалось декодировать.
+        """
+        return self.set_page([item async for item in self.get_page_queryset(queryset, request)])
+
+    def get_page_queryset(self, queryset: QuerySet, request: Request) -> QuerySet:
+        """
+        Возвращает queryset страницы, начиная с позиции курсора.
+
+        Выбирается на одну запись больше размера страницы, чтобы узнать,
+        есть ли следующая страница.
+        """
+        self.request = request
+        self.page_size_value: int = self.get_page_size(request)
+        ordering: Tuple[str, str] = self.get_ordering(request)
+        position: Optional[Tuple[Optional[datetime], str]] = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = self.filter_after(queryset, position)
+        return queryset[:self.page_size_value + 1]
+
+    def get_ordering(self, request: Request) -> Tuple[str, str]:
+        """
+        Возвращает сортировку страницы из параметра ?ordering=.
+
+        Raises:
+            ValidationError: Если сортировка по полю не разрешена.
+        """
+        self.ordering_field, self.descending = parse_task_ordering(request.query_params.get(self.ordering_query_param))
+        if self.descending:
+            return f'-{self.ordering_field}', '-id'
+        return self.ordering_field, 'id'
+
+    def filter_after(self, queryset: QuerySet, position: Tuple[Optional[datetime], str]) -> QuerySet:
+        """
+        Оставляет в queryset записи, идущие после позиции курсора.
+        """
+        value, pk = position
+        field: str = self.ordering_field
+        after: str = 'lt' if self.descending else 'gt'
+        if value is None:
+            condition = Q(**{f'{field}__isnull': True, f'id__{after}': pk})
+            if self.descending:
+                condition |= Q(**{f'{field}__isnull': False})
+            return queryset.filter(condition)
+        condition = Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'id__{after}': pk})
+        if TASK_ORDERING_FIELDS[field] and not self.descending:
+            condition |= Q(**{f'{field}__isnull': True})
+        return queryset.filter(condition)
+
+    def set_page(self, results: List[Any]) -> List[Any]:
+        """
+        Запоминает текущую страницу по результатам get_page_queryset.
+        """
+        self.has_next: bool = len(results) > self.page_size_value
+        self.page: List[Any] = results[:self.page_size_value]
+        logger.info(f"Выдана страница из {len(self.page)} задач, есть следующая: {self.has_next}")
+        return self.page
+
+    def get_page_size(self, request: Request) -> int:
+        """
+        Возвращает размер страницы из запроса, ограниченный max_page_size.
+
+        Args:
+            request (Request): Объект запроса.
+
+        Returns:
+            int: Размер страницы.
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def decode_cursor(self, request: Request) -> Optional[Tuple[Optional[datetime], str]]:
+        """
+        Декодирует курсор из параметров запроса.
+
+        Args:
+            request (Request): Объект запроса.
+
+        Returns:
+            Optional[Tuple[Optional[datetime], str]]: Пара (значение поля сортировки, id) или None для первой страницы.
+
+        Raises:
+            NotFound: Если курсор поврежден.
+        """
+        encoded: Optional[str] = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            decoded: str = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8')
+            return self.parse_position(decoded)
+        except (binascii.Error, UnicodeError, ValueError):
+            logger.warning(f"Получен неверный курсор: {encoded}")
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_position(self, decoded: str) -> Tuple[Optional[datetime], str]:
+        """
+        Разбирает декодированный курсор "значение|id", пустое значение означает NULL.
+
+        Raises:
+            ValueError: Если курсор имеет неверный формат.
+        """
+        value, pk = decoded.split('|', 1)
+        return (datetime.fromisoformat(value) if value else None), pk
+
+    def encode_cursor(self, raw: str) -> str:
+        """
+        Кодирует позицию в непрозрачную строку курсора.
+
+        Args:
+            raw (str): Позиция в текстовом виде (см. format_position).
+
+        Returns:
+            str: Закодированный курсор.
+        """
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def format_position(self, item: Any) -> str:
+        """
+        Возвращает позицию записи в виде "значение|id".
+        """
+        value: Optional[datetime] = getattr(item, self.ordering_field)
+        return f"{value.isoformat() if value is not None else ''}|{item.id}"
+
+    def get_next_link(self) -> Optional[str]:
+        """
+        Формирует ссылку на следующую страницу.
+
+        Returns:
+            Optional[str]: URL следующей страницы или None, если страница последняя.
+        """
+        if not self.has_next or not self.page:
+            return None
+        url: str = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.format_position(self.page[-1])))
+
+    def get_paginated_response(self, data: List[Any]) -> Response:
+        """
+        Возвращает ответ со страницей результатов и ссылкой на следующую.
+
+        Args:
+            data (List[Any]): Сериализованные данные страницы.
+
+        Returns:
+            Response: HTTP-ответ.
+        """
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class TaskSearchPagination(TaskCursorPagination):
+    """
+    Keyset-пагинация результатов поиска по паре (rank, id).
+
+    Курсор хранит также режим поиска (см. tasks.search), чтобы следующие
+    страницы выбирались тем же способом, что и первая.
+    """
+    page_size: int = 20
+    max_page_size: int = 100
+    ordering: Tuple[str, str] = ('-rank', 'id')
+
+    def __init__(self, mode: str = '') -> None:
+        self.mode: str = mode
+
+    def get_ordering(self, request: Request) -> Tuple[str, str]:
+        return self.ordering
+
+    def filter_after(self, queryset: QuerySet, position: Tuple[str, float, str]) -> QuerySet:
+        _, rank, pk = position
+        return queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__gt=pk))
+
+    def parse_position(self, decoded: str) -> Tuple[str, float, str]:
+        """
+        Разбирает декодированный курсор "mode|rank|id".
+
+        Raises:
+            ValueError: Если курсор имеет неверный формат.
+        """
+        mode, rank, pk = decoded.split('|', 2)
+        return mode, float(rank), pk
+
+    def format_position(self, item: Any) -> str:
+        # repr сохраняет float без потери точности, иначе равенство rank в курсоре не сработает
+        return f"{self.mode}|{item.rank!r}|{item.id}"
+
+
+class CategoryCursorPagination(TaskCursorPagination):
+    """
+    Keyset-пагинация категорий пользователя по названию без учета регистра.
+
+    Сортировка идет по аннотации name_lower = lower(name) (см.
+    CategoryViewSet.get_queryset): она уникальна у пользователя и совпадает с
+    индексом (user, lower(name)), поэтому курсору достаточно одного значения,
+    а страница читается из индекса.
+    """
+    ordering: Tuple[str] = ('name_lower',)
+
+    def get_ordering(self, request: Request) -> Tuple[str]:
+        return self.ordering
+
+    def filter_after(self, queryset: QuerySet, position: str) -> QuerySet:
+        return queryset.filter(name_lower__gt=position)
+
+    def parse_position(self, decoded: str) -> str:
+        return decoded
+
+    def format_position(self, item: Any) -> str:
+        return item.name_lower
+
+
+class ArchivedTaskPagination(TaskCursorPagination):
+    """
+    Keyset-пагинация архива задач по убыванию пары (completed_at, id).
+
+    Порядок совпадает с индексом (user_id, completed_at, id) секций архива,
+    а условие по completed_at позволяет PostgreSQL пропускать секции
+    месяцев после позиции курсора.
+    """
+    ordering: Tuple[str, str] = ('-completed_at', '-id')
+
+    def get_ordering(self, request: Request) -> Tuple[str, str]:
+        self.ordering_field, self.descending = 'completed_at', True
+        return self.ordering
+
+    def filter_after(self, queryset: QuerySet, position: Tuple[Optional[datetime], str]) -> QuerySet:
+        value, pk = position
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return queryset.filter(Q(completed_at__lt=value) | Q(completed_at=value, id__lt=pk))
+
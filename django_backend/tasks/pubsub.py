@@ -0,0 +1,177 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+import redis
+import redis.asyncio
+from django.conf import settings
+
+logger = settings.LOGGER.get_logger('pubsub')
+
+
+class Subscription:
+    """
+    Подписка одного потокового соединения на события задач пользователя.
+
+    Уведомления не накапливаются: повторное уведомление до того, как соединение
+    его обработало, лишь оставляет флаг установленным. Поэтому медленный
+    клиент держит не больше одного ожидающего уведомления, а сами изменения
+    соединение читает из журнала (tasks.changefeed) в своем темпе.
+    """
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop) -> None:
+        self.user_id: int = user_id
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.event: asyncio.Event = asyncio.Event()
+        # Время (time.monotonic) последнего уведомления или оформления подписки
+        self.notified_at: float = time.monotonic()
+
+    def notify(self) -> None:
+        """
+        Устанавливает флаг уведомления. Может вызываться из любого потока.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._set)
+        except RuntimeError:
+            # Цикл событий соединения уже закрыт
+            pass
+
+    def _set(self) -> None:
+        self.notified_at = time.monotonic()
+        self.event.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Ждет уведомления не дольше timeout секунд и сбрасывает флаг.
+
+        Returns:
+            bool: True, если уведомление получено.
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+class TaskEventHub:
+    """
+    Рассылка уведомлений об изменении задач пользователей потоковым соединениям процесса.
+
+    Если задан TASK_EVENTS_REDIS_URL, уведомления публикуются в канал Redis
+    TASK_EVENTS_CHANNEL, а каждый процесс держит одну подписку на канал и
+    раздает уведомления своим соединениям. Так события доходят и из других
+    процессов (фоновые задачи, другие воркеры). Без Redis или при его
+    недоступности уведомления раздаются только внутри процесса.
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._client: Optional[redis.Redis] = None
+        self._redis_disabled_until: float = 0.0
+        self._listeners: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """
+        Подписывает соединение на события пользователя. Вызывается из цикла событий соединения.
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, loop)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        if settings.TASK_EVENTS_REDIS_URL and loop not in self._listeners:
+            self._listeners[loop] = loop.create_task(self.listen())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Отменяет подписку соединения.
+        """
+        with self._lock:
+            subscriptions: Set[Subscription] = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def count(self, user_id: Optional[int] = None) -> int:
+        """
+        Возвращает количество подписок пользователя или всех подписок процесса.
+        """
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscriptions.get(user_id, ()))
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def dispatch(self, user_ids: Iterable[int]) -> None:
+        """
+        Уведомляет подписки процесса об изменении задач пользователей.
+        """
+        with self._lock:
+            targets: List[Subscription] = [subscription for user_id in set(user_ids)
+                                           for subscription in self._subscriptions.get(user_id, ())]
+        for subscription in targets:
+            subscription.notify()
+
+    def get_client(self) -> Optional[redis.Redis]:
+        """
+        Возвращает клиент Redis для публикации или None, если Redis не настроен или отключен после ошибки.
+        """
+        if not settings.TASK_EVENTS_REDIS_URL or time.monotonic() < self._redis_disabled_until:
+            return None
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.TASK_EVENTS_REDIS_URL,
+                                                socket_timeout=settings.TASK_EVENTS_REDIS_TIMEOUT,
+                                                socket_connect_timeout=settings.TASK_EVENTS_REDIS_TIMEOUT)
+        return self._client
+
+    def publish(self, user_ids: Iterable[int]) -> None:
+        """
+        Публикует уведомление об изменении задач пользователей.
+
+        Ошибки Redis не прерывают запись задач: уведомление раздается внутри
+        процесса, а клиенты из других процессов получат изменения со следующим
+        уведомлением или при переподключении.
+
+        Args:
+            user_ids (Iterable[int]): ID владельцев измененных задач.
+        """
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        client: Optional[redis.Redis] = self.get_client()
+        if client is not None:
+            try:
+                client.publish(settings.TASK_EVENTS_CHANNEL, json.dumps(user_ids))
+                return
+            except redis.RedisError as e:
+                self._redis_disabled_until = time.monotonic() + settings.TASK_EVENTS_RETRY_INTERVAL
+                logger.warning(f"Redis недоступен для публикации событий задач, рассылка только в процессе: {e}")
+        self.dispatch(user_ids)
+
+    async def listen(self) -> None:
+        """
+        Получает уведомления из канала Redis и раздает их подпискам процесса.
+
+        Работает все время жизни цикла событий и переподключается после ошибок.
+        """
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(settings.TASK_EVENTS_REDIS_URL)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.TASK_EVENTS_CHANNEL)
+                    logger.info(f"Подписка на канал событий задач {settings.TASK_EVENTS_CHANNEL}")
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.dispatch(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Ошибка подписки на канал событий задач, повтор через "
+                               f"{settings.TASK_EVENTS_RETRY_INTERVAL} с: {e}")
+                await asyncio.sleep(settings.TASK_EVENTS_RETRY_INTERVAL)
+
+
+task_events = TaskEventHub()
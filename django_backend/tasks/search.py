@@ -0,0 +1,120 @@
+from typing import Any, Optional, Tuple
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F, FloatField, QuerySet
+from django.db.models.functions import Cast
+from tasks.models import Task
+
+logger = settings.LOGGER.get_logger('search')
+
+SEARCH_MODE_FTS: str = 'fts'
+SEARCH_MODE_TRIGRAM: str = 'trigram'
+SEARCH_MODES: Tuple[str, str] = (SEARCH_MODE_FTS, SEARCH_MODE_TRIGRAM)
+
+# Минимальная длина запроса, при которой триграммный поиск может использовать индекс pg_trgm
+TRIGRAM_MIN_LENGTH: int = 3
+
+
+def install_search_extensions(using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
+    """
+    Создает расширения pg_trgm и btree_gin, нужные индексам поиска.
+
+    Подключается к сигналу pre_migrate: индексы Task создаются миграциями,
+    которые генерируются при запуске, поэтому расширения создаются до них.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+
+def install_search_trigger(using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
+    """
+    Создает триггер, который поддерживает Task.search_vector при любой записи
+    (в том числе bulk_create и запросах в обход ORM), и заполняет вектор у
+    существующих задач.
+
+    Вектор пересчитывается, только если изменились заголовок или описание.
+    Подключается к сигналу post_migrate, операции идемпотентны.
+    """
+    connection = connections[using]
+    table: str = Task._meta.db_table
+    if table not in connection.introspection.table_names():
+        return
+    config: str = settings.TASKS_SEARCH_CONFIG
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector(title text, description text) RETURNS tsvector
+            LANGUAGE sql IMMUTABLE AS $$
+                SELECT setweight(to_tsvector('{config}'::regconfig, coalesce(title, '')), 'A') ||
+                       setweight(to_tsvector('{config}'::regconfig, coalesce(description, '')), 'B')
+            $$
+        """)
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'UPDATE' AND OLD.search_vector IS NOT NULL
+                   AND NEW.title IS NOT DISTINCT FROM OLD.title
+                   AND NEW.description IS NOT DISTINCT FROM OLD.description THEN
+                    NEW.search_vector := OLD.search_vector;
+                ELSE
+                    NEW.search_vector := {table}_search_vector(NEW.title, NEW.description);
+                END IF;
+                RETURN NEW;
+            END
+            $$
+        """)
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}")
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_search_vector_trigger BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """)
+        cursor.execute(f"UPDATE {table} SET search_vector = {table}_search_vector(title, description) "
+                       f"WHERE search_vector IS NULL")
+        if cursor.rowcount:
+            logger.info(f"Заполнен поисковый вектор у {cursor.rowcount} задач")
+
+
+def get_search_mode(query: str) -> str:
+    """
+    Выбирает режим поиска по запросу: короткие запросы ищутся по подстроке и
+    триграммам, остальные — полнотекстово.
+
+    Args:
+        query (str): Поисковый запрос.
+
+    Returns:
+        str: SEARCH_MODE_FTS или SEARCH_MODE_TRIGRAM.
+    """
+    return SEARCH_MODE_FTS if len(query) >= settings.TASKS_SEARCH_FTS_MIN_LENGTH else SEARCH_MODE_TRIGRAM
+
+
+def search_tasks(queryset: QuerySet, query: str, mode: Optional[str] = None) -> QuerySet:
+    """
+    Фильтрует задачи по поисковому запросу и аннотирует их релевантностью rank.
+
+    Полнотекстовый режим использует Task.search_vector и индекс
+    task_user_search_idx. Триграммный режим ищет похожие слова в заголовке
+    (индекс task_user_title_trgm_idx), поэтому находит задачи при опечатках;
+    запросы короче TRIGRAM_MIN_LENGTH ищутся по подстроке.
+
+    Args:
+        queryset (QuerySet): Задачи пользователя.
+        query (str): Поисковый запрос.
+        mode (Optional[str]): Режим поиска, по умолчанию выбирается get_search_mode.
+
+    Returns:
+        QuerySet: Найденные задачи с аннотацией rank.
+    """
+    mode = mode or get_search_mode(query)
+    if mode == SEARCH_MODE_FTS:
+        search_query = SearchQuery(query, search_type='websearch', config=settings.TASKS_SEARCH_CONFIG)
+        # rank приводится к double precision, чтобы значение в курсоре совпадало с вычисляемым в БД
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query), FloatField()))
+    if len(query) < TRIGRAM_MIN_LENGTH:
+        queryset = queryset.filter(title__icontains=query)
+    else:
+        queryset = queryset.filter(title__trigram_word_similar=query)
+    return queryset.annotate(rank=Cast(TrigramWordSimilarity(query, 'title'), FloatField()))
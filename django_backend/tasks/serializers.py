@@ -1,8 +1,13 @@
 from rest_framework import serializers
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
-from tasks.models import Task, Category
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from tasks.models import ArchivedTask, Task, Category
+from tasks.categories import sync_task_categories
+from tasks.changes import tasks_changed
 from django.conf import settings
 
 logger = settings.LOGGER.get_logger('serializers')
@@ -15,9 +20,84 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields: List[str] = ['id', 'name']
 
-class TaskCreateSerializer(serializers.ModelSerializer):
+class UserCategorySerializer(CategorySerializer):
+    """
+    Сериализатор категорий пользователя для /api/categories/.
+
+    Владелец берется из запроса, количество задач task_count - из аннотации
+    queryset (см. CategoryViewSet.get_queryset). Название уникально у
+    пользователя без учета регистра: validate_name возвращает понятную
+    ошибку, а конкурентные записи отсекает уникальный индекс (user, lower(name)).
+    """
+    duplicate_message: str = "Категория с таким названием уже существует"
+
+    task_count = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta(CategorySerializer.Meta):
+        fields: List[str] = ['id', 'name', 'task_count']
+
+    def validate_name(self, value: str) -> str:
+        """
+        Проверяет, что у пользователя нет другой категории с таким названием.
+        """
+        duplicates = (Category.objects.filter(user=self.context['request'].user)
+                      .alias(name_lower=Lower('name')).filter(name_lower=Lower(Value(value))))
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError(self.duplicate_message)
+        return value
+
+    def create(self, validated_data: Dict[str, Any]) -> Category:
+        """
+        Создает категорию пользователя запросом INSERT ... ON CONFLICT DO NOTHING.
+
+        Raises:
+            serializers.ValidationError: Если такую категорию одновременно создал другой запрос.
+        """
+        category = Category(user=self.context['request'].user, name=validated_data['name'])
+        Category.objects.bulk_create([category], ignore_conflicts=True)
+        if not Category.objects.filter(pk=category.pk).exists():
+            raise serializers.ValidationError({'name': [self.duplicate_message]})
+        # bulk_create не отправляет сигналы, поэтому изменение регистрируем явно
+        tasks_changed([category.user_id])
+        logger.info(f"Создана новая категория: {category.name}")
+        return category
+
+    def update(self, instance: Category, validated_data: Dict[str, Any]) -> Category:
+        """
+        Переименовывает категорию.
+
+        Raises:
+            serializers.ValidationError: Если такое название одновременно заняла другая категория.
+        """
+        name: str = validated_data.get('name', instance.name)
+        try:
+            with transaction.atomic():
+                Category.objects.filter(pk=instance.pk).update(name=name)
+        except IntegrityError:
+            raise serializers.ValidationError({'name': [self.duplicate_message]})
+        instance.name = name
+        # update() не отправляет сигналы, поэтому изменение регистрируем явно
+        tasks_changed([instance.user_id])
+        logger.info(f"Категория {instance.id} переименована: {name}")
+        return instance
+
+class SparseFieldsMixin:
+    """
+    Позволяет ограничить набор полей сериализатора аргументом fields.
+    """
+    def __init__(self, *args: Any, fields: Optional[List[str]] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class TaskCreateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Сериализатор для создания новых задач.
+
+    При чтении принимает аргумент fields для выдачи только части полей.
     """
     categories = CategorySerializer(many=True, required=False)
 
@@ -44,13 +124,8 @@ class TaskCreateSerializer(serializers.ModelSerializer):
             task = Task.objects.create(**validated_data)
             logger.info(f"Создана новая задача: {task.title}")
 
-            for category_data in categories_data:
-                category, created = Category.objects.get_or_create(**category_data)
-                task.categories.add(category)
-                if created:
-                    logger.info(f"Создана новая категория: {category.name}")
-                else:
-                    logger.info(f"Использована существующая категория: {category.name}")
+            if categories_data:
+                sync_task_categories(task, [category_data['name'] for category_data in categories_data], is_new=True)
 
             return task
         except ValidationError as e:
@@ -58,6 +133,17 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         except Exception as e:
             logger.log_exception(f"Неожиданная ошибка при создании задачи: {str(e)}")
 
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор архивных задач (только чтение). Категории выдаются названиями на момент переноса.
+    """
+
+    class Meta:
+        model = ArchivedTask
+        fields: List[str] = ['id', 'title', 'description', 'created_at', 'due_date', 'completed_at', 'archived_at',
+                             'categories']
+        read_only_fields: List[str] = fields
+
 class TaskUpdateSerializer(serializers.ModelSerializer):
     """
     Сериализатор для обновления существующих задач.
@@ -93,15 +179,7 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
 
             categories_data: List[Dict[str, Any]] = validated_data.pop('categories', None)
             if categories_data is not None:
-                instance.categories.clear()
-                logger.info(f"Очищены все категории для задачи: {instance.title}")
-                for category_data in categories_data:
-                    category, created = Category.objects.get_or_create(**category_data)
-                    instance.categories.add(category)
-                    if created:
-                        logger.info(f"Создана новая категория: {category.name}")
-                    else:
-                        logger.info(f"Использована существующая категория: {category.name}")
+                sync_task_categories(instance, [category_data['name'] for category_data in categories_data])
 
             instance.save()
             logger.info(f"Задача успешно обновлена: {instance.title}")
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from django.conf import settings
+
+logger = settings.LOGGER.get_logger('service_auth')
+
+
+class ServiceTokenProvider:
+    """
+    Поставщик access-токена сервисной учетной записи для межсервисных вызовов.
+
+    Токен выпускается один раз (одна проверка пароля) и хранится в памяти
+    процесса до момента за SERVICE_TOKEN_REFRESH_MARGIN секунд до истечения.
+    Обновление выполняется под блокировкой, поэтому одновременные вызовы
+    не выпускают несколько токенов. Счетчики попаданий и промахов меняются
+    под отдельной блокировкой: попадание не ждет выпуска токена другим потоком.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at: float = 0.0
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - settings.SERVICE_TOKEN_REFRESH_MARGIN
+
+    def get_token(self) -> str:
+        """
+        Возвращает действующий токен, при необходимости выпуская новый.
+
+        Returns:
+            str: Access-токен.
+
+        Raises:
+            ValueError: Если учетные данные отсутствуют или неверны.
+        """
+        if self._is_fresh():
+            self._count(hit=True)
+            return self._token
+        with self._lock:
+            # Пока ждали блокировку, токен мог обновить другой поток
+            if self._is_fresh():
+                self._count(hit=True)
+                return self._token
+            self._count(hit=False)
+            self._token, self._expires_at = self._mint()
+            logger.info(f"Выпущен сервисный токен, действует до {time.ctime(self._expires_at)}")
+            return self._token
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def invalidate(self) -> None:
+        """
+        Сбрасывает закэшированный токен, например после ответа 401.
+        """
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает счетчики попаданий и промахов кэша токена.
+
+        Returns:
+            Dict[str, int]: Словарь с ключами hits и misses.
+        """
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def _mint() -> Tuple[str, float]:
+        """
+        Проверяет учетные данные сервиса и выпускает новый access-токен.
+
+        Returns:
+            Tuple[str, float]: Токен и время его истечения (unix time).
+
+        Raises:
+            ValueError: Если учетные данные отсутствуют или неверны.
+        """
+        from django.contrib.auth import authenticate
+        from rest_framework_simplejwt.tokens import RefreshToken
+        username: Optional[str] = os.getenv("API_USERNAME_TODO")
+        password: Optional[str] = os.getenv("API_PASSWORD_TODO")
+
+        if not username or not password:
+            raise ValueError("Отсутствуют учетные данные для авторизации")
+
+        user = authenticate(username=username, password=password)
+        if user is None:
+            raise ValueError("Неверные учетные данные")
+        access = RefreshToken.for_user(user).access_token
+        return str(access), float(access['exp'])
+
+
+service_token_provider = ServiceTokenProvider()
@@ -0,0 +1,148 @@
+from typing import Any, List, Optional, Set, Tuple
+from django.conf import settings
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+from tasks.authentication import invalidate_user_auth
+from tasks.models import Category, Task
+from tasks.changes import tasks_changed
+from tasks.stats import update_category_counts, update_task_counts
+
+logger = settings.LOGGER.get_logger('signals')
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def on_task_changed(sender: Any, instance: Task, **kwargs: Any) -> None:
+    """
+    Регистрирует изменение задач владельца при создании, изменении или удалении задачи.
+    """
+    tasks_changed([instance.user_id])
+
+
+@receiver(m2m_changed, sender=Task.categories.through)
+def on_task_categories_changed(sender: Any, instance: Any, action: str, reverse: bool,
+                               pk_set: Optional[Set[Any]], **kwargs: Any) -> None:
+    """
+    Регистрирует изменение задач владельцев при изменении категорий задач.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            tasks_changed([instance.user_id])
+        return
+    # Изменение со стороны категории: затронуты владельцы задач из pk_set,
+    # а при очистке - владельцы всех задач категории до удаления связей
+    if action in ('post_add', 'post_remove'):
+        user_ids = Task.objects.filter(id__in=pk_set).values_list('user_id', flat=True).distinct()
+    elif action == 'pre_clear':
+        user_ids = Task.objects.filter(categories=instance).values_list('user_id', flat=True).distinct()
+    else:
+        return
+    tasks_changed(user_ids)
+
+
+@receiver(post_init, sender=Task)
+def remember_task_state(sender: Any, instance: Task, **kwargs: Any) -> None:
+    """
+    Запоминает владельца и статус загруженной задачи, чтобы при сохранении
+    изменить счетчики статистики на разницу без дополнительного запроса.
+    """
+    if not {'user_id', 'completed'} & instance.get_deferred_fields():
+        instance._stats_state = (instance.user_id, instance.completed)
+
+
+@receiver(post_save, sender=Task)
+def update_stats_on_task_saved(sender: Any, instance: Task, created: bool, **kwargs: Any) -> None:
+    """
+    Обновляет счетчики задач владельца при создании задачи и смене ее статуса.
+    """
+    new_state: Tuple[int, bool] = (instance.user_id, instance.completed)
+    old_state: Optional[Tuple[int, bool]] = None if created else getattr(instance, '_stats_state', None)
+    if not created and old_state is None:
+        # Поля были отложены при загрузке, прежние значения неизвестны: его исправит reconcile_task_stats
+        logger.warning(f"Неизвестен прежний статус задачи {instance.id}, статистика будет пересчитана")
+    elif old_state != new_state:
+        deltas: List[Tuple[int, bool, int]] = [(*new_state, 1)]
+        if old_state is not None:
+            deltas.append((*old_state, -1))
+        update_task_counts(deltas)
+        if old_state is not None and old_state[0] != new_state[0]:
+            category_ids: List[str] = list(instance.categories.values_list('id', flat=True))
+            update_category_counts([(old_state[0], category_id, -1) for category_id in category_ids]
+                                   + [(new_state[0], category_id, 1) for category_id in category_ids])
+    instance._stats_state = new_state
+
+
+def is_owner_deleted(origin: Any) -> bool:
+    """
+    Проверяет, что удаление начато с пользователя: его статистика удаляется каскадно.
+    """
+    return isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User)
+
+
+@receiver(pre_delete, sender=Task)
+def remember_task_categories(sender: Any, instance: Task, origin: Any = None, **kwargs: Any) -> None:
+    """
+    Запоминает категории удаляемой задачи: связи удаляются каскадно без сигналов m2m_changed.
+    """
+    if not is_owner_deleted(origin):
+        instance._stats_category_ids = list(
+            Task.categories.through.objects.filter(task_id=instance.pk).values_list('category_id', flat=True))
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_task_deleted(sender: Any, instance: Task, origin: Any = None, **kwargs: Any) -> None:
+    """
+    Уменьшает счетчики задач и категорий владельца удаленной задачи.
+    """
+    if is_owner_deleted(origin):
+        return
+    user_id, completed = getattr(instance, '_stats_state', (instance.user_id, instance.completed))
+    update_task_counts([(user_id, completed, -1)])
+    update_category_counts([(user_id, category_id, -1)
+                            for category_id in getattr(instance, '_stats_category_ids', [])])
+
+
+@receiver(m2m_changed, sender=Task.categories.through)
+def update_stats_on_task_categories_changed(sender: Any, instance: Any, action: str, reverse: bool,
+                                            pk_set: Optional[Set[Any]], **kwargs: Any) -> None:
+    """
+    Обновляет количество задач в категориях при изменении связей задача-категория.
+
+    Перед удалением связей запоминаются только существующие связи, так как
+    pk_set в remove содержит все переданные ID.
+    """
+    links: QuerySet = Task.categories.through.objects.filter(**{'category_id' if reverse else 'task_id': instance.pk})
+    if action in ('pre_remove', 'pre_clear'):
+        if action == 'pre_remove':
+            links = links.filter(**{'task_id__in' if reverse else 'category_id__in': pk_set})
+        instance._stats_removed_links = list(links.values_list('task__user_id', 'category_id'))
+    elif action in ('post_remove', 'post_clear'):
+        update_category_counts([(user_id, category_id, -1)
+                                for user_id, category_id in getattr(instance, '_stats_removed_links', [])])
+    elif action == 'post_add' and pk_set:
+        if reverse:
+            user_ids = Task.objects.filter(id__in=pk_set).values_list('user_id', flat=True)
+            update_category_counts([(user_id, instance.pk, 1) for user_id in user_ids])
+        else:
+            update_category_counts([(instance.user_id, category_id, 1) for category_id in pk_set])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def on_category_changed(sender: Any, instance: Category, **kwargs: Any) -> None:
+    """
+    Регистрирует изменение задач владельца при создании, изменении или удалении его категории.
+    """
+    tasks_changed([instance.user_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def on_user_changed(sender: Any, instance: User, **kwargs: Any) -> None:
+    """
+    Сбрасывает закэшированное состояние пользователя для JWT-аутентификации
+    при изменении или удалении пользователя (в том числе через UserViewSet).
+    """
+    invalidate_user_auth(instance.pk)
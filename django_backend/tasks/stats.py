@@ -0,0 +1,204 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from tasks.models import CategoryTaskStats, Task, TaskStats
+
+logger = settings.LOGGER.get_logger('stats')
+
+
+def update_task_counts(deltas: Iterable[Tuple[int, bool, int]]) -> None:
+    """
+    Изменяет счетчики задач пользователей одним запросом INSERT ... ON CONFLICT DO UPDATE.
+
+    Вызывается в транзакции записи задач, поэтому счетчики меняются атомарно
+    вместе с задачами.
+
+    Args:
+        deltas (Iterable[Tuple[int, bool, int]]): Тройки (ID владельца, completed, изменение количества).
+    """
+    counts: Dict[int, List[int]] = {}
+    for user_id, completed, delta in deltas:
+        counts.setdefault(user_id, [0, 0])[1 if completed else 0] += delta
+    rows: List[Tuple[int, int, int]] = [(user_id, *counts[user_id]) for user_id in sorted(counts) if any(counts[user_id])]
+    if not rows:
+        return
+    table: str = TaskStats._meta.db_table
+    placeholders: str = ', '.join(['(%s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, open_count, completed_count) VALUES {placeholders} "
+            f"ON CONFLICT (user_id) DO UPDATE SET open_count = {table}.open_count + EXCLUDED.open_count, "
+            f"completed_count = {table}.completed_count + EXCLUDED.completed_count",
+            [value for row in rows for value in row],
+        )
+
+
+def update_category_counts(deltas: Iterable[Tuple[int, str, int]]) -> None:
+    """
+    Изменяет количество задач пользователей в категориях одним запросом.
+
+    Args:
+        deltas (Iterable[Tuple[int, str, int]]): Тройки (ID владельца, ID категории, изменение количества).
+    """
+    counts: Counter = Counter()
+    for user_id, category_id, delta in deltas:
+        counts[(user_id, category_id)] += delta
+    rows: List[Tuple[int, str, int]] = [(*key, counts[key]) for key in sorted(counts) if counts[key]]
+    if not rows:
+        return
+    table: str = CategoryTaskStats._meta.db_table
+    placeholders: str = ', '.join(['(%s, %s, %s)'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, category_id, task_count) VALUES {placeholders} "
+            f"ON CONFLICT (user_id, category_id) DO UPDATE SET task_count = {table}.task_count + EXCLUDED.task_count",
+            [value for row in rows for value in row],
+        )
+
+
+def get_task_stats(user_id: int) -> Dict[str, Any]:
+    """
+    Возвращает статистику задач пользователя.
+
+    Количество открытых и выполненных задач и задач по категориям читается из
+    TaskStats и CategoryTaskStats и не зависит от числа задач. Просроченность
+    меняется со временем без записи в базу, поэтому просроченные задачи
+    считаются запросом по индексу (user, completed, due_date), который
+    затрагивает только сами просроченные задачи.
+
+    Args:
+        user_id (int): ID пользователя.
+
+    Returns:
+        Dict[str, Any]: Счетчики open, completed, overdue, total и список categories.
+    """
+    counts: Optional[Tuple[int, int]] = (TaskStats.objects.filter(user_id=user_id)
+                                         .values_list('open_count', 'completed_count').first())
+    open_count, completed_count = counts or (0, 0)
+    overdue: int = Task.objects.filter(user_id=user_id, completed=False, due_date__lt=timezone.now()).count()
+    categories: List[Dict[str, Any]] = [
+        {"id": category_id, "name": name, "count": count}
+        for category_id, name, count in CategoryTaskStats.objects.filter(user_id=user_id, task_count__gt=0)
+        .order_by('category__name', 'category_id').values_list('category_id', 'category__name', 'task_count')
+    ]
+    return {
+        "open": open_count,
+        "completed": completed_count,
+        "overdue": overdue,
+        "total": open_count + completed_count,
+        "categories": categories,
+    }
+
+
+def reconcile_user_range(first: int, last: int) -> Tuple[int, int]:
+    """
+    Пересчитывает статистику пользователей с ID от first до last включительно в одной транзакции.
+
+    Недостающие строки статистики диапазона создаются с нулевыми
+    счетчиками, после чего все строки диапазона блокируются через
+    SELECT ... FOR UPDATE. Запись задач, уже изменившая счетчики
+    пользователя, завершается до блокировки, и пересчет, идущий следующим
+    запросом, ее видит. Остальные записи ждут блокировку строки и применяют
+    свои изменения поверх пересчитанных значений. Записи задач других
+    пользователей не ждут.
+
+    Returns:
+        Tuple[int, int]: Количество исправленных строк TaskStats и CategoryTaskStats.
+    """
+    stats_table: str = TaskStats._meta.db_table
+    category_table: str = CategoryTaskStats._meta.db_table
+    task_table: str = Task._meta.db_table
+    through_table: str = Task.categories.through._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {stats_table} (user_id, open_count, completed_count)
+            SELECT id, 0, 0 FROM {User._meta.db_table} WHERE id BETWEEN %s AND %s
+            ON CONFLICT (user_id) DO NOTHING
+            RETURNING user_id
+        """, [first, last])
+        fixed_users: Set[int] = {row[0] for row in cursor.fetchall()}
+        cursor.execute(f"""
+            INSERT INTO {category_table} (user_id, category_id, task_count)
+            SELECT DISTINCT t.user_id, l.category_id, 0
+            FROM {through_table} l JOIN {task_table} t ON t.id = l.task_id
+            WHERE t.user_id BETWEEN %s AND %s
+            ON CONFLICT (user_id, category_id) DO NOTHING
+            RETURNING user_id, category_id
+        """, [first, last])
+        fixed_categories: Set[Tuple[int, str]] = set(cursor.fetchall())
+        cursor.execute(f"SELECT 1 FROM {stats_table} WHERE user_id BETWEEN %s AND %s ORDER BY user_id FOR UPDATE",
+                       [first, last])
+        cursor.execute(f"SELECT 1 FROM {category_table} WHERE user_id BETWEEN %s AND %s "
+                       f"ORDER BY user_id, category_id FOR UPDATE", [first, last])
+
+        cursor.execute(f"""
+            UPDATE {stats_table} s SET open_count = a.open_count, completed_count = a.completed_count
+            FROM (
+                SELECT u.id AS user_id, count(t.id) FILTER (WHERE NOT t.completed) AS open_count,
+                       count(t.id) FILTER (WHERE t.completed) AS completed_count
+                FROM {User._meta.db_table} u LEFT JOIN {task_table} t ON t.user_id = u.id
+                WHERE u.id BETWEEN %s AND %s
+                GROUP BY u.id
+            ) a
+            WHERE s.user_id = a.user_id
+              AND (s.open_count, s.completed_count) IS DISTINCT FROM (a.open_count, a.completed_count)
+            RETURNING s.user_id
+        """, [first, last])
+        fixed_users.update(row[0] for row in cursor.fetchall())
+        cursor.execute(f"""
+            UPDATE {category_table} s SET task_count = a.task_count
+            FROM (
+                SELECT t.user_id, l.category_id, count(*) AS task_count
+                FROM {through_table} l JOIN {task_table} t ON t.id = l.task_id
+                WHERE t.user_id BETWEEN %s AND %s
+                GROUP BY t.user_id, l.category_id
+            ) a
+            WHERE s.user_id = a.user_id AND s.category_id = a.category_id AND s.task_count <> a.task_count
+            RETURNING s.user_id, s.category_id
+        """, [first, last])
+        fixed_categories.update(cursor.fetchall())
+        # Удаление обнулившихся строк расхождением не считается
+        cursor.execute(f"""
+            DELETE FROM {category_table} s
+            WHERE s.user_id BETWEEN %s AND %s AND NOT EXISTS (
+                SELECT 1 FROM {through_table} l JOIN {task_table} t ON t.id = l.task_id
+                WHERE t.user_id = s.user_id AND l.category_id = s.category_id
+            )
+            RETURNING task_count
+        """, [first, last])
+        removed: int = sum(1 for row in cursor.fetchall() if row[0] != 0)
+    return len(fixed_users), len(fixed_categories) + removed
+
+
+def reconcile_task_stats() -> Tuple[int, int]:
+    """
+    Пересчитывает TaskStats и CategoryTaskStats по задачам.
+
+    Исправляет расхождения после записей в обход сигналов (QuerySet.update,
+    SQL вручную). Пользователи пересчитываются диапазонами ID по
+    TASK_STATS_RECONCILE_BATCH_SIZE в коротких транзакциях с блокировкой
+    строк статистики диапазона (см. reconcile_user_range), поэтому запись
+    задач ждет пересчета только своего диапазона. Чтение статистики при
+    этом не блокируется.
+
+    Returns:
+        Tuple[int, int]: Количество исправленных строк TaskStats и CategoryTaskStats.
+    """
+    fixed_users: int = 0
+    fixed_categories: int = 0
+    last_id: int = 0
+    while True:
+        user_ids: List[int] = list(User.objects.filter(id__gt=last_id).order_by('id')
+                                   .values_list('id', flat=True)[:settings.TASK_STATS_RECONCILE_BATCH_SIZE])
+        if not user_ids:
+            break
+        users, categories = reconcile_user_range(user_ids[0], user_ids[-1])
+        fixed_users += users
+        fixed_categories += categories
+        last_id = user_ids[-1]
+    logger.info(f"Статистика задач пересчитана: исправлено {fixed_users} строк пользователей "
+                f"и {fixed_categories} строк категорий")
+    return fixed_users, fixed_categories
@@ -0,0 +1,253 @@
+import asyncio
+import io
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from tasks.authentication import CachedJWTAuthentication
+from tasks.changefeed import ChangeCursorExpired, get_task_changes
+from tasks.pubsub import Subscription, task_events
+from tasks.serializers import TaskCreateSerializer
+
+logger = settings.LOGGER.get_logger('streaming')
+
+TASK_STREAM_PATH: str = '/api/stream/tasks/'
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class TaskEventStream:
+    """
+    ASGI-приложение потока событий задач пользователя (Server-Sent Events).
+
+    Соединение подписывается на уведомления tasks.pubsub и по каждому
+    уведомлению читает журнал изменений (tasks.changefeed) от своего курсора,
+    отправляя событие changes с измененными задачами и ID удаленных. ID
+    события равен курсору, поэтому EventSource после переподключения
+    продолжает с Last-Event-ID без потерь. Без уведомлений раз в
+    TASK_STREAM_HEARTBEAT секунд отправляется комментарий keepalive.
+
+    Медленный клиент не накапливает очередь: уведомления схлопываются в
+    флаг подписки, следующая порция читается только после отправки
+    предыдущей, а отправка, не завершившаяся за TASK_STREAM_SEND_TIMEOUT
+    секунд, закрывает соединение. Обычное Django-представление не подходит:
+    в Django 4.2 потоковый ответ не узнает об отключении клиента.
+
+    Соединения одного пользователя с одинаковым курсором (несколько вкладок)
+    читают журнал одним общим запросом, поэтому рассылка стоит одного чтения
+    на пользователя, а не на соединение.
+
+    Открытие потока проходит те же ограничения запросов
+    (DEFAULT_THROTTLE_CLASSES, tasks.throttling), что и остальные эндпоинты
+    API, а число одновременных потоков пользователя в процессе ограничено
+    TASK_STREAM_MAX_PER_USER.
+    """
+    authentication = CachedJWTAuthentication()
+    renderer = JSONRenderer()
+
+    def __init__(self) -> None:
+        self._fetches: Dict[Tuple[int, Optional[str]], Tuple[asyncio.Future, float]] = {}
+
+    async def __call__(self, scope: Dict[str, Any], receive: Receive, send: Send) -> None:
+        headers: Dict[str, str] = {name.decode('latin1').lower(): value.decode('latin1')
+                                   for name, value in scope['headers']}
+        params: Dict[str, List[str]] = parse_qs(scope['query_string'].decode('latin1'))
+        if scope['method'] != 'GET':
+            await self.send_error(send, status.HTTP_405_METHOD_NOT_ALLOWED, "Метод не поддерживается")
+            return
+
+        authorization: str = headers.get('authorization', '')
+        # EventSource в браузере не передает заголовки, поэтому токен можно передать параметром
+        token: str = authorization[7:] if authorization.startswith('Bearer ') else params.get('token', [''])[0]
+        user: Optional[User] = await sync_to_async(self.authenticate, thread_sensitive=False)(token)
+        wait: Optional[float] = await sync_to_async(self.throttle, thread_sensitive=False)(scope, user)
+        if wait is not None:
+            await self.send_error(send, status.HTTP_429_TOO_MANY_REQUESTS, "Слишком много запросов",
+                                  [(b'retry-after', str(math.ceil(wait)).encode('latin1'))])
+            return
+        if user is None:
+            await self.send_error(send, status.HTTP_401_UNAUTHORIZED, "Учетные данные не были предоставлены или неверны")
+            return
+        if task_events.count(user.id) >= settings.TASK_STREAM_MAX_PER_USER:
+            logger.warning(f"Превышено число потоков событий для пользователя {user}")
+            await self.send_error(send, status.HTTP_429_TOO_MANY_REQUESTS, "Слишком много открытых потоков событий")
+            return
+
+        since: str = headers.get('last-event-id') or params.get('since', [''])[0]
+        # Подписка оформляется до первого чтения журнала, чтобы не пропустить изменения между ними
+        subscription: Subscription = task_events.subscribe(user.id)
+        logger.info(f"Открыт поток событий задач для пользователя {user}")
+        try:
+            await send({'type': 'http.response.start', 'status': status.HTTP_200_OK, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            stream = asyncio.ensure_future(self.stream(user, since, subscription, send))
+            disconnect = asyncio.ensure_future(self.wait_disconnect(receive))
+            done, pending = await asyncio.wait({stream, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            for future in pending:
+                future.cancel()
+            if stream in done and not stream.cancelled() and stream.exception() is None:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            elif stream in done and stream.exception() is not None:
+                logger.log_exception(f"Ошибка потока событий задач для пользователя {user}: {stream.exception()}")
+        finally:
+            task_events.unsubscribe(subscription)
+            logger.info(f"Закрыт поток событий задач для пользователя {user}")
+
+    def authenticate(self, token: str) -> Optional[User]:
+        """
+        Возвращает пользователя по JWT или None, если токен неверен.
+        """
+        if not token:
+            return None
+        try:
+            return self.authentication.get_user(self.authentication.get_validated_token(token))
+        except (InvalidToken, AuthenticationFailed):
+            return None
+        finally:
+            close_old_connections()
+
+    def throttle(self, scope: Dict[str, Any], user: Optional[User]) -> Optional[float]:
+        """
+        Проверяет ограничения запросов DEFAULT_THROTTLE_CLASSES так же, как APIView.check_throttles.
+
+        Returns:
+            Optional[float]: None, если поток можно открыть, иначе время ожидания в секундах.
+        """
+        request = Request(ASGIRequest(scope, io.BytesIO()))
+        request.user = user or AnonymousUser()
+        waits: List[float] = []
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                waits.append(throttle.wait() or 0.0)
+        return max(waits) if waits else None
+
+    def fetch_changes(self, user: User, since: Optional[str]) -> Dict[str, Any]:
+        """
+        Читает изменения после курсора и сериализует измененные задачи.
+        """
+        try:
+            result: Dict[str, Any] = get_task_changes(user, since, settings.TASK_CHANGES_PAGE_SIZE)
+            result['changed'] = TaskCreateSerializer(result['changed'], many=True).data
+            return result
+        finally:
+            close_old_connections()
+
+    async def fetch_shared(self, user: User, since: Optional[str], not_before: float) -> Dict[str, Any]:
+        """
+        Читает изменения после курсора, присоединяясь к уже идущему чтению с тем же курсором.
+
+        Присоединиться можно только к чтению, начатому не раньше not_before
+        (времени последнего уведомления соединения): более раннее чтение может
+        не увидеть изменение, о котором соединение уведомлено. Результат общий
+        для всех соединений и не должен изменяться.
+        """
+        key: Tuple[int, Optional[str]] = (user.id, since)
+        shared: Optional[Tuple[asyncio.Future, float]] = self._fetches.get(key)
+        if shared is None or shared[0].done() or shared[1] < not_before:
+            future: asyncio.Future = asyncio.ensure_future(
+                sync_to_async(self.fetch_changes, thread_sensitive=False)(user, since))
+            shared = (future, time.monotonic())
+            self._fetches[key] = shared
+
+            def forget(_: asyncio.Future, entry: Tuple[asyncio.Future, float] = shared) -> None:
+                if self._fetches.get(key) is entry:
+                    del self._fetches[key]
+
+            future.add_done_callback(forget)
+        # Отключение одного соединения не должно прерывать чтение для остальных
+        return await asyncio.shield(shared[0])
+
+    async def stream(self, user: User, since: str, subscription: Subscription, send: Send) -> None:
+        """
+        Отправляет события изменений, пока соединение открыто.
+
+        Если после уведомления журнал пуст, чтение повторяется до
+        TASK_STREAM_RETRIES раз: изменения фиксированной транзакции скрыты,
+        пока не завершится более ранняя транзакция (см. tasks.changefeed.get_completed_xid).
+        """
+        try:
+            result: Dict[str, Any] = await self.fetch_shared(user, since or None, subscription.notified_at)
+        except (ValueError, ChangeCursorExpired):
+            # Клиенту нужна полная синхронизация, после нее он подключится с новым курсором
+            await self.send_event(send, 'reset', {"error": "Курсор устарел или неверен"})
+            return
+        cursor: str = since or result['cursor']
+        await self.send_event(send, 'ready', {"cursor": cursor}, cursor)
+        # Изменения, пропущенные клиентом за время отключения, отправляются сразу
+        pending: bool = bool(result['changed'] or result['deleted'])
+        if pending:
+            cursor = result['cursor']
+            await self.send_event(send, 'changes', result, cursor)
+            pending = result['has_more']
+        retries: int = 0
+
+        while True:
+            if pending:
+                result = await self.fetch_shared(user, cursor, subscription.notified_at)
+                cursor = result['cursor']
+                if result['changed'] or result['deleted']:
+                    await self.send_event(send, 'changes', result, cursor)
+                    pending, retries = result['has_more'], 0
+                elif retries < settings.TASK_STREAM_RETRIES:
+                    retries += 1
+                    await asyncio.sleep(settings.TASK_STREAM_RETRY_DELAY)
+                    continue
+                else:
+                    pending, retries = False, 0
+                if pending:
+                    continue
+            if await subscription.wait(settings.TASK_STREAM_HEARTBEAT):
+                pending = True
+            else:
+                await self.send_raw(send, b': keepalive\n\n')
+
+    async def wait_disconnect(self, receive: Receive) -> None:
+        """
+        Ждет отключения клиента.
+        """
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def send_event(self, send: Send, event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> None:
+        """
+        Отправляет событие SSE с данными в JSON.
+        """
+        prefix: bytes = f"id: {event_id}\n".encode('utf-8') if event_id else b''
+        await self.send_raw(send, prefix + f"event: {event}\ndata: ".encode('utf-8') + self.renderer.render(data) + b'\n\n')
+
+    async def send_raw(self, send: Send, body: bytes) -> None:
+        """
+        Отправляет часть ответа, ожидая ее не дольше TASK_STREAM_SEND_TIMEOUT секунд.
+
+        Raises:
+            asyncio.TimeoutError: Если клиент не принимает данные.
+        """
+        await asyncio.wait_for(send({'type': 'http.response.body', 'body': body, 'more_body': True}),
+                               settings.TASK_STREAM_SEND_TIMEOUT)
+
+    async def send_error(self, send: Send, status_code: int, message: str,
+                         headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+        """
+        Отправляет ответ с ошибкой в формате API.
+        """
+        await send({'type': 'http.response.start', 'status': status_code,
+                    'headers': [(b'content-type', b'application/json')] + (headers or [])})
+        await send({'type': 'http.response.body', 'body': self.renderer.render({"error": message})})
+
+
+task_event_stream = TaskEventStream()
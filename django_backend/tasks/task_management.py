@@ -1,12 +1,18 @@
 from django.utils import timezone
 from django.conf import settings
-from django.db import connection
-from django.db.utils import ProgrammingError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Q, QuerySet
 from background_task import background
-from typing import List, Optional, Dict, Any
-import os
+from typing import Callable, List, Optional, Dict, Any
+import time
+from datetime import datetime, timedelta
 import requests
-from tasks.models import Task
+from tasks.models import Task, CommentCleanupOutbox, SweepCursor
+from tasks.archive import copy_to_archive
+from tasks.service_auth import service_token_provider
+from tasks.changes import tasks_changed
+from tasks.changefeed import prune_task_changes
+from tasks.stats import reconcile_task_stats, update_category_counts, update_task_counts
 
 # Инициализация логгера
 logger = settings.LOGGER.get_logger('task_management')
@@ -15,138 +21,364 @@ def get_auth_token() -> str:
     """
     Получает токен авторизации для Django проекта.
 
+    Токен берется из кэша service_token_provider и выпускается заново
+    только незадолго до истечения.
+
     Returns:
         str: Токен авторизации.
 
     Raises:
         ValueError: Если авторизация не удалась.
     """
-    from django.contrib.auth import authenticate
-    from django.contrib.auth.models import User
-    from rest_framework_simplejwt.tokens import RefreshToken
-    username: Optional[str] = os.getenv("API_USERNAME_TODO")
-    password: Optional[str] = os.getenv("API_PASSWORD_TODO")
+    return service_token_provider.get_token()
+
+def delete_task_batch(batch: QuerySet, cleanup_comments: bool = True) -> List[str]:
+    """
+    Удаляет пачку задач одним запросом DELETE ... WHERE id IN (...) RETURNING
+    вместе со связями задача-категория.
+
+    В той же транзакции удаленные ID записываются в CommentCleanupOutbox
+    для очистки комментариев (если cleanup_comments), а изменение
+    регистрируется в версиях, кэше и статистике задач. Вызывается внутри
+    transaction.atomic().
+
+    Args:
+        batch (QuerySet): Выборка values('id') с LIMIT и SELECT ... FOR UPDATE SKIP LOCKED.
+        cleanup_comments (bool): Ставить ли очистку комментариев удаленных задач в очередь.
+
+    Returns:
+        List[str]: Отсортированные ID удаленных задач.
+    """
+    task_table: str = Task._meta.db_table
+    through_table: str = Task.categories.through._meta.db_table
+    batch_sql, batch_params = batch.query.sql_with_params()
+    with connection.cursor() as cursor:
+        # MATERIALIZED: подзапрос с LIMIT и SKIP LOCKED вычисляется один раз. При повторном
+        # сканировании внутри DELETE он пропустил бы уже удаленные строки и выбрал следующие
+        cursor.execute(f"WITH batch AS MATERIALIZED ({batch_sql}) "
+                       f"DELETE FROM {task_table} WHERE id IN (SELECT id FROM batch) "
+                       f"RETURNING id, user_id, completed",
+                       batch_params)
+        rows: List[tuple] = cursor.fetchall()
+        deleted_ids: List[str] = sorted(row[0] for row in rows)
+        links: List[tuple] = []
+        if deleted_ids:
+            cursor.execute(f"DELETE FROM {through_table} WHERE task_id = ANY(%s) RETURNING task_id, category_id",
+                           [deleted_ids])
+            links = cursor.fetchall()
+    # Удаление в обход ORM не отправляет сигналы, поэтому изменение регистрируем явно
+    tasks_changed(row[1] for row in rows)
+    owners: Dict[str, int] = {task_id: user_id for task_id, user_id, _ in rows}
+    update_task_counts((user_id, completed, -1) for _, user_id, completed in rows)
+    update_category_counts((owners[task_id], category_id, -1) for task_id, category_id in links)
+    if cleanup_comments:
+        CommentCleanupOutbox.objects.bulk_create([CommentCleanupOutbox(task_id=task_id) for task_id in deleted_ids])
+    return deleted_ids
+
+def archive_task_batch(batch: QuerySet) -> List[str]:
+    """
+    Переносит пачку выполненных задач в архив: INSERT ... SELECT в ArchivedTask и удаление из Task.
+
+    Удаление идет через delete_task_batch, поэтому статистика, версии, кэш
+    и журнал изменений (задача для клиента удалена) обновляются так же,
+    как при удалении. Комментарии архивных задач сохраняются вместе с
+    историей. Вызывается внутри transaction.atomic().
+
+    Args:
+        batch (QuerySet): Выборка values('id') с LIMIT и SELECT ... FOR UPDATE SKIP LOCKED.
+
+    Returns:
+        List[str]: Отсортированные ID перенесенных задач.
+    """
+    task_ids: List[str] = copy_to_archive(batch)
+    if not task_ids:
+        return []
+    return delete_task_batch(Task.objects.filter(id__in=task_ids).values('id'), cleanup_comments=False)
+
+def save_sweep_cursor(sweep_name: str, last_id: str, last_value: Optional[datetime] = None) -> None:
+    """
+    Сохраняет позицию прохода очистки одним запросом INSERT ... ON CONFLICT DO UPDATE.
+    """
+    SweepCursor.objects.bulk_create([SweepCursor(name=sweep_name, last_id=last_id, last_value=last_value)],
+                                    update_conflicts=True, unique_fields=['name'],
+                                    update_fields=['last_id', 'last_value'])
+
+def sweep_tasks(sweep_name: str, queryset: QuerySet,
+                process_batch: Callable[[QuerySet], List[str]] = delete_task_batch,
+                order_field: Optional[str] = None) -> int:
+    """
+    Удаляет задачи из queryset пачками в пределах бюджета времени.
+
+    Пачки выбираются keyset-запросами по возрастанию ID или, если задано
+    order_field, по паре (order_field, ID); поле сортировки не должно быть
+    NULL у задач queryset. Каждая пачка обрабатывается в своей транзакции
+    функцией process_batch (по умолчанию delete_task_batch). Позиция
+    сохраняется в SweepCursor в транзакции пачки, поэтому прерванный по
+    бюджету или перезапуском проход продолжится со следующего запуска в
+    любом процессе. За запуск обрабатывается минимум одна пачка.
+
+    Args:
+        sweep_name (str): Имя прохода, ключ SweepCursor.
+        queryset (QuerySet): Задачи, подлежащие удалению.
+        process_batch (Callable[[QuerySet], List[str]]): Обработчик пачки, возвращает ID удаленных задач.
+        order_field (Optional[str]): Поле даты, по которому упорядочен проход, или None для порядка по ID.
+
+    Returns:
+        int: Количество удаленных задач.
+    """
+    cursor: Optional[SweepCursor] = SweepCursor.objects.filter(name=sweep_name).first()
+    last_id: str = cursor.last_id if cursor is not None else ''
+    last_value: Optional[datetime] = cursor.last_value if cursor is not None else None
+    wrapped: bool = last_id == ''
+    fields: List[str] = ['id'] if order_field is None else [order_field, 'id']
+    deadline: float = time.monotonic() + settings.SWEEP_TIME_BUDGET
+    total: int = 0
+
+    while True:
+        batch: QuerySet = queryset
+        if last_id and order_field is not None:
+            batch = batch.filter(Q(**{f'{order_field}__gt': last_value}) | Q(**{order_field: last_value, 'id__gt': last_id}),
+                                 **{f'{order_field}__gte': last_value})
+        elif last_id:
+            batch = batch.filter(id__gt=last_id)
+        with transaction.atomic():
+            keys: List[tuple] = list(batch.order_by(*fields).values_list(*fields)
+                                     .select_for_update(skip_locked=True)[:settings.SWEEP_BATCH_SIZE])
+            if keys:
+                deleted_ids: List[str] = process_batch(Task.objects.filter(id__in=[key[-1] for key in keys]).values('id'))
+                last_id, last_value = keys[-1][-1], keys[-1][0] if order_field is not None else None
+                save_sweep_cursor(sweep_name, last_id, last_value)
+
+        if keys:
+            total += len(deleted_ids)
+        elif not wrapped:
+            # Дошли до конца, начав с середины: проходим начало таблицы
+            last_id, last_value, wrapped = '', None, True
+            continue
+        else:
+            last_id, last_value = '', None
+            break
+
+        if time.monotonic() >= deadline:
+            logger.info(f"Проход {sweep_name} остановлен по бюджету времени, курсор: {last_id}")
+            break
+
+    if last_id == '':
+        save_sweep_cursor(sweep_name, last_id)
+    return total
+
+def expire_due_tasks(now: datetime) -> int:
+    """
+    Удаляет невыполненные задачи со сроком не позже now в пределах бюджета SWEEP_TIME_BUDGET.
+
+    Проход идет по возрастанию срока (см. sweep_tasks с курсором по паре
+    (due_date, ID)) по частичному индексу task_open_due_idx (невыполненные
+    задачи со сроком), поэтому запрос читает только уже просроченные задачи,
+    и его стоимость не зависит от размера таблицы. Задачи, заблокированные
+    другим процессом, пропускаются. Остаток большого числа просроченных задач
+    удаляют следующие запуски, начиная с сохраненной позиции.
 
-    if not username or not password:
-        raise ValueError("Отсутствуют учетные данные для авторизации")
+    Args:
+        now (datetime): Момент, на который задачи считаются просроченными.
 
-    user: Optional[User] = authenticate(username=username, password=password)
-    if user is not None:
-        refresh: RefreshToken = RefreshToken.for_user(user)
-        return str(refresh.access_token)
-    else:
-        raise ValueError("Неверные учетные данные")
+    Returns:
+        int: Количество удаленных задач.
+    """
+    return sweep_tasks('expire_due', Task.objects.filter(completed=False, due_date__lte=now), order_field='due_date')
 
 @background(schedule=settings.TIME_COMPLETED_TASK_INTERVAL)
 def delete_completed_tasks() -> None:
     """
-    Удаляет все выполненные задачи и связанные с ними комментарии.
+    Убирает выполненные задачи из таблицы задач пачками.
 
     Эта функция проверяет настройку TIME_COMPLETED_TASK в settings.py.
-    Если она включена, функция удаляет все задачи, помеченные как выполненные,
-    а также удаляет связанные с ними комментарии в микросервисе комментариев.
+    Если она включена, функция обрабатывает задачи, помеченные как
+    выполненные, в пределах бюджета SWEEP_TIME_BUDGET (см. sweep_tasks).
+    При TIME_COMPLETED_TASK_ARCHIVE задачи переносятся в архив (см.
+    archive_task_batch), иначе удаляются, а комментарии к ним удаляются
+    через CommentCleanupOutbox.
 
     Raises:
-        Exception: Если произошла ошибка при удалении задач или комментариев.
+        Exception: Если произошла ошибка при удалении задач.
     """
     if settings.TIME_COMPLETED_TASK:
         try:
-            completed_tasks: List[Task] = list(Task.objects.filter(completed=True))
-            count: int = len(completed_tasks)
-            for task in completed_tasks:
-                delete_task_comments(task.id)
-                task.delete()
-            logger.info(f"Удалено {count} выполненных задач и связанных комментариев.")
+            completed: QuerySet = Task.objects.filter(completed=True)
+            if settings.TIME_COMPLETED_TASK_ARCHIVE:
+                count: int = sweep_tasks('archive_completed', completed, archive_task_batch)
+                logger.info(f"Перенесено в архив {count} выполненных задач.")
+                return
+            count = sweep_tasks('delete_completed', completed)
+            logger.info(f"Удалено {count} выполненных задач, очистка комментариев поставлена в очередь.")
         except Exception as e:
             logger.log_exception(f"Ошибка при удалении выполненных задач: {str(e)}")
 
 @background(schedule=settings.TIME_DUE_TASK_INTERVAL)
 def mark_overdue_tasks() -> None:
     """
-    Отмечает и удаляет все просроченные задачи и связанные с ними комментарии.
+    Удаляет просроченные задачи и ставит очистку их комментариев в очередь.
 
     Эта функция проверяет настройку TIME_DUE_TASK в settings.py.
-    Если она включена, функция отмечает все невыполненные задачи,
-    у которых прошел срок выполнения, как "Просрочено", а затем удаляет их
-    вместе со связанными комментариями.
+    Если она включена, функция удаляет невыполненные задачи, у которых
+    прошел срок выполнения, в пределах бюджета SWEEP_TIME_BUDGET
+    (см. expire_due_tasks), а комментарии
+    к ним удаляются через CommentCleanupOutbox. Вовремя задачи удаляет
+    планировщик сроков (tasks.deadlines), этот запуск страхует его на случай,
+    если планировщик не работал.
 
     Raises:
-        Exception: Если произошла ошибка при обработке задач или комментариев.
+        Exception: Если произошла ошибка при обработке задач.
     """
     if settings.TIME_DUE_TASK:
         try:
-            now: timezone.datetime = timezone.now()
-            overdue_tasks: List[Task] = list(Task.objects.filter(due_date__lt=now, completed=False))
-            count: int = len(overdue_tasks)
-            for task in overdue_tasks:
-                task.status = 'Просрочено'
-                logger.info(f"Задача '{task.title}' (ID: {task.id}) помечена как просроченная и будет удалена.")
-                delete_task_comments(task.id)
-                task.delete()
-            logger.info(f"Обработано и удалено {count} просроченных задач и связанных комментариев.")
+            count: int = expire_due_tasks(timezone.now())
+            logger.info(f"Удалено {count} просроченных задач, очистка комментариев поставлена в очередь.")
         except Exception as e:
             logger.log_exception(f"Ошибка при обработке просроченных задач: {str(e)}")
 
-def delete_task_comments(task_id: str) -> None:
+def request_comments_cleanup(task_ids: List[str]) -> int:
     """
-    Удаляет все комментарии, связанные с заданной задачей, в микросервисе комментариев.
+    Удаляет комментарии задач одним запросом POST /comments/bulk-delete
+    к микросервису комментариев.
 
     Args:
-        task_id (str): ID задачи, для которой нужно удалить комментарии.
+        task_ids (List[str]): ID удаленных задач.
+
+    Returns:
+        int: Количество удаленных комментариев.
 
     Raises:
-        Exception: Если произошла ошибка при удалении комментариев.
+        requests.RequestException: Если запрос к микросервису не удался.
+        ValueError: Если не удалось получить сервисный токен.
+    """
+    token: str = get_auth_token()
+    headers: Dict[str, str] = {"Authorization": f"Bearer {token}"}
+    response: requests.Response = requests.post(f"{settings.COMMENTS_SERVICE_URL}/comments/bulk-delete",
+                                                 json={"task_ids": task_ids}, headers=headers,
+                                                 timeout=settings.COMMENTS_SERVICE_TIMEOUT)
+    if response.status_code == 401:
+        service_token_provider.invalidate()
+    response.raise_for_status()
+    return response.json()['deleted']
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """
+    Возвращает задержку перед повторной попыткой с экспоненциальным ростом.
+
+    Args:
+        attempts (int): Количество уже неудачных попыток.
+
+    Returns:
+        timedelta: Задержка до следующей попытки.
+    """
+    delay: float = settings.OUTBOX_RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_DELAY))
+
+@background(schedule=settings.OUTBOX_DRAIN_INTERVAL)
+def drain_comment_outbox() -> None:
+    """
+    Обрабатывает очередь CommentCleanupOutbox пачками.
+
+    Пачка записей, срок попытки которых наступил, захватывается короткой
+    транзакцией: записи блокируются через SELECT ... FOR UPDATE SKIP LOCKED,
+    и их срок попытки сдвигается на OUTBOX_CLAIM_TIMEOUT секунд, поэтому
+    другие обработчики их не возьмут. Запрос к микросервису выполняется после
+    фиксации, без открытой транзакции и блокировок строк. Затем записи
+    удаляются или при ошибке попытка пачки откладывается с экспоненциальной
+    задержкой, и обработка останавливается до следующего запуска. Записи
+    упавшего обработчика снова обрабатываются по истечении срока захвата.
+    """
+    processed: int = 0
+    while True:
+        with transaction.atomic():
+            batch: List[CommentCleanupOutbox] = list(
+                CommentCleanupOutbox.objects.filter(next_attempt_at__lte=timezone.now())
+                .order_by('next_attempt_at', 'id')
+                .select_for_update(skip_locked=True)[:settings.OUTBOX_BATCH_SIZE]
+            )
+            if not batch:
+                break
+            ids: List[int] = [entry.id for entry in batch]
+            CommentCleanupOutbox.objects.filter(id__in=ids).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT))
+
+        task_ids: List[str] = list(dict.fromkeys(entry.task_id for entry in batch))
+        try:
+            deleted: int = request_comments_cleanup(task_ids)
+        except (requests.RequestException, ValueError) as e:
+            logger.log_exception(f"Ошибка при очистке комментариев для {len(task_ids)} задач: {str(e)}")
+            for entry in batch:
+                entry.attempts += 1
+                entry.next_attempt_at = timezone.now() + get_retry_delay(entry.attempts)
+                entry.last_error = str(e)
+            CommentCleanupOutbox.objects.bulk_update(batch, ['attempts', 'next_attempt_at', 'last_error'])
+            break
+        CommentCleanupOutbox.objects.filter(id__in=ids).delete()
+        processed += len(batch)
+        logger.info(f"Удалено {deleted} комментариев для {len(task_ids)} задач из очереди очистки.")
+    logger.info(f"Обработано {processed} записей очереди очистки комментариев.")
+
+
+@background(schedule=settings.TASK_STATS_RECONCILE_INTERVAL)
+def reconcile_task_stats_job() -> None:
+    """
+    Периодически пересчитывает статистику задач (см. tasks.stats.reconcile_task_stats).
     """
     try:
-        # Получаем токен авторизации для Django проекта
-        token: str = get_auth_token()
-
-        headers: Dict[str, str] = {"Authorization": f"Bearer {token}"}
-
-        # Получаем все комментарии для задачи
-        response: requests.Response = requests.get(f"{settings.COMMENTS_SERVICE_URL}/tasks/{task_id}/comments", headers=headers)
-        response.raise_for_status()
-        comments: List[Dict[str, Any]] = response.json()
-
-        # Удаляем каждый комментарий по отдельности
-        for comment in comments:
-            comment_id: int = comment['id']
-            delete_response: requests.Response = requests.delete(f"{settings.COMMENTS_SERVICE_URL}/comments/{comment_id}", headers=headers)
-            delete_response.raise_for_status()
-            logger.info(f"Комментарий с ID {comment_id} для задачи {task_id} успешно удален.")
-
-        logger.info(f"Все комментарии для задачи с ID {task_id} успешно удалены.")
-    except requests.RequestException as e:
-        logger.log_exception(f"Ошибка при удалении комментариев для задачи с ID {task_id}: {str(e)}")
-    except ValueError as e:
-        logger.log_exception(f"Ошибка авторизации: {str(e)}")
+        reconcile_task_stats()
     except Exception as e:
-        logger.log_exception(f"Неожиданная ошибка при удалении комментариев для задачи с ID {task_id}: {str(e)}")
+        logger.log_exception(f"Ошибка при пересчете статистики задач: {str(e)}")
 
 
-def initialize_background_tasks() -> None:
+@background(schedule=settings.TASK_CHANGES_PRUNE_INTERVAL)
+def prune_task_changes_job() -> None:
     """
-    Инициализирует фоновые задачи.
+    Периодически удаляет устаревшие записи журнала изменений задач (см. tasks.changefeed.prune_task_changes).
+    """
+    try:
+        prune_task_changes()
+    except Exception as e:
+        logger.log_exception(f"Ошибка при очистке журнала изменений задач: {str(e)}")
+
 
-    Эта функция запускает фоновые задачи для удаления выполненных задач
-    и отметки просроченных задач с интервалами, указанными в settings.py.
+def initialize_background_tasks(using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
     """
-    logger.info("Начало инициализации фоновых задач.")
+    Инициализирует фоновые задачи.
 
-    # Проверяем, существует ли таблица background_task
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1 FROM background_task LIMIT 1")
-    except ProgrammingError:
+    Эта функция планирует повторяющиеся фоновые задачи для удаления
+    выполненных задач, отметки просроченных задач, обработки очереди очистки
+    комментариев, пересчета статистики задач и очистки журнала изменений
+    задач с интервалами, указанными в settings.py.
+
+    Подключается к сигналу post_migrate, поэтому выполняется один раз при
+    развертывании, а не при запуске каждого процесса. Операция идемпотентна:
+    под рекомендательной блокировкой существующая задача сохраняет время
+    следующего запуска и получает интервал из настроек, дубликаты удаляются,
+    недостающие задачи создаются.
+    """
+    from background_task.models import Task as BackgroundTask
+    if BackgroundTask._meta.db_table not in connections[using].introspection.table_names():
         logger.warning("Таблица background_task не существует. Пропускаем инициализацию фоновых задач.")
         return
+    logger.info("Начало инициализации фоновых задач.")
 
-    from background_task.models import Task
-
-    # Удаляем все существующие задачи с теми же именами
-    Task.objects.filter(task_name__in=['tasks.task_management.delete_completed_tasks',
-                                       'tasks.task_management.mark_overdue_tasks']).delete()
-
-    delete_completed_tasks(repeat=settings.TIME_COMPLETED_TASK_INTERVAL)
-    mark_overdue_tasks(repeat=settings.TIME_DUE_TASK_INTERVAL)
-    logger.info("Фоновые задачи успешно инициализированы.")
\ No newline at end of file
+    jobs: List[tuple] = [
+        (delete_completed_tasks, settings.TIME_COMPLETED_TASK_INTERVAL),
+        (mark_overdue_tasks, settings.TIME_DUE_TASK_INTERVAL),
+        (drain_comment_outbox, settings.OUTBOX_DRAIN_INTERVAL),
+        (reconcile_task_stats_job, settings.TASK_STATS_RECONCILE_INTERVAL),
+        (prune_task_changes_job, settings.TASK_CHANGES_PRUNE_INTERVAL),
+    ]
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", ['initialize_background_tasks'])
+        for job, interval in jobs:
+            scheduled: List[BackgroundTask] = list(BackgroundTask.objects.using(using)
+                                                   .filter(task_name=job.name).order_by('run_at', 'id'))
+            if not scheduled:
+                job(repeat=interval)
+                continue
+            BackgroundTask.objects.using(using).filter(id__in=[task.id for task in scheduled[1:]]).delete()
+            if scheduled[0].repeat != interval:
+                BackgroundTask.objects.using(using).filter(id=scheduled[0].id).update(repeat=interval)
+    logger.info("Фоновые задачи успешно инициализированы.")
@@ -1,16 +1,65 @@
-from django.test import TestCase
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.core.cache import cache, caches
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Task, Category
+from .models import ArchivedTask, Task, Category, CategoryTaskStats, CommentCleanupOutbox, IdNodeLease, SweepCursor, TaskStats
+from .pagination import TaskCursorPagination
+from .ids import NodeLease, get_id_generator
+from .categories import resolve_categories, sync_task_categories
+from .task_management import initialize_background_tasks, delete_completed_tasks, mark_overdue_tasks, drain_comment_outbox, get_retry_delay, expire_due_tasks
+from .deadlines import DeadlineHeap, DeadlineScheduler
+from .workers import WorkerPool
+from background_task import background
+from background_task.models import Task as BackgroundTask
+from .service_auth import ServiceTokenProvider
+from .stats import get_task_stats, reconcile_task_stats
+from .changefeed import prune_task_changes
+from .cache import task_cache
+from .changes import tasks_changed
+from .throttling import LocalTokenBucket, TokenBucketLimiter
+from .pubsub import task_events
+from .streaming import TASK_STREAM_PATH, task_event_stream
+from .serializers import TaskCreateSerializer
+from todo_list.db_pool.base import ConnectionPool
+import psycopg2
+from django.conf import settings
+import threading
+import time
+import requests
 from django.utils import timezone
 from datetime import timedelta
+from unittest.mock import Mock, patch
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.tokens import AccessToken
+import asyncio
+import csv
+import io
+import json
+
+
+job_runs = []
+job_state = {'running': 0, 'max_running': 0}
+job_lock = threading.Lock()
+
+
+@background(name='tasks.tests.record_job')
+def record_job(key, delay=0):
+    with job_lock:
+        job_runs.append(key)
+        job_state['running'] += 1
+        job_state['max_running'] = max(job_state['max_running'], job_state['running'])
+    time.sleep(delay)
+    with job_lock:
+        job_state['running'] -= 1
 
 
 class ModelTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='testuser', password='12345')
-        self.category = Category.objects.create(name='Test Category')
+        self.category = Category.objects.create(name='Test Category', user=self.user)
         self.task = Task.objects.create(
             title='Test Task',
             description='Test Description',
@@ -22,14 +71,61 @@ class ModelTests(TestCase):
     def test_category_creation(self):
         self.assertEqual(self.category.name, 'Test Category')
         self.assertTrue(isinstance(self.category.id, str))
-        self.assertEqual(len(self.category.id), 10)
+        self.assertEqual(len(self.category.id), 16)
 
     def test_task_creation(self):
         self.assertEqual(self.task.title, 'Test Task')
         self.assertEqual(self.task.user, self.user)
         self.assertEqual(self.task.categories.count(), 1)
         self.assertTrue(isinstance(self.task.id, str))
-        self.assertEqual(len(self.task.id), 10)
+        self.assertEqual(len(self.task.id), 16)
+
+    def test_ids_are_unique_and_sortable(self):
+        ids = get_id_generator().generate_batch(10000)
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+
+    def test_bulk_create_assigns_ids(self):
+        tasks = Task.objects.bulk_create([Task(title=f'Bulk {i}', user=self.user) for i in range(100)])
+        self.assertEqual(len({task.id for task in tasks}), 100)
+        self.assertEqual(Task.objects.filter(title__startswith='Bulk').count(), 100)
+
+    def test_unsaved_instances_get_no_id(self):
+        with patch('tasks.models.generate_id') as mock_generate_id:
+            task = Task(title='Draft', user=self.user)
+        mock_generate_id.assert_not_called()
+        self.assertEqual(task.pk, '')
+        task.save()
+        self.assertTrue(Task.objects.filter(pk=task.pk).exists())
+
+    def test_save_errors_are_raised(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Task.objects.create(id=self.task.id, title='Duplicate', user=self.user)
+
+
+class NodeLeaseTests(TransactionTestCase):
+    def test_processes_get_distinct_nodes(self):
+        first, second, third = NodeLease(5, 6, 60), NodeLease(5, 6, 60), NodeLease(5, 6, 60)
+        self.assertEqual((first.acquire(), second.acquire()), (5, 6))
+        with self.assertRaises(RuntimeError):
+            third.acquire()
+        first.release()
+        self.assertEqual(third.acquire(), 5)
+        self.assertFalse(third.expired())
+
+    def test_expired_lease_is_taken_over(self):
+        stale, fresh = NodeLease(7, 7, 60), NodeLease(7, 7, 60)
+        stale.acquire()
+        IdNodeLease.objects.filter(node_id=7).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(fresh.acquire(), 7)
+        self.assertFalse(stale.renew())
+        self.assertTrue(fresh.renew())
+        stale.release()
+        self.assertTrue(IdNodeLease.objects.filter(node_id=7, owner=fresh.owner).exists())
+
+    def test_rejects_invalid_range(self):
+        with self.assertRaises(ValueError):
+            NodeLease(1000, 1024, 60)
 
 
 class APITests(TestCase):
@@ -37,7 +133,7 @@ class APITests(TestCase):
         self.client = APIClient()
         self.user = User.objects.create_user(username='testuser', password='12345')
         self.client.force_authenticate(user=self.user)
-        self.category = Category.objects.create(name='Test Category')
+        self.category = Category.objects.create(name='Test Category', user=self.user)
         self.task_data = {
             'title': 'API Test Task',
             'description': 'API Test Description',
@@ -78,7 +174,8 @@ class APITests(TestCase):
         Task.objects.create(title='Test Task', user=self.user)
         response = self.client.get('/api/tasks/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
 
     def test_update_task(self):
         task = Task.objects.create(title='Old Title', user=self.user)
@@ -93,8 +190,1152 @@ class APITests(TestCase):
         self.assertEqual(Task.objects.count(), 0)
 
 
+class CategorySyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='Task', user=self.user)
+        sync_task_categories(self.task, ['Work', 'Home'], is_new=True)
+
+    def category_names(self):
+        return set(self.task.categories.values_list('name', flat=True))
+
+    def test_unchanged_categories_only_read(self):
+        with self.assertNumQueries(1):
+            sync_task_categories(self.task, ['Home', 'Work'])
+        self.assertEqual(self.category_names(), {'Work', 'Home'})
+
+    def test_delta_is_applied(self):
+        # Чтение текущих, поиск и вставка новой категории, удаление и вставка связей,
+        # обновление версий ETag и статистики категорий; число запросов не зависит от количества категорий
+        with self.assertNumQueries(12):
+            sync_task_categories(self.task, ['Work', 'Hobby'])
+        self.assertEqual(self.category_names(), {'Work', 'Hobby'})
+        self.assertEqual(Category.objects.filter(name='Home').count(), 1)
+
+    def test_update_endpoint_syncs_categories(self):
+        response = self.client.put(f'/api/tasks/{self.task.id}/', {'categories': [{'name': 'Work'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.category_names(), {'Work'})
+        self.assertEqual([category['name'] for category in response.data['categories']], ['Work'])
+
+
+class BulkCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        Category.objects.create(name='Existing', user=self.user)
+
+    def test_bulk_create(self):
+        items = [
+            {'title': f'Bulk {i}', 'categories': [{'name': 'Existing'}, {'name': f'New {i % 2}'}]}
+            for i in range(50)
+        ]
+        # Выборка категорий, вставка категорий, задач и связей, две версии ETag,
+        # статистика задач и категорий плюс savepoint транзакции
+        with self.assertNumQueries(10):
+            response = self.client.post('/api/tasks/bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 50)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 50)
+        self.assertEqual(Category.objects.count(), 3)
+        self.assertEqual(Task.categories.through.objects.count(), 100)
+        self.assertEqual([result['index'] for result in response.data['results']], list(range(50)))
+
+    def test_bulk_create_reports_invalid_items(self):
+        items = [{'title': 'Valid'}, {'description': 'Без заголовка'}]
+        response = self.client.post('/api/tasks/bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['results'][0]['status'], 'created')
+        self.assertEqual(response.data['results'][1]['status'], 'error')
+        self.assertIn('title', response.data['results'][1]['errors'])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_bulk_create_rejects_non_list(self):
+        response = self.client.post('/api/tasks/bulk/', {'title': 'Single'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='Task', description='x' * 10000, user=self.user)
+        sync_task_categories(self.task, ['Work'], is_new=True)
+
+    def test_list_returns_only_requested_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/?fields=id,title,completed')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'completed'})
+        # Версии для ETag и сама выборка задач
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('description', queries[1]['sql'])
+
+    def test_categories_are_prefetched_when_requested(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/tasks/?fields=title,categories')
+        self.assertEqual(response.data['results'][0]['categories'][0]['name'], 'Work')
+
+    def test_retrieve_with_fields(self):
+        response = self.client.get(f'/api/tasks/{self.task.id}/?fields=title,bogus')
+        self.assertEqual(response.data, {'title': 'Task'})
+
+    def test_without_fields_returns_everything(self):
+        response = self.client.get('/api/tasks/')
+        self.assertIn('description', response.data['results'][0])
+        self.assertIn('categories', response.data['results'][0])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='Task', user=self.user)
+
+    def test_matching_etag_returns_304_without_task_queries(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('tasks_task', queries[0]['sql'])
+
+    def test_task_write_changes_etag(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        self.client.put(f'/api/tasks/{self.task.id}/', {'title': 'New'}, format='json')
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_category_write_changes_task_and_category_etags(self):
+        task_etag = self.client.get('/api/tasks/')['ETag']
+        category_etag = self.client.get('/api/categories/')['ETag']
+        Category.objects.create(name='New', user=self.user)
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=task_etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/categories/', HTTP_IF_NONE_MATCH=category_etag).status_code,
+                         status.HTTP_200_OK)
+
+    def test_other_users_writes_keep_etag(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        other = User.objects.create_user(username='other', password='12345')
+        Task.objects.create(title='Other', user=other)
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        response = self.client.get('/api/tasks/?fields=title', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TaskCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.TASKS_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(title='Task', user=self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        self.client.get('/api/tasks/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.data['results'][0]['title'], 'Task')
+        # Остается только запрос версий для ETag
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('tasks_task', queries[0]['sql'])
+        stats = task_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_task_write_invalidates_list_and_detail(self):
+        self.client.get('/api/tasks/')
+        self.client.get(f'/api/tasks/{self.task.id}/')
+        self.client.put(f'/api/tasks/{self.task.id}/', {'title': 'New', 'categories': [{'name': 'Work'}]}, format='json')
+        self.assertEqual(self.client.get('/api/tasks/').data['results'][0]['title'], 'New')
+        detail = self.client.get(f'/api/tasks/{self.task.id}/').data
+        self.assertEqual(detail['categories'][0]['name'], 'Work')
+        self.assertGreater(task_cache.stats()['invalidations'], 0)
+
+    def test_reads_before_commit_are_not_served_after_it(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks_changed([self.user.id])
+            # Конкурентный запрос до фиксации читает старые строки и сохраняет их
+            data, key = task_cache.get(self.user.id, '/api/tasks/')
+            task_cache.set(key, {'results': 'stale'})
+        self.assertIsNone(task_cache.get(self.user.id, '/api/tasks/')[0])
+
+    def test_category_rename_invalidates_task_payloads(self):
+        sync_task_categories(self.task, ['Work'], is_new=True)
+        self.client.get('/api/tasks/')
+        Category.objects.filter(name='Work').update(name='Ignored')  # update() не отправляет сигналы
+        category = Category.objects.get(name='Ignored')
+        category.name = 'Job'
+        category.save()
+        self.assertEqual(self.client.get('/api/tasks/').data['results'][0]['categories'][0]['name'], 'Job')
+
+    def test_other_users_writes_keep_cache(self):
+        self.client.get('/api/tasks/')
+        other = User.objects.create_user(username='other', password='12345')
+        Task.objects.create(title='Other', user=other)
+        self.client.get('/api/tasks/')
+        self.assertEqual(task_cache.stats()['hits'], 1)
+
+    def test_bulk_create_invalidates_cache(self):
+        self.client.get('/api/tasks/')
+        self.client.post('/api/tasks/bulk/', [{'title': 'Bulk'}], format='json')
+        self.assertEqual(len(self.client.get('/api/tasks/').data['results']), 2)
+
+
+class AsyncTaskAPITests(TestCase):
+    def setUp(self):
+        caches[settings.TASKS_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        token = self.client.post('/api/token/', {'username': 'testuser', 'password': '12345'}, format='json').data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.task = Task.objects.create(title='Task', user=self.user)
+        sync_task_categories(self.task, ['Work'], is_new=True)
+
+    def test_list_matches_sync_api(self):
+        response = self.client.get('/api/async/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'][0]['categories'][0]['name'], 'Work')
+        self.assertIsNone(response.json()['next'])
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/async/tasks/', HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_with_fields(self):
+        response = self.client.get(f'/api/async/tasks/{self.task.id}/?fields=title')
+        self.assertEqual(response.json(), {'title': 'Task'})
+        self.assertEqual(self.client.get('/api/async/tasks/missing/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_and_update(self):
+        response = self.client.post('/api/async/tasks/', {'title': 'New', 'categories': [{'name': 'Home'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task = Task.objects.get(id=response.json()['id'])
+        self.assertEqual(task.user, self.user)
+        response = self.client.patch(f'/api/async/tasks/{task.id}/', {'completed': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['completed'])
+        self.assertEqual(response.json()['categories'][0]['name'], 'Home')
+
+    def test_invalid_data_and_missing_credentials(self):
+        response = self.client.post('/api/async/tasks/', {'due_date': 'bad'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/async/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        Task.objects.create(id='t1', title='Купить молоко', user=self.user)
+        Task.objects.create(id='t2', title='Магазин', description='Не забыть молоко и хлеб', user=self.user)
+        Task.objects.create(id='t3', title='Позвонить маме', user=self.user)
+        other = User.objects.create_user(username='other', password='12345')
+        Task.objects.create(id='t4', title='Купить молоко', user=other)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/tasks/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_full_text_search_is_ranked_and_stemmed(self):
+        results = self.search('молока').data['results']
+        # Совпадение в заголовке весит больше, чем в описании
+        self.assertEqual([task['id'] for task in results], ['t1', 't2'])
+
+    def test_typo_falls_back_to_trigram_search(self):
+        results = self.search('малоко').data['results']
+        self.assertEqual([task['id'] for task in results], ['t1'])
+
+    def test_short_query_uses_substring(self):
+        self.assertEqual({task['id'] for task in self.search('ма').data['results']}, {'t2', 't3'})
+
+    def test_cursor_pagination(self):
+        Task.objects.create(id='t5', title='Купить молоко', user=self.user)
+        ids = []
+        response = self.search('молоко', page_size=1, fields='id')
+        while True:
+            ids.extend(task['id'] for task in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(ids, ['t1', 't5', 't2'])
+
+    def test_search_vector_follows_writes(self):
+        self.client.patch('/api/tasks/t3/', {'title': 'Купить хлеб'}, format='json')
+        self.client.post('/api/tasks/bulk/', [{'title': 'Испечь хлеб'}], format='json')
+        self.assertEqual(len(self.search('хлеб').data['results']), 3)
+        Task.objects.filter(id='t1').update(completed=True)
+        self.assertEqual(self.search('молоко').data['results'][0]['id'], 't1')
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get('/api/tasks/search/').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            Task.objects.create(id=f'task{i}', title=f'Task {i}', user=self.user)
+        # Одинаковое время создания проверяет упорядочивание по id внутри одной метки
+        Task.objects.filter(id__in=['task1', 'task2']).update(created_at=Task.objects.get(id='task1').created_at)
+
+    def collect_ids(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(task['id'] for task in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_cursor_walks_all_tasks_in_order(self):
+        self.assertEqual(self.collect_ids('/api/tasks/?page_size=2'), [f'task{i}' for i in range(5)])
+
+    def test_cursor_is_stable_under_inserts(self):
+        response = self.client.get('/api/tasks/?page_size=2')
+        Task.objects.create(id='task5', title='Task 5', user=self.user)
+        ids = [task['id'] for task in response.data['results']] + self.collect_ids(response.data['next'])
+        self.assertEqual(ids, [f'task{i}' for i in range(6)])
+
+    def test_page_size_is_capped(self):
+        with patch.object(TaskCursorPagination, 'max_page_size', 3):
+            response = self.client.get('/api/tasks/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/tasks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CategoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        self.client.force_authenticate(user=self.user)
+        task = Task.objects.create(title='Task', user=self.user)
+        sync_task_categories(task, ['Work', 'home'], is_new=True)
+        sync_task_categories(Task.objects.create(title='Other', user=self.other), ['Work'], is_new=True)
+
+    def test_list_is_scoped_paginated_and_counted_in_one_query(self):
+        Category.objects.create(name='Archive', user=self.user)
+        # Версии для ETag и одна выборка категорий с количеством задач
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/categories/', {'page_size': 2})
+        self.assertEqual([(c['name'], c['task_count']) for c in response.data['results']], [('Archive', 0), ('home', 1)])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([(c['name'], c['task_count']) for c in response.data['results']], [('Work', 1)])
+        self.assertIsNone(response.data['next'])
+
+    def test_names_are_unique_per_user_ignoring_case(self):
+        task = Task.objects.create(title='Second', user=self.user)
+        sync_task_categories(task, ['WORK', 'New'], is_new=True)
+        self.assertEqual(sorted(Category.objects.filter(user=self.user).values_list('name', flat=True)),
+                         ['New', 'Work', 'home'])
+        self.assertEqual(Category.objects.filter(user=self.other).count(), 1)
+        self.client.post('/api/tasks/bulk/', [{'title': 'Bulk', 'categories': [{'name': 'new'}, {'name': 'NEW'}]}],
+                         format='json')
+        self.assertEqual(Task.objects.get(title='Bulk').categories.get().name, 'New')
+
+    def test_create_and_rename_reject_duplicates(self):
+        response = self.client.post('/api/categories/', {'name': 'work'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+        response = self.client.post('/api/categories/', {'name': 'Hobby'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Category.objects.get(id=response.data['id']).user, self.user)
+        response = self.client.put(f"/api/categories/{response.data['id']}/", {'name': 'HOME'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_categories_are_hidden(self):
+        category = Category.objects.get(user=self.other)
+        self.assertEqual(self.client.get(f'/api/categories/{category.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(f'/api/categories/{category.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Category.objects.filter(id=category.id).exists())
+
+
+class CategoryRaceTests(TransactionTestCase):
+    def test_concurrent_create_reuses_committed_category(self):
+        user = User.objects.create_user(username='testuser', password='12345')
+        other = psycopg2.connect(**connection.get_connection_params())
+        try:
+            with other.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {Category._meta.db_table} (id, user_id, name) VALUES ('race', %s, 'Race')",
+                               [user.id])
+            # Вставка ждет завершения транзакции, уже вставившей то же название
+            threading.Timer(0.3, other.commit).start()
+            categories = resolve_categories(user.id, ['race', 'Fresh'])
+        finally:
+            time.sleep(0.4)
+            other.close()
+        self.assertEqual(categories['race'].id, 'race')
+        self.assertEqual(Category.objects.filter(user=user).count(), 2)
+
+
+class FilterTests(TestCase):
+    def setUp(self):
+        caches[settings.TASKS_CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        self.tasks = {
+            'soon': Task.objects.create(id='soon', title='Soon', user=self.user, due_date=now + timedelta(days=1)),
+            'later': Task.objects.create(id='later', title='Later', user=self.user, due_date=now + timedelta(days=10)),
+            'done': Task.objects.create(id='done', title='Done', user=self.user, completed=True,
+                                        due_date=now + timedelta(days=2)),
+            'nodue': Task.objects.create(id='nodue', title='No due', user=self.user),
+        }
+        sync_task_categories(self.tasks['soon'], ['Work', 'Home'], is_new=True)
+        sync_task_categories(self.tasks['done'], ['Work'], is_new=True)
+        self.now = now
+
+    def get_ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['results']]
+
+    def test_completed_and_due_range(self):
+        week = (self.now + timedelta(days=7)).isoformat()
+        self.assertEqual(self.get_ids('/api/tasks/', completed='false', due_before=week), ['soon'])
+        self.assertEqual(self.get_ids('/api/tasks/', due_after=week), ['later'])
+
+    def test_category_filters(self):
+        work = Category.objects.get(name='Work')
+        self.assertEqual(self.get_ids('/api/tasks/', category=work.id), ['soon', 'done'])
+        self.assertEqual(self.get_ids('/api/tasks/', category_name='home', completed='false'), ['soon'])
+
+    def test_created_range(self):
+        Task.objects.filter(id='nodue').update(created_at=self.now - timedelta(days=3))
+        day_ago = (self.now - timedelta(days=1)).isoformat()
+        self.assertEqual(self.get_ids('/api/tasks/', created_before=day_ago), ['nodue'])
+        self.assertEqual(len(self.get_ids('/api/tasks/', created_after=day_ago)), 3)
+
+    def test_ordering_by_due_date_paginates_with_nulls(self):
+        expected = {
+            'due_date': ['soon', 'done', 'later', 'nodue'],
+            '-due_date': ['nodue', 'later', 'done', 'soon'],
+            '-created_at': ['nodue', 'done', 'later', 'soon'],
+        }
+        for ordering, ids in expected.items():
+            url, collected = f'/api/tasks/?ordering={ordering}&page_size=1&fields=id', []
+            while url:
+                response = self.client.get(url)
+                collected.extend(task['id'] for task in response.data['results'])
+                url = response.data['next']
+            self.assertEqual(collected, ids, ordering)
+
+    def test_invalid_parameters(self):
+        for params in ({'ordering': 'title'}, {'completed': 'maybe'}, {'due_before': 'tomorrow'}):
+            self.assertEqual(self.client.get('/api/tasks/', params).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_async_list_and_search_use_filters(self):
+        self.assertEqual(self.get_ids('/api/tasks/search/', q='Soon', completed='true'), [])
+        token = self.client.post('/api/token/', {'username': 'testuser', 'password': '12345'}, format='json').data['access']
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.get('/api/async/tasks/', {'completed': 'true'})
+        self.assertEqual([task['id'] for task in response.json()['results']], ['done'])
+        self.assertEqual(client.get('/api/async/tasks/', {'ordering': 'title'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class TaskStatsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+    def create(self, title, categories=(), **data):
+        response = self.client.post('/api/tasks/', {'title': title, 'categories': [{'name': name} for name in categories],
+                                                    **data}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def assert_consistent(self):
+        # Инкрементальные счетчики совпадают с полным пересчетом
+        self.assertEqual(reconcile_task_stats(), (0, 0))
+
+    def test_counts_follow_api_writes(self):
+        first = self.create('First', ['Work', 'Home'])
+        self.create('Second', ['Work'], due_date=(timezone.now() - timedelta(days=1)).isoformat())
+        self.client.patch(f'/api/tasks/{first}/', {'completed': True, 'categories': [{'name': 'Home'}]}, format='json')
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/tasks/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({key: response.data[key] for key in ('open', 'completed', 'overdue', 'total')},
+                         {'open': 1, 'completed': 1, 'overdue': 1, 'total': 2})
+        self.assertEqual([(c['name'], c['count']) for c in response.data['categories']], [('Home', 1), ('Work', 1)])
+        self.assert_consistent()
+
+        self.client.delete(f'/api/tasks/{first}/')
+        self.assertEqual(get_task_stats(self.user.id)['categories'][0]['name'], 'Work')
+        self.assert_consistent()
+
+    def test_bulk_create_sweeper_and_reverse_links(self):
+        self.client.post('/api/tasks/bulk/', [{'title': f'Bulk {i}', 'completed': i % 2 == 0, 'categories': [{'name': 'Work'}]}
+                                              for i in range(4)], format='json')
+        self.assert_consistent()
+        delete_completed_tasks.now()
+        self.assertEqual(get_task_stats(self.user.id)['completed'], 0)
+        self.assert_consistent()
+
+        category = Category.objects.get(name='Work')
+        task = Task.objects.create(title='Reverse', user=self.user)
+        category.tasks.add(task)
+        category.tasks.remove(task, Task.objects.exclude(id=task.id).first())
+        self.assert_consistent()
+        category.tasks.clear()
+        self.assertEqual(get_task_stats(self.user.id)['categories'], [])
+        self.assert_consistent()
+
+    def test_reconcile_fixes_writes_without_signals(self):
+        task_id = self.create('Task', ['Work'])
+        Task.objects.filter(id=task_id).update(completed=True)
+        self.assertEqual(reconcile_task_stats(), (1, 0))
+        self.assertEqual(get_task_stats(self.user.id)['completed'], 1)
+
+    @override_settings(TASK_STATS_RECONCILE_BATCH_SIZE=1)
+    def test_reconcile_in_user_ranges(self):
+        other = User.objects.create_user(username='other', password='password')
+        task_id = self.create('Task', ['Work'])
+        Task.objects.create(title='Other', user=other)
+        TaskStats.objects.filter(user=other).delete()
+        CategoryTaskStats.objects.filter(user=self.user).update(task_count=5)
+        Task.objects.filter(id=task_id).update(completed=True)
+        self.assertEqual(reconcile_task_stats(), (2, 1))
+        self.assert_consistent()
+        self.assertEqual(reconcile_task_stats(), (0, 0))
+
+    def test_user_deletion(self):
+        self.create('Task', ['Work'])
+        self.user.delete()
+        self.assertFalse(CategoryTaskStats.objects.exists())
+
+
+class TaskChangesTests(TransactionTestCase):
+    # Журнал выдает только изменения завершенных транзакций, поэтому тесты не оборачиваются в транзакцию
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+        self.cursor = self.client.get('/api/tasks/changes/').data['cursor']
+
+    def changes(self, cursor=None, **params):
+        response = self.client.get('/api/tasks/changes/', {'since': cursor or self.cursor, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_changed_and_deleted_tasks(self):
+        kept = self.client.post('/api/tasks/', {'title': 'Kept', 'categories': []}, format='json').data['id']
+        removed = self.client.post('/api/tasks/', {'title': 'Removed', 'categories': []}, format='json').data['id']
+        self.client.patch(f'/api/tasks/{kept}/', {'title': 'Kept 2'}, format='json')
+        self.client.delete(f'/api/tasks/{removed}/')
+        other = User.objects.create_user(username='other', password='12345')
+        Task.objects.create(title='Other', user=other)
+
+        data = self.changes()
+        self.assertEqual([task['title'] for task in data['changed']], ['Kept 2'])
+        self.assertEqual(data['deleted'], [removed])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.changes(data['cursor'])['changed'], [])
+
+        sync_task_categories(Task.objects.get(id=kept), ['Work'], is_new=True)
+        self.assertEqual(self.changes(data['cursor'])['changed'][0]['categories'][0]['name'], 'Work')
+
+    def test_bulk_writes_and_sweeper_deletions(self):
+        self.client.post('/api/tasks/bulk/', [{'title': f'Bulk {i}', 'completed': True} for i in range(3)], format='json')
+        first = self.changes(limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(first['changed']) + len(self.changes(first['cursor'])['changed']), 3)
+
+        cursor = self.changes()['cursor']
+        delete_completed_tasks.now()
+        self.assertEqual(len(self.changes(cursor)['deleted']), 3)
+
+    def test_late_commit_is_not_skipped(self):
+        other = psycopg2.connect(**connection.get_connection_params())
+        try:
+            with other.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {Task._meta.db_table} (id, title, description, created_at, completed, user_id) "
+                               f"VALUES ('late', 'Late', '', now(), false, %s)", [self.user.id])
+            Task.objects.create(title='Early', user=self.user)
+            # Транзакция со вставкой 'late' началась раньше, но еще не зафиксирована
+            data = self.changes()
+            other.commit()
+        finally:
+            other.close()
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(sorted(task['title'] for task in self.changes(data['cursor'])['changed']), ['Early', 'Late'])
+
+    def test_category_rename_changes_its_tasks(self):
+        task = Task.objects.create(title='Task', user=self.user)
+        sync_task_categories(task, ['Work'], is_new=True)
+        cursor = self.changes()['cursor']
+        self.client.put(f"/api/categories/{task.categories.get().id}/", {'name': 'Job'}, format='json')
+        self.assertEqual(self.changes(cursor)['changed'][0]['categories'][0]['name'], 'Job')
+
+    @override_settings(TASK_CHANGES_RETENTION=-1)
+    def test_expired_and_invalid_cursor(self):
+        Task.objects.create(title='Task', user=self.user)
+        prune_task_changes()
+        self.assertEqual(self.client.get('/api/tasks/changes/', {'since': self.cursor}).status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.client.get('/api/tasks/changes/', {'since': 'bad'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(TASK_EVENTS_REDIS_URL=None, TASK_STREAM_RETRY_DELAY=0.05)
+class TaskStreamTests(TransactionTestCase):
+    # Поток читает журнал изменений из других потоков, поэтому тесты не оборачиваются в транзакцию
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.token = str(AccessToken.for_user(self.user))
+
+    async def open_stream(self, query):
+        messages = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        scope = {'type': 'http', 'method': 'GET', 'path': TASK_STREAM_PATH, 'query_string': query.encode(), 'headers': []}
+        app = asyncio.ensure_future(task_event_stream(scope, receive, messages.put))
+        return app, messages, disconnected
+
+    async def write(self, func, *args, **kwargs):
+        def run():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Соединение потока иначе помешает удалить тестовую базу
+                connection.close()
+
+        return await sync_to_async(run)()
+
+    async def next_event(self, messages):
+        while True:
+            message = await asyncio.wait_for(messages.get(), 5)
+            if message.get('body', b'').startswith((b'id:', b'event:')):
+                return message['body'].decode()
+
+    def test_hub_coalesces_notifications(self):
+        async def scenario():
+            subscription = task_events.subscribe(self.user.id)
+            task_events.dispatch([self.user.id])
+            task_events.dispatch([self.user.id, self.user.id + 1])
+            self.assertTrue(await subscription.wait(1))
+            self.assertFalse(await subscription.wait(0.01))
+            task_events.unsubscribe(subscription)
+            self.assertEqual(task_events.count(self.user.id), 0)
+
+        asyncio.run(scenario())
+
+    def test_stream_pushes_committed_changes(self):
+        async def scenario():
+            app, messages, disconnected = await self.open_stream(f'token={self.token}')
+            self.assertEqual((await messages.get())['status'], status.HTTP_200_OK)
+            self.assertIn('event: ready', await self.next_event(messages))
+            task = await self.write(Task.objects.create, title='Pushed', user=self.user)
+            event = await self.next_event(messages)
+            self.assertIn('event: changes', event)
+            self.assertIn('"Pushed"', event)
+            task_id = task.id
+            await self.write(task.delete)
+            self.assertIn(f'"deleted":["{task_id}"]', await self.next_event(messages))
+            disconnected.set()
+            await asyncio.wait_for(app, 5)
+            self.assertEqual(task_events.count(self.user.id), 0)
+
+        asyncio.run(scenario())
+
+    def test_stream_resumes_from_cursor(self):
+        async def scenario():
+            app, messages, disconnected = await self.open_stream(f'token={self.token}')
+            await messages.get()
+            cursor = (await self.next_event(messages)).split('\n')[0][len('id: '):]
+            disconnected.set()
+            await app
+            # Задача создана, пока клиент был отключен
+            await self.write(Task.objects.create, title='Missed', user=self.user)
+            app, messages, disconnected = await self.open_stream(f'token={self.token}&since={cursor}')
+            await messages.get()
+            await self.next_event(messages)
+            self.assertIn('"Missed"', await self.next_event(messages))
+            disconnected.set()
+            await app
+
+        asyncio.run(scenario())
+
+    def test_rejects_invalid_token_and_cursor(self):
+        async def scenario():
+            app, messages, _ = await self.open_stream('token=bad')
+            await app
+            self.assertEqual((await messages.get())['status'], status.HTTP_401_UNAUTHORIZED)
+            app, messages, _ = await self.open_stream(f'token={self.token}&since=bad')
+            await app
+            await messages.get()
+            self.assertIn('event: reset', await self.next_event(messages))
+
+        asyncio.run(scenario())
+
+    def test_stream_open_is_throttled(self):
+        async def scenario():
+            with patch('tasks.throttling.limiter.consume', return_value=(False, 12.5)) as consume:
+                app, messages, _ = await self.open_stream(f'token={self.token}')
+                await app
+            self.assertEqual(consume.call_args[0][0], f'throttle_user_{self.user.pk}')
+            start = await messages.get()
+            self.assertEqual(start['status'], status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn((b'retry-after', b'13'), start['headers'])
+            self.assertEqual(task_events.count(self.user.id), 0)
+
+        asyncio.run(scenario())
+
+
+@override_settings(SWEEP_BATCH_SIZE=2)
+class SweeperTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        for i in range(5):
+            task = Task.objects.create(id=f'done{i}', title=f'Done {i}', user=self.user, completed=True)
+            sync_task_categories(task, ['Work'], is_new=True)
+        Task.objects.create(id='open', title='Open', user=self.user)
+        Task.objects.create(id='overdue', title='Overdue', user=self.user, due_date=timezone.now() - timedelta(days=1))
+
+    @override_settings(TIME_COMPLETED_TASK_ARCHIVE=False)
+    def test_delete_completed_tasks_in_batches(self):
+        delete_completed_tasks.now()
+        self.assertEqual(set(Task.objects.values_list('id', flat=True)), {'open', 'overdue'})
+        self.assertEqual(Task.categories.through.objects.count(), 0)
+        self.assertEqual(set(CommentCleanupOutbox.objects.values_list('task_id', flat=True)),
+                         {f'done{i}' for i in range(5)})
+
+    @override_settings(SWEEP_TIME_BUDGET=0)
+    def test_sweep_resumes_from_cursor(self):
+        remaining = []
+        for _ in range(3):
+            delete_completed_tasks.now()
+            remaining.append(Task.objects.filter(completed=True).count())
+            # Курсор хранится в базе и не зависит от локального кэша процесса
+            cache.clear()
+        self.assertEqual(remaining, [3, 1, 0])
+        self.assertEqual(SweepCursor.objects.get(name='archive_completed').last_id, 'done4')
+
+    def test_mark_overdue_tasks(self):
+        mark_overdue_tasks.now()
+        self.assertFalse(Task.objects.filter(id='overdue').exists())
+        self.assertTrue(Task.objects.filter(id='open').exists())
+        self.assertEqual(Task.objects.filter(completed=True).count(), 5)
+
+    @override_settings(SWEEP_TIME_BUDGET=0)
+    def test_expire_resumes_from_cursor(self):
+        now = timezone.now()
+        for i in range(3):
+            Task.objects.create(id=f'late{i}', title=f'Late {i}', user=self.user, due_date=now - timedelta(hours=i + 1))
+        remaining = []
+        for _ in range(3):
+            expire_due_tasks(now)
+            remaining.append(Task.objects.filter(completed=False, due_date__lte=now).count())
+        self.assertEqual(remaining, [2, 0, 0])
+        self.assertEqual(SweepCursor.objects.get(name='expire_due').last_id, '')
+        self.assertTrue(Task.objects.filter(id='open').exists())
+
+
+class BackgroundTaskInitTests(TestCase):
+    def test_initialization_is_idempotent(self):
+        initialize_background_tasks()
+        names = list(BackgroundTask.objects.values_list('task_name', flat=True))
+        self.assertEqual(len(names), 5)
+        self.assertEqual(len(set(names)), 5)
+        job = BackgroundTask.objects.get(task_name=delete_completed_tasks.name)
+        delete_completed_tasks(repeat=1)
+
+        with override_settings(TIME_COMPLETED_TASK_INTERVAL=42):
+            initialize_background_tasks()
+        self.assertEqual(BackgroundTask.objects.count(), 5)
+        rescheduled = BackgroundTask.objects.get(task_name=delete_completed_tasks.name)
+        self.assertEqual((rescheduled.id, rescheduled.run_at, rescheduled.repeat), (job.id, job.run_at, 42))
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_completed_at_follows_completed(self):
+        task = Task.objects.create(title='Task', user=self.user)
+        self.assertIsNone(Task.objects.get(id=task.id).completed_at)
+        Task.objects.filter(id=task.id).update(completed=True)
+        completed_at = Task.objects.get(id=task.id).completed_at
+        self.assertIsNotNone(completed_at)
+        task = Task.objects.get(id=task.id)
+        task.title = 'Renamed'
+        task.save()
+        self.assertEqual(Task.objects.get(id=task.id).completed_at, completed_at)
+        Task.objects.filter(id=task.id).update(completed=False)
+        self.assertIsNone(Task.objects.get(id=task.id).completed_at)
+
+    def test_completed_tasks_move_to_archive(self):
+        done = Task.objects.create(title='Done', user=self.user, completed=True)
+        sync_task_categories(done, ['Work', 'home'], is_new=True)
+        Task.objects.create(title='Open', user=self.user)
+        delete_completed_tasks.now()
+
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['Open'])
+        archived = ArchivedTask.objects.get(id=done.id)
+        self.assertEqual((archived.title, archived.categories), ('Done', ['home', 'Work']))
+        self.assertFalse(CommentCleanupOutbox.objects.exists())
+        self.assertEqual(get_task_stats(self.user.id)['completed'], 0)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL",
+                           [f"{ArchivedTask._meta.db_table}_{archived.completed_at:%Y_%m}"])
+            self.assertTrue(cursor.fetchone()[0])
+
+    def test_archive_endpoint(self):
+        other = User.objects.create_user(username='other', password='12345')
+        for index in range(3):
+            Task.objects.create(title=f'Done {index}', user=self.user, completed=True)
+        Task.objects.create(title='Foreign', user=other, completed=True)
+        delete_completed_tasks.now()
+
+        response = self.client.get('/api/tasks/archive/', {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [item['title'] for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        titles += [item['title'] for item in response.data['results']]
+        self.assertEqual(titles, ['Done 2', 'Done 1', 'Done 0'])
+        self.assertIsNone(response.data['next'])
+
+        month = timezone.now().strftime('%Y-%m')
+        self.assertEqual(len(self.client.get('/api/tasks/archive/', {'month': month}).data['results']), 3)
+        self.assertEqual(self.client.get('/api/tasks/archive/', {'month': '2000-01'}).data['results'], [])
+        self.assertEqual(self.client.get('/api/tasks/archive/', {'month': 'May'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post('/api/tasks/archive/').status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        other.delete()
+        self.assertEqual(ArchivedTask.objects.count(), 3)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tasks = [Task.objects.create(title=f'Task {index}', user=self.user, completed=index == 1)
+                      for index in range(5)]
+        sync_task_categories(self.tasks[0], ['Work', 'home'], is_new=True)
+        Task.objects.create(title='Foreign', user=User.objects.create_user(username='other', password='12345'))
+
+    @override_settings(TASK_EXPORT_CHUNK_SIZE=2)
+    def test_export_ndjson_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/export/', {'format': 'ndjson'})
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.is_async)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        self.assertEqual(rows[0], dict(TaskCreateSerializer(self.tasks[0]).data))
+        self.assertEqual([row['title'] for row in rows], [task.title for task in self.tasks])
+        # Три пачки задач по два запроса (задачи и их категории)
+        self.assertEqual(len([query for query in queries.captured_queries
+                              if 'tasks_task' in query['sql'] and 'auth_user' not in query['sql']]), 6)
+
+    def test_export_csv_with_filters(self):
+        response = self.client.get('/api/tasks/export/', {'format': 'csv', 'completed': 'false'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="tasks.csv"')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual([row['title'] for row in rows], ['Task 0', 'Task 2', 'Task 3', 'Task 4'])
+        self.assertEqual(rows[0]['categories'], 'Work; home')
+        self.assertEqual(self.client.get('/api/tasks/export/', {'format': 'csv', 'completed': 'maybe'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/tasks/export/', {'format': 'xml'}).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+
+class AsyncExportTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        for index in range(5):
+            Task.objects.create(title=f'Task {index}', user=self.user)
+
+    @override_settings(TASK_EXPORT_CHUNK_SIZE=2)
+    async def test_export_streams_under_asgi(self):
+        token = str(AccessToken.for_user(self.user))
+        response = await AsyncClient().get('/api/tasks/export/', {'format': 'ndjson'},
+                                           headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)['title'] for line in body.decode('utf-8').splitlines()],
+                         [f'Task {index}' for index in range(5)])
+
+
+class DeadlineSchedulerTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    def test_expire_due_tasks_deletes_only_expired(self):
+        now = timezone.now()
+        Task.objects.create(id='expired', title='Expired', user=self.user, due_date=now - timedelta(minutes=1))
+        Task.objects.create(id='future', title='Future', user=self.user, due_date=now + timedelta(hours=1))
+        Task.objects.create(id='done', title='Done', user=self.user, completed=True, due_date=now - timedelta(minutes=1))
+        self.assertEqual(expire_due_tasks(now), 1)
+        self.assertEqual(set(Task.objects.values_list('id', flat=True)), {'future', 'done'})
+        self.assertEqual(list(CommentCleanupOutbox.objects.values_list('task_id', flat=True)), ['expired'])
+
+    def test_heap_window_and_horizon(self):
+        base = timezone.now()
+        heap = DeadlineHeap()
+        heap.load([base + timedelta(seconds=i) for i in (1, 2, 3)], window=3)
+        self.assertEqual(heap.horizon, (base + timedelta(seconds=3)).timestamp())
+        heap.push((base + timedelta(seconds=10)).timestamp())
+        heap.push(base.timestamp())
+        self.assertEqual(heap.next_wake(), base.timestamp())
+        self.assertEqual(heap.pop_due((base + timedelta(seconds=1)).timestamp()), 2)
+        self.assertFalse(heap.needs_reload((base + timedelta(seconds=2)).timestamp()))
+        self.assertTrue(heap.needs_reload((base + timedelta(seconds=3)).timestamp()))
+
+    def test_trigger_notifies_on_commit(self):
+        listener = psycopg2.connect(**connection.get_connection_params())
+        listener.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with listener.cursor() as cursor:
+                cursor.execute(f"LISTEN {settings.DEADLINE_CHANNEL}")
+            due = timezone.now() + timedelta(hours=1)
+            Task.objects.create(title='Due', user=self.user, due_date=due)
+            Task.objects.create(title='No due', user=self.user)
+            listener.poll()
+            self.assertEqual([float(notify.payload) for notify in listener.notifies], [due.timestamp()])
+        finally:
+            listener.close()
+
+    def test_scheduler_expires_task_at_deadline(self):
+        scheduler = DeadlineScheduler()
+        thread = threading.Thread(target=scheduler.run)
+        thread.start()
+        try:
+            Task.objects.create(id='later', title='Later', user=self.user, due_date=timezone.now() + timedelta(hours=1))
+            due = timezone.now() + timedelta(seconds=0.5)
+            Task.objects.create(id='soon', title='Soon', user=self.user, due_date=due)
+            while Task.objects.filter(id='soon').exists() and timezone.now() < due + timedelta(seconds=5):
+                time.sleep(0.05)
+            self.assertFalse(Task.objects.filter(id='soon').exists())
+            self.assertGreaterEqual(timezone.now(), due)
+            self.assertTrue(Task.objects.filter(id='later').exists())
+        finally:
+            scheduler.stop()
+            thread.join()
+
+
+@patch.dict('os.environ', {'API_USERNAME_TODO': 'service', 'API_PASSWORD_TODO': 'service-password'})
+class ServiceTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='service', password='service-password')
+        self.provider = ServiceTokenProvider()
+
+    def test_token_is_minted_once(self):
+        with patch('django.contrib.auth.authenticate', return_value=self.user) as mock_authenticate:
+            tokens = {self.provider.get_token() for _ in range(10)}
+        self.assertEqual(len(tokens), 1)
+        mock_authenticate.assert_called_once()
+        self.assertEqual(self.provider.stats(), {'hits': 9, 'misses': 1})
+
+    def test_token_is_refreshed_before_expiry(self):
+        self.provider.get_token()
+        lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+        with patch('tasks.service_auth.time.time', return_value=time.time() + lifetime - 30):
+            self.provider.get_token()
+        self.assertEqual(self.provider.stats(), {'hits': 0, 'misses': 2})
+
+    def test_concurrent_callers_share_one_refresh(self):
+        with patch('django.contrib.auth.authenticate', return_value=self.user) as mock_authenticate:
+            threads = [threading.Thread(target=self.provider.get_token) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        mock_authenticate.assert_called_once()
+        self.assertEqual(self.provider.stats(), {'hits': 7, 'misses': 1})
+
+    def test_invalid_credentials(self):
+        with patch.dict('os.environ', {'API_PASSWORD_TODO': 'wrong'}):
+            with self.assertRaises(ValueError):
+                self.provider.get_token()
+
+
+@override_settings(OUTBOX_BATCH_SIZE=2)
+@patch('tasks.task_management.get_auth_token', return_value='token')
+@patch('tasks.task_management.requests.post')
+class CommentOutboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+    def test_destroy_writes_outbox_without_calling_service(self, mock_post, mock_token):
+        task = Task.objects.create(title='To Be Deleted', user=self.user)
+        response = self.client.delete(f'/api/tasks/{task.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(list(CommentCleanupOutbox.objects.values_list('task_id', flat=True)), [task.id])
+        mock_post.assert_not_called()
+
+    def test_drain_sends_one_request_per_batch(self, mock_post, mock_token):
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {'deleted': 1}
+        CommentCleanupOutbox.objects.bulk_create([CommentCleanupOutbox(task_id=f'task{i}') for i in range(5)])
+        drain_comment_outbox.now()
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(mock_post.call_args_list[0].kwargs['json'], {'task_ids': ['task0', 'task1']})
+        self.assertFalse(CommentCleanupOutbox.objects.exists())
+
+    def test_drain_backs_off_on_failure(self, mock_post, mock_token):
+        mock_post.side_effect = requests.ConnectionError('down')
+        CommentCleanupOutbox.objects.bulk_create([CommentCleanupOutbox(task_id=f'task{i}') for i in range(3)])
+        drain_comment_outbox.now()
+        self.assertEqual(mock_post.call_count, 1)
+        failed = CommentCleanupOutbox.objects.filter(attempts=1)
+        self.assertEqual(failed.count(), 2)
+        self.assertTrue(all(entry.next_attempt_at > timezone.now() for entry in failed))
+
+        # Отложенные записи не берутся повторно до наступления срока
+        mock_post.side_effect = None
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {'deleted': 0}
+        drain_comment_outbox.now()
+        self.assertEqual(set(CommentCleanupOutbox.objects.values_list('task_id', flat=True)), {'task0', 'task1'})
+
+    def test_service_is_called_after_claim_commits(self, mock_post, mock_token):
+        CommentCleanupOutbox.objects.bulk_create([CommentCleanupOutbox(task_id=f'task{i}') for i in range(2)])
+        depth = len(connection.atomic_blocks)
+        seen = {}
+
+        def bulk_delete(*args, **kwargs):
+            seen['depth'] = len(connection.atomic_blocks)
+            seen['claimed'] = all(entry.next_attempt_at > timezone.now()
+                                  for entry in CommentCleanupOutbox.objects.all())
+            response = Mock(status_code=200)
+            response.json.return_value = {'deleted': 2}
+            return response
+
+        mock_post.side_effect = bulk_delete
+        drain_comment_outbox.now()
+        self.assertEqual(seen, {'depth': depth, 'claimed': True})
+        self.assertFalse(CommentCleanupOutbox.objects.exists())
+
+    def test_retry_delay_grows_and_is_capped(self, mock_post, mock_token):
+        delays = [get_retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 20)]
+        self.assertEqual(delays[:3], [settings.OUTBOX_RETRY_BASE_DELAY * factor for factor in (1, 2, 4)])
+        self.assertEqual(delays[3], settings.OUTBOX_RETRY_MAX_DELAY)
+
+
+class ConnectionPoolTests(TestCase):
+    def setUp(self):
+        self.pools = []
+
+    def tearDown(self):
+        for pool in self.pools:
+            pool.close()
+
+    def make_pool(self, **kwargs):
+        options = {'min_size': 0, 'max_size': 1, 'timeout': 0.05, 'max_lifetime': 0, 'health_check': True}
+        options.update(kwargs)
+        pool = ConnectionPool('test', lambda: psycopg2.connect(**connection.get_connection_params()), **options)
+        pool.fill()
+        self.pools.append(pool)
+        return pool
+
+    def test_connections_are_reused(self):
+        pool = self.make_pool(min_size=1)
+        first = pool.getconn()
+        pool.putconn(first)
+        self.assertIs(pool.getconn(), first)
+        stats = pool.stats()
+        self.assertEqual((stats['size'], stats['checked_out'], stats['checkouts']), (1, 1, 2))
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.make_pool()
+        pool.getconn()
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.getconn()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiting_thread_gets_released_connection(self):
+        pool = self.make_pool(timeout=5)
+        held = pool.getconn()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pool.getconn()))
+        waiter.start()
+        while pool.stats()['waiting'] == 0:
+            time.sleep(0.001)
+        pool.putconn(held)
+        waiter.join()
+        self.assertIs(result[0], held)
+        self.assertGreater(pool.stats()['wait_time_max'], 0)
+
+    def test_broken_and_expired_connections_are_replaced(self):
+        pool = self.make_pool()
+        broken = pool.getconn()
+        pool.putconn(broken)
+        broken.close()
+        self.assertIsNot(pool.getconn(), broken)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+        pool = self.make_pool(max_lifetime=0.01)
+        old = pool.getconn()
+        time.sleep(0.02)
+        pool.putconn(old)
+        self.assertIsNot(pool.getconn(), old)
+
+    def test_session_state_is_reset_on_release(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute("SET statement_timeout = 1234")
+            cursor.execute("CREATE TEMP TABLE pool_leftover (id int)")
+        pool.putconn(conn)
+        conn = pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            self.assertEqual(cursor.fetchone()[0], '0')
+            cursor.execute("SELECT to_regclass('pool_leftover')")
+            self.assertIsNone(cursor.fetchone()[0])
+        pool.putconn(conn)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='user', password='12345'))
+        self.assertEqual(client.get('/api/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+        client.force_authenticate(user=User.objects.create_superuser(username='admin', password='admin'))
+        response = client.get('/api/metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db_pool', response.data)
+
+
 class AuthenticationTests(TestCase):
     def setUp(self):
+        caches[settings.AUTH_USER_CACHE_ALIAS].clear()
         self.client = APIClient()
         self.user = User.objects.create_user(username='testuser', password='12345')
         self.login_data = {
@@ -115,6 +1356,41 @@ class AuthenticationTests(TestCase):
         response = self.client.get('/api/tasks/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def authenticate(self, username='testuser', password='12345'):
+        token = self.client.post('/api/token/', {'username': username, 'password': password}, format='json').data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_cached_user_skips_user_query(self):
+        self.authenticate()
+        self.client.get('/api/tasks/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/?fields=title')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('auth_user' in query['sql'] for query in queries))
+
+    def test_created_task_is_bound_to_token_user(self):
+        self.authenticate()
+        response = self.client.post('/api/tasks/', {'title': 'Task'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Task.objects.get(title='Task').user, self.user)
+
+    def test_user_update_via_viewset_invalidates_cache(self):
+        User.objects.create_superuser(username='admin', password='admin', is_staff=True)
+        self.authenticate()
+        self.client.get('/api/tasks/')
+        admin_client = APIClient()
+        admin_token = admin_client.post('/api/token/', {'username': 'admin', 'password': 'admin'}, format='json').data['access']
+        admin_client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_token}')
+        response = admin_client.patch(f'/api/users/{self.user.id}/', {'is_active': False}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.authenticate()
+        self.client.get('/api/tasks/')
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+
 
 class ThrottlingTests(TestCase):
     def setUp(self):
@@ -128,4 +1404,72 @@ class ThrottlingTests(TestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         response = self.client.get('/api/tasks/')
-        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_SERVICE_USERNAMES=['bot'])
+    def test_service_user_has_separate_bucket(self):
+        bot = User.objects.create_user(username='bot', password='12345')
+        self.client.force_authenticate(user=bot)
+        for _ in range(20):
+            response = self.client.get('/api/tasks/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_local_bucket_refills(self):
+        bucket = LocalTokenBucket(max_keys=10)
+        with patch('tasks.throttling.time.monotonic', return_value=100.0):
+            self.assertEqual([bucket.consume('key', 2, 1.0)[0] for _ in range(3)], [True, True, False])
+        with patch('tasks.throttling.time.monotonic', return_value=101.0):
+            self.assertTrue(bucket.consume('key', 2, 1.0)[0])
+            allowed, wait = bucket.consume('key', 2, 1.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 1.0)
+
+    @override_settings(THROTTLE_REDIS_URL='redis://127.0.0.1:1/0')
+    def test_unavailable_redis_falls_back_to_local_bucket(self):
+        limiter = TokenBucketLimiter()
+        self.assertEqual([limiter.consume('key', 1, 0.1)[0] for _ in range(2)], [True, False])
+
+
+class WorkerPoolTests(TransactionTestCase):
+    def setUp(self):
+        job_runs.clear()
+        job_state.update(running=0, max_running=0)
+
+    def run_pool(self, pool, jobs):
+        pool.start()
+        self.wait_pool(pool, jobs)
+
+    def wait_pool(self, pool, jobs):
+        deadline = time.monotonic() + 10
+        while pool.processed < jobs and time.monotonic() < deadline:
+            time.sleep(0.02)
+        pool.stop()
+        pool.join()
+
+    def test_each_job_runs_once(self):
+        for index in range(20):
+            record_job(index, queue='test')
+        self.run_pool(WorkerPool(4, ['test'], queue_limits={}), 20)
+        self.assertEqual(sorted(job_runs), list(range(20)))
+        self.assertFalse(BackgroundTask.objects.filter(queue='test').exists())
+
+    def test_queue_limit(self):
+        for index in range(4):
+            record_job(index, 0.1, queue='limited')
+        self.run_pool(WorkerPool(4, ['limited'], queue_limits={'limited': 1}), 4)
+        self.assertEqual(sorted(job_runs), list(range(4)))
+        self.assertEqual(job_state['max_running'], 1)
+
+    @override_settings(MAX_RUN_TIME=0.6)
+    def test_lease_is_renewed_while_job_runs(self):
+        record_job('long', 1.5, queue='test')
+        pool = WorkerPool(1, ['test'], queue_limits={})
+        pool.start()
+        time.sleep(1.2)
+        other = WorkerPool(1, ['test'], queue_limits={})
+        other.worker_id = 'other'
+        self.assertIsNone(other.claim())
+        connection.close()
+        self.wait_pool(pool, 1)
+        self.assertEqual(job_runs, ['long'])
+
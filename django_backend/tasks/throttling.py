@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import redis
+from django.conf import settings
+from rest_framework.request import Request
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = settings.LOGGER.get_logger('throttling')
+
+# Token bucket: емкость capacity, пополнение rate токенов в секунду. Время берется
+# из Redis (TIME), поэтому часы процессов не влияют на результат. Возвращает
+# признак разрешения и время ожидания в секундах строкой (Lua обрезает дробные числа).
+TOKEN_BUCKET_SCRIPT: str = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+
+class LocalTokenBucket:
+    """
+    Token bucket в памяти процесса.
+
+    Используется, если Redis не настроен или недоступен. Лимит в этом случае
+    действует для каждого процесса отдельно. Число хранимых ключей ограничено,
+    самые давно использованные вытесняются.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys: int = max_keys
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        """
+        Забирает один токен из корзины.
+
+        Args:
+            key (str): Ключ корзины.
+            capacity (int): Емкость корзины.
+            rate (float): Скорость пополнения, токенов в секунду.
+
+        Returns:
+            Tuple[bool, float]: Разрешен ли запрос и сколько секунд ждать, если нет.
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            allowed: bool = tokens >= 1
+            wait: float = 0.0
+            if allowed:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+class TokenBucketLimiter:
+    """
+    Лимитер на основе token bucket с общим для всех процессов состоянием в Redis.
+
+    Проверка выполняется одним атомарным Lua-скриптом (один сетевой вызов).
+    Если THROTTLE_REDIS_URL не задан или Redis недоступен, используется
+    LocalTokenBucket. После ошибки Redis не опрашивается
+    THROTTLE_REDIS_RETRY_INTERVAL секунд, чтобы запросы не ждали таймаута.
+    """
+
+    def __init__(self) -> None:
+        self.local: LocalTokenBucket = LocalTokenBucket(settings.THROTTLE_LOCAL_MAX_KEYS)
+        self._script: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._redis_disabled_until: float = 0.0
+
+    def get_script(self) -> Optional[Any]:
+        """
+        Возвращает зарегистрированный Lua-скрипт или None, если Redis не настроен.
+        """
+        if self._script is None and settings.THROTTLE_REDIS_URL:
+            with self._lock:
+                if self._script is None:
+                    client = redis.Redis.from_url(settings.THROTTLE_REDIS_URL,
+                                                  socket_timeout=settings.THROTTLE_REDIS_TIMEOUT,
+                                                  socket_connect_timeout=settings.THROTTLE_REDIS_TIMEOUT)
+                    self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    def consume(self, key: str, capacity: int, rate: float) -> Tuple[bool, float]:
+        """
+        Забирает один токен из корзины.
+
+        Args:
+            key (str): Ключ корзины.
+            capacity (int): Емкость корзины.
+            rate (float): Скорость пополнения, токенов в секунду.
+
+        Returns:
+            Tuple[bool, float]: Разрешен ли запрос и сколько секунд ждать, если нет.
+        """
+        script = self.get_script() if time.monotonic() >= self._redis_disabled_until else None
+        if script is not None:
+            try:
+                allowed, wait = script(keys=[key], args=[capacity, rate])
+                return bool(allowed), float(wait)
+            except redis.RedisError as e:
+                self._redis_disabled_until = time.monotonic() + settings.THROTTLE_REDIS_RETRY_INTERVAL
+                logger.warning(f"Redis недоступен для ограничения запросов, используется локальный лимитер: {e}")
+        return self.local.consume(key, capacity, rate)
+
+
+limiter = TokenBucketLimiter()
+
+
+def is_service_user(user: Any) -> bool:
+    """
+    Проверяет, является ли пользователь сервисной учетной записью (бот, микросервисы).
+    """
+    return bool(user and user.is_authenticated and user.username in settings.THROTTLE_SERVICE_USERNAMES)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Базовый throttle с token bucket вместо истории запросов в кэше.
+
+    Скорость задается как в DRF ('15/minute'): емкость корзины равна числу
+    запросов, а за период корзина пополняется полностью.
+    """
+
+    def allow_request(self, request: Request, view: Any) -> bool:
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.wait_time = limiter.consume(self.key, self.num_requests, self.num_requests / self.duration)
+        if not allowed:
+            logger.warning(f"Превышен лимит запросов {self.scope} для ключа {self.key}")
+        return allowed
+
+    def wait(self) -> Optional[float]:
+        return self.wait_time
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Ограничение для анонимных запросов по IP.
+    """
+    scope: str = 'anon'
+
+    def get_cache_key(self, request: Request, view: Any) -> Optional[str]:
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Ограничение для конечных пользователей. Сервисные учетные записи не учитываются.
+    """
+    scope: str = 'user'
+
+    def get_cache_key(self, request: Request, view: Any) -> Optional[str]:
+        if not request.user or not request.user.is_authenticated or is_service_user(request.user):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
+
+
+class ServiceTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Отдельная корзина для сервисных учетных записей (THROTTLE_SERVICE_USERNAMES).
+    """
+    scope: str = 'service'
+
+    def get_cache_key(self, request: Request, view: Any) -> Optional[str]:
+        if not is_service_user(request.user):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
@@ -0,0 +1,87 @@
+import hashlib
+from typing import Dict, Iterable, List
+from django.conf import settings
+from django.db import connection
+from django.utils.http import parse_etags
+from tasks.models import DataVersion
+
+logger = settings.LOGGER.get_logger('versioning')
+
+
+def user_scope(user_id: int) -> str:
+    """
+    Возвращает область версии задач пользователя.
+
+    Args:
+        user_id (int): ID пользователя.
+
+    Returns:
+        str: Имя области.
+    """
+    return f"user:{user_id}"
+
+
+def bump_versions(scopes: Iterable[str]) -> None:
+    """
+    Увеличивает версии областей одним запросом INSERT ... ON CONFLICT DO UPDATE.
+
+    Args:
+        scopes (Iterable[str]): Области, данные которых изменились.
+    """
+    unique_scopes: List[str] = sorted(set(scopes))
+    if not unique_scopes:
+        return
+    table: str = DataVersion._meta.db_table
+    placeholders: str = ', '.join(['(%s, 1)'] * len(unique_scopes))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (scope, version) VALUES {placeholders} "
+            f"ON CONFLICT (scope) DO UPDATE SET version = {table}.version + 1",
+            unique_scopes,
+        )
+
+
+def get_versions(scopes: Iterable[str]) -> Dict[str, int]:
+    """
+    Возвращает текущие версии областей одним запросом.
+
+    Args:
+        scopes (Iterable[str]): Области.
+
+    Returns:
+        Dict[str, int]: Версии по областям, 0 для областей без записей.
+    """
+    scopes = list(scopes)
+    versions: Dict[str, int] = dict(DataVersion.objects.filter(scope__in=scopes).values_list('scope', 'version'))
+    return {scope: versions.get(scope, 0) for scope in scopes}
+
+
+def build_etag(versions: Dict[str, int], path: str) -> str:
+    """
+    Строит слабый ETag из версий областей и пути запроса с параметрами.
+
+    Args:
+        versions (Dict[str, int]): Версии областей.
+        path (str): Полный путь запроса.
+
+    Returns:
+        str: Значение заголовка ETag.
+    """
+    state: str = '.'.join(str(versions[scope]) for scope in sorted(versions))
+    digest: str = hashlib.md5(path.encode('utf-8')).hexdigest()[:12]
+    return f'W/"{state}-{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Проверяет, совпадает ли ETag с одним из значений заголовка If-None-Match (слабое сравнение).
+
+    Args:
+        if_none_match (str): Значение заголовка If-None-Match.
+        etag (str): Текущий ETag.
+
+    Returns:
+        bool: True, если клиент уже имеет актуальную версию.
+    """
+    client_etags: List[str] = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+    return etag.removeprefix('W/') in client_etags
@@ -1,24 +1,137 @@
+from typing import List, Optional, Set
 from rest_framework import viewsets
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
 from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
-from tasks.models import Task, Category
-from tasks.serializers import TaskCreateSerializer, TaskUpdateSerializer, CategorySerializer, UserSerializer, PublicUserSerializer
-from tasks.task_management import delete_task_comments
+from django.db import transaction
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce, Lower
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from tasks.models import ArchivedTask, Task, Category, CategoryTaskStats, CommentCleanupOutbox
+from tasks.archive import parse_archive_month
+from tasks.filters import filter_tasks
+from tasks.export import CSVRenderer, NDJSONRenderer, TaskExporter
+from tasks.pagination import ArchivedTaskPagination, CategoryCursorPagination, TaskCursorPagination, TaskSearchPagination
+from tasks.stats import get_task_stats
+from tasks.changefeed import ChangeCursorExpired, get_task_changes
+from tasks.search import SEARCH_MODE_FTS, SEARCH_MODE_TRIGRAM, get_search_mode, search_tasks
+from tasks.bulk import bulk_create_tasks
+from tasks.cache import task_cache
+from tasks.service_auth import service_token_provider
+from todo_list.db_pool.base import pool_stats
+from tasks.versioning import build_etag, etag_matches, get_versions, user_scope
+from tasks.serializers import ArchivedTaskSerializer, TaskCreateSerializer, TaskUpdateSerializer, UserCategorySerializer, UserSerializer, PublicUserSerializer
 
 logger = settings.LOGGER.get_logger('views')
 
-class TaskViewSet(viewsets.ModelViewSet):
+
+def parse_task_fields(raw: Optional[str]) -> Optional[List[str]]:
+    """
+    Разбирает параметр ?fields= запроса задач. Неизвестные имена полей игнорируются.
+
+    Args:
+        raw (Optional[str]): Значение параметра fields.
+
+    Returns:
+        Optional[List[str]]: Запрошенные поля или None, если нужны все поля.
+    """
+    if not raw:
+        return None
+    requested: List[str] = [name.strip() for name in raw.split(',')]
+    fields: List[str] = [name for name in dict.fromkeys(requested) if name in TaskCreateSerializer.Meta.fields]
+    if len(fields) != len(set(requested)):
+        logger.warning(f"Проигнорированы неизвестные поля в запросе: {raw}")
+    return fields or None
+
+
+def build_task_queryset(user: User, fields: Optional[List[str]]) -> QuerySet:
+    """
+    Возвращает queryset задач пользователя для чтения.
+
+    Если запрошена часть полей, из базы читаются только они (плюс id,
+    created_at и due_date для пагинации), а категории подгружаются, только если запрошены.
+
+    Args:
+        user (User): Владелец задач.
+        fields (Optional[List[str]]): Запрошенные поля или None для всех полей.
+
+    Returns:
+        QuerySet: Queryset задач.
+    """
+    if fields is None:
+        # Поисковый вектор нужен только поиску, в ответы он не попадает
+        return Task.objects.select_related('user').prefetch_related('categories').defer('search_vector').filter(user=user)
+    columns: Set[str] = {'id', 'created_at', 'due_date'} | {name for name in fields if name != 'categories'}
+    queryset = Task.objects.filter(user=user).only(*columns)
+    if 'categories' in fields:
+        queryset = queryset.prefetch_related('categories')
+    return queryset
+
+
+class ConditionalGetMixin:
+    """
+    Добавляет ETag к ответам list/retrieve и отвечает 304 на совпавший If-None-Match.
+
+    ETag строится из счетчиков версий (tasks.versioning), поэтому проверка
+    стоит одного запроса к таблице версий и не обращается к данным.
+    """
+
+    def get_version_scopes(self) -> List[str]:
+        """
+        Возвращает области версий, от которых зависит ответ.
+
+        По умолчанию — версия пользователя: ее увеличивает любое изменение его
+        задач и категорий, в том числе названий категорий и количества задач в них.
+        """
+        return [user_scope(self.request.user.id)]
+
+    def conditional_response(self, request, handler, *args, **kwargs) -> Response:
+        """
+        Возвращает 304, если ETag клиента актуален, иначе ответ handler с ETag.
+
+        Версии читаются до выборки данных, поэтому запись, выполненная во время
+        запроса, не приводит к устаревшему 304 при следующем обращении.
+        """
+        etag: str = build_etag(get_versions(self.get_version_scopes()), request.get_full_path())
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            logger.info(f"Данные не изменились для пользователя {request.user}, возвращаем 304")
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+class TaskViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet для управления задачами.
     Предоставляет CRUD операции для задач пользователя.
     """
     queryset = Task.objects.select_related('user').prefetch_related('categories')
     permission_classes = [IsAuthenticated]
+    pagination_class = TaskCursorPagination
+
+    def cached_response(self, request, handler, *args, **kwargs) -> Response:
+        """
+        Возвращает ответ handler из кэша задач пользователя (tasks.cache).
+
+        Кэш сбрасывается сигналами при изменении задач и категорий, поэтому
+        в кэш попадают только успешные ответы, а ключ зависит от полного пути запроса.
+        """
+        data, key = task_cache.get(request.user.id, request.get_full_path())
+        if data is not None:
+            logger.info(f"Ответ для пользователя {request.user} взят из кэша")
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            task_cache.set(key, response.data)
+        return response
 
     def get_serializer_class(self):
         """
@@ -40,32 +153,229 @@ class TaskViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.log_exception(f"Ошибка при создании задачи для пользователя {self.request.user}")
 
+    def get_requested_fields(self) -> Optional[List[str]]:
+        """
+        Возвращает поля из параметра ?fields= для чтения списка или задачи.
+
+        Неизвестные имена полей игнорируются.
+
+        Returns:
+            Optional[List[str]]: Запрошенные поля или None, если нужны все поля.
+        """
+        if self.action not in ['list', 'retrieve', 'search']:
+            return None
+        return parse_task_fields(self.request.query_params.get('fields'))
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Возвращает сериализатор, ограниченный запрошенными полями.
+        """
+        fields: Optional[List[str]] = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
     def get_queryset(self):
         """
         Возвращает queryset задач текущего пользователя.
+
+        Если запрошена часть полей, из базы читаются только они (плюс id,
+        created_at и due_date для пагинации), а категории подгружаются, только если запрошены.
+        Список и поиск фильтруются параметрами запроса (см. tasks.filters.filter_tasks).
         """
         logger.info(f"Получение списка задач для пользователя {self.request.user}")
-        return self.queryset.filter(user=self.request.user)
+        queryset = build_task_queryset(self.request.user, self.get_requested_fields())
+        if self.action in ['list', 'search']:
+            queryset = filter_tasks(queryset, self.request.query_params)
+        return queryset
 
     def list(self, request, *args, **kwargs):
         """
-        Возвращает список задач пользователя.
+        Возвращает страницу задач пользователя.
+
+        Задачи фильтруются параметрами completed, due_after, due_before,
+        created_after, created_before, category, category_name и упорядочиваются
+        по ?ordering= (created_at, due_date, с '-' по убыванию; по умолчанию created_at).
         """
         try:
             logger.info(f"Запрос списка задач от пользователя {request.user}")
-            return super().list(request, *args, **kwargs)
+            return self.conditional_response(request, self.cached_response, super().list, *args, **kwargs)
+        except NotFound as e:
+            logger.warning(f"Неверный курсор в запросе списка задач от пользователя {request.user}")
+            return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.log_exception(f"Ошибка при получении списка задач для пользователя {request.user}")
             return Response({"error": "Произошла ошибка при получении списка задач"},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Ищет задачи пользователя по параметру q и возвращает их по убыванию релевантности.
+
+        Принимает те же фильтры, что и список задач. Длинные запросы ищутся полнотекстово; если на первой странице ничего не
+        найдено (например, из-за опечатки), поиск повторяется по триграммам
+        заголовка. Короткие запросы сразу ищутся по триграммам и подстроке.
+        """
+        try:
+            query: str = request.query_params.get('q', '').strip()
+            if not query:
+                return Response({"error": "Параметр q обязателен"}, status=status.HTTP_400_BAD_REQUEST)
+            logger.info(f"Поиск задач по запросу '{query}' от пользователя {request.user}")
+            position = TaskSearchPagination().decode_cursor(request)
+            mode: str = position[0] if position is not None else get_search_mode(query)
+            if mode not in (SEARCH_MODE_FTS, SEARCH_MODE_TRIGRAM):
+                raise NotFound(TaskSearchPagination.invalid_cursor_message)
+
+            paginator = TaskSearchPagination(mode)
+            page = paginator.paginate_queryset(search_tasks(self.get_queryset(), query, mode), request, view=self)
+            if not page and position is None and mode == SEARCH_MODE_FTS:
+                logger.info(f"Полнотекстовый поиск по запросу '{query}' ничего не нашел, ищем по триграммам")
+                paginator = TaskSearchPagination(SEARCH_MODE_TRIGRAM)
+                page = paginator.paginate_queryset(search_tasks(self.get_queryset(), query, SEARCH_MODE_TRIGRAM),
+                                                   request, view=self)
+            return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+        except NotFound as e:
+            logger.warning(f"Неверный курсор в поиске задач от пользователя {request.user}")
+            return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.log_exception(f"Ошибка при поиске задач для пользователя {request.user}")
+            return Response({"error": "Произошла ошибка при поиске задач"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'], url_path='stats')
+    def stats(self, request):
+        """
+        Возвращает количество открытых, выполненных и просроченных задач пользователя
+        и количество задач по категориям (см. tasks.stats).
+        """
+        try:
+            logger.info(f"Запрос статистики задач от пользователя {request.user}")
+            return Response(get_task_stats(request.user.id))
+        except Exception as e:
+            logger.log_exception(f"Ошибка при получении статистики задач для пользователя {request.user}")
+            return Response({"error": "Произошла ошибка при получении статистики задач"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Возвращает задачи, созданные или измененные после курсора ?since=, и ID удаленных задач.
+
+        Без since возвращается текущий курсор. Параметр limit ограничивает число
+        записей журнала (по умолчанию TASK_CHANGES_PAGE_SIZE). Ответ содержит новый курсор и
+        признак has_more; если изменения после курсора уже удалены из журнала,
+        возвращается 410 и клиенту нужна полная синхронизация.
+        """
+        try:
+            logger.info(f"Запрос изменений задач от пользователя {request.user}")
+            limit: int = settings.TASK_CHANGES_PAGE_SIZE
+            raw_limit: str = request.query_params.get('limit', '')
+            if raw_limit.isdigit() and int(raw_limit) > 0:
+                limit = min(int(raw_limit), settings.TASK_CHANGES_MAX_PAGE_SIZE)
+            result = get_task_changes(request.user, request.query_params.get('since'), limit)
+            result['changed'] = self.get_serializer(result['changed'], many=True).data
+            return Response(result)
+        except ValueError:
+            logger.warning(f"Неверный курсор изменений от пользователя {request.user}")
+            return Response({"error": "Неверный курсор"}, status=status.HTTP_400_BAD_REQUEST)
+        except ChangeCursorExpired:
+            logger.warning(f"Устаревший курсор изменений от пользователя {request.user}")
+            return Response({"error": "Курсор устарел, требуется полная синхронизация"}, status=status.HTTP_410_GONE)
+        except Exception as e:
+            logger.log_exception(f"Ошибка при получении изменений задач для пользователя {request.user}")
+            return Response({"error": "Произошла ошибка при получении изменений задач"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'], url_path='archive')
+    def archive(self, request):
+        """
+        Возвращает архивные задачи пользователя по убыванию времени выполнения (см. tasks.archive).
+
+        Параметр month=YYYY-MM ограничивает выдачу одним месяцем, такой запрос
+        читает одну секцию архива. Архив доступен только для чтения.
+        """
+        try:
+            logger.info(f"Запрос архива задач от пользователя {request.user}")
+            queryset = ArchivedTask.objects.filter(user=request.user)
+            month: str = request.query_params.get('month', '')
+            if month:
+                start, end = parse_archive_month(month)
+                queryset = queryset.filter(completed_at__gte=start, completed_at__lt=end)
+            paginator = ArchivedTaskPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            return paginator.get_paginated_response(ArchivedTaskSerializer(page, many=True).data)
+        except ValueError:
+            return Response({"error": "Параметр month должен иметь формат YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
+        except NotFound as e:
+            logger.warning(f"Неверный курсор в запросе архива задач от пользователя {request.user}")
+            return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.log_exception(f"Ошибка при получении архива задач для пользователя {request.user}")
+            return Response({"error": "Произошла ошибка при получении архива задач"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Выгружает все задачи пользователя потоковым ответом в NDJSON или CSV (см. tasks.export).
+
+        Формат выбирается параметром format=ndjson|csv или заголовком Accept,
+        по умолчанию NDJSON. Поддерживаются те же фильтры, что и у списка
+        задач; задачи идут по возрастанию даты создания.
+        """
+        try:
+            logger.info(f"Запрос выгрузки задач от пользователя {request.user}")
+            export_format: str = request.accepted_renderer.format
+            queryset = filter_tasks(Task.objects.filter(user=request.user), request.query_params)
+            exporter = TaskExporter(queryset, export_format)
+            content = exporter.achunks() if isinstance(request._request, ASGIRequest) else exporter.chunks()
+            response = StreamingHttpResponse(content, content_type=f"{request.accepted_renderer.media_type}; charset=utf-8")
+            response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+            return response
+        except ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.log_exception(f"Ошибка при выгрузке задач для пользователя {request.user}")
+            return Response({"error": "Произошла ошибка при выгрузке задач"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Создает пачку задач одним запросом.
+
+        Принимает список задач в формате обычного создания и возвращает
+        результат по каждому элементу.
+        """
+        try:
+            items = request.data
+            if not isinstance(items, list):
+                return Response({"error": "Ожидается список задач"}, status=status.HTTP_400_BAD_REQUEST)
+            if len(items) > settings.TASKS_BULK_MAX_ITEMS:
+                return Response({"error": f"Можно создать не более {settings.TASKS_BULK_MAX_ITEMS} задач за запрос"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            logger.info(f"Массовое создание {len(items)} задач пользователем {request.user}")
+            results = bulk_create_tasks(request.user, items)
+            created = sum(1 for result in results if result["status"] == "created")
+            response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+            return Response({"created": created, "results": results}, status=response_status)
+        except Exception as e:
+            logger.log_exception(f"Ошибка при массовом создании задач пользователем {request.user}")
+            return Response({"error": "Произошла ошибка при массовом создании задач"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     def retrieve(self, request, *args, **kwargs):
         """
         Возвращает детальную информацию о задаче.
         """
         try:
             logger.info(f"Запрос детальной информации о задаче от пользователя {request.user}")
-            return super().retrieve(request, *args, **kwargs)
+            return self.conditional_response(request, self.cached_response, super().retrieve, *args, **kwargs)
         except ObjectDoesNotExist:
             logger.log_exception(f"Задача не найдена для пользователя {request.user}")
             return Response({"error": "Задача не найдена"}, status=status.HTTP_404_NOT_FOUND)
@@ -88,34 +398,55 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         """
-        Удаляет задачу.
+        Удаляет задачу. Очистка ее комментариев ставится в CommentCleanupOutbox
+        в той же транзакции и выполняется фоновой задачей.
         """
         try:
             logger.info(f"Удаление задачи пользователем {request.user}")
-            instance = self.get_object()
-            delete_task_comments(str(instance.id))
-            return super().destroy(request, *args, **kwargs)
+            with transaction.atomic():
+                instance = self.get_object()
+                CommentCleanupOutbox.objects.create(task_id=instance.id)
+                self.perform_destroy(instance)
+            return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             logger.log_exception(f"Ошибка при удалении задачи пользователем {request.user}")
             return Response({"error": "Произошла ошибка при удалении задачи"},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet для управления категориями.
-    Предоставляет CRUD операции для категорий.
+    Предоставляет CRUD операции для категорий пользователя.
     """
     queryset = Category.objects.all()
-    serializer_class = CategorySerializer
+    serializer_class = UserCategorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CategoryCursorPagination
+
+    def get_queryset(self) -> QuerySet:
+        """
+        Возвращает категории пользователя с количеством его задач в каждой.
+
+        Количество берется из CategoryTaskStats коррелированным подзапросом
+        по уникальному индексу (user, category), поэтому список строится одним
+        запросом и не агрегирует связи задача-категория.
+        """
+        task_count = CategoryTaskStats.objects.filter(user_id=OuterRef('user_id'), category_id=OuterRef('pk'))
+        return Category.objects.filter(user=self.request.user).annotate(
+            name_lower=Lower('name'),
+            task_count=Coalesce(Subquery(task_count.values('task_count')[:1]), 0),
+        )
 
     def list(self, request, *args, **kwargs):
         """
-        Возвращает список категорий.
+        Возвращает страницу категорий пользователя, упорядоченных по названию.
         """
         try:
             logger.info(f"Запрос списка категорий от пользователя {request.user}")
-            return super().list(request, *args, **kwargs)
+            return self.conditional_response(request, super().list, *args, **kwargs)
+        except NotFound as e:
+            logger.warning(f"Неверный курсор в запросе списка категорий от пользователя {request.user}")
+            return Response({"error": str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.log_exception(f"Ошибка при получении списка категорий для пользователя {request.user}")
             return Response({"error": "Произошла ошибка при получении списка категорий"},
@@ -127,9 +458,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
         """
         try:
             logger.info(f"Запрос детальной информации о категории от пользователя {request.user}")
-            return super().retrieve(request, *args, **kwargs)
-        except ObjectDoesNotExist:
-            logger.log_exception(f"Категория не найдена для пользователя {request.user}")
+            return self.conditional_response(request, super().retrieve, *args, **kwargs)
+        except (ObjectDoesNotExist, Http404):
+            logger.warning(f"Категория не найдена для пользователя {request.user}")
             return Response({"error": "Категория не найдена"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.log_exception(f"Ошибка при получении информации о категории для пользователя {request.user}")
@@ -138,11 +469,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         """
-        Создает новую категорию.
+        Создает новую категорию пользователя.
         """
         try:
             logger.info(f"Создание новой категории пользователем {request.user}")
             return super().create(request, *args, **kwargs)
+        except ValidationError as e:
+            logger.warning(f"Неверные данные категории от пользователя {request.user}: {e.detail}")
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.log_exception(f"Ошибка при создании категории пользователем {request.user}")
             return Response({"error": "Произошла ошибка при создании категории"},
@@ -155,6 +489,12 @@ class CategoryViewSet(viewsets.ModelViewSet):
         try:
             logger.info(f"Обновление категории пользователем {request.user}")
             return super().update(request, *args, **kwargs)
+        except Http404:
+            logger.warning(f"Категория не найдена для пользователя {request.user}")
+            return Response({"error": "Категория не найдена"}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            logger.warning(f"Неверные данные категории от пользователя {request.user}: {e.detail}")
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.log_exception(f"Ошибка при обновлении категории пользователем {request.user}")
             return Response({"error": "Произошла ошибка при обновлении категории"},
@@ -167,6 +507,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
         try:
             logger.info(f"Удаление категории пользователем {request.user}")
             return super().destroy(request, *args, **kwargs)
+        except Http404:
+            logger.warning(f"Категория не найдена для пользователя {request.user}")
+            return Response({"error": "Категория не найдена"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.log_exception(f"Ошибка при удалении категории пользователем {request.user}")
             return Response({"error": "Произошла ошибка при удалении категории"},
@@ -262,4 +605,29 @@ class UserViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.log_exception(f"Ошибка при удалении пользователя: {str(e)}")
             return Response({"error": "Произошла ошибка при удалении пользователя"},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class MetricsView(APIView):
+    """
+    Метрики процесса для администраторов: пулы соединений с БД, кэш задач, сервисный токен.
+
+    Пулы и сервисный токен живут в памяти процесса, поэтому при нескольких
+    воркерах каждый ответ описывает воркер, обработавший запрос.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        Возвращает метрики процесса.
+        """
+        try:
+            logger.info(f"Запрос метрик от пользователя {request.user}")
+            return Response({
+                "db_pool": pool_stats(),
+                "task_cache": task_cache.stats(),
+                "service_token": service_token_provider.stats(),
+            })
+        except Exception as e:
+            logger.log_exception(f"Ошибка при получении метрик: {str(e)}")
+            return Response({"error": "Произошла ошибка при получении метрик"},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,227 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+from background_task.models import Task as BackgroundTask
+from background_task.settings import app_settings
+from background_task.tasks import bg_runner, tasks as task_registry
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = settings.LOGGER.get_logger('workers')
+
+
+def queue_filter(queues: Iterable[str]) -> Q:
+    """
+    Возвращает условие на очереди заданий. Очередь по умолчанию обозначается пустой строкой.
+    """
+    queues = set(queues)
+    condition = Q(queue__in=[queue for queue in queues if queue])
+    if '' in queues:
+        condition |= Q(queue__isnull=True) | Q(queue='')
+    return condition
+
+
+class WorkerPool:
+    """
+    Пул потоков, выполняющих задания django-background-tasks параллельно.
+
+    Стандартный process_tasks выполняет задания по одному: выбирает
+    кандидатов и пытается заблокировать их условным UPDATE, так что
+    несколько процессов конкурируют за одни и те же строки. Здесь каждый
+    поток забирает следующее задание одним запросом UPDATE с подзапросом
+    SELECT ... FOR UPDATE SKIP LOCKED, записывая себя в locked_by/locked_at,
+    поэтому потоки и процессы не ждут друг друга и не берут одно задание
+    дважды. Выполнение, повторы и повторяющиеся задания остаются за
+    background_task.tasks.bg_runner.
+
+    Блокировка задания — аренда длиной MAX_RUN_TIME секунд (так ее понимает
+    и сама библиотека). Отдельный поток продлевает аренду выполняемых
+    заданий каждую треть срока, поэтому долгие задания не подхватываются
+    повторно, а задания упавшего процесса освобождаются после истечения аренды.
+
+    Ограничения BACKGROUND_WORKER_QUEUE_LIMITS действуют на все процессы:
+    задания с действующей арендой в ограниченной очереди считаются под
+    рекомендательной блокировкой очереди (см. within_limit).
+
+    queues ограничивает обрабатываемые очереди (None — все очереди),
+    queue_limits заменяет BACKGROUND_WORKER_QUEUE_LIMITS.
+    """
+
+    def __init__(self, workers: int, queues: Optional[List[str]] = None,
+                 queue_limits: Optional[Dict[str, int]] = None) -> None:
+        self.workers: int = workers
+        self.queues: Optional[List[str]] = queues
+        self.queue_limits: Dict[str, int] = settings.BACKGROUND_WORKER_QUEUE_LIMITS if queue_limits is None else queue_limits
+        # Как и process_tasks, записываем в locked_by PID: по нему админка проверяет, жив ли обработчик
+        self.worker_id: str = str(os.getpid())
+        self.stopped = threading.Event()
+        self.processed: int = 0
+        self._running: Dict[int, BackgroundTask] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def lease_expired_before(self, now: datetime) -> datetime:
+        """
+        Возвращает момент, раньше которого записанная аренда считается истекшей.
+        """
+        return now - timedelta(seconds=app_settings.BACKGROUND_TASK_MAX_RUN_TIME)
+
+    def within_limit(self, queue: str, now: datetime) -> bool:
+        """
+        Проверяет, что захват задания не превысил ограничение очереди. Вызывается в транзакции захвата.
+
+        Рекомендательная блокировка очереди держится до конца транзакции,
+        поэтому захваты в одну ограниченную очередь проверяются по очереди и
+        каждый видит задания, захваченные предыдущими. Только что захваченное
+        задание учитывается в подсчете.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"background_task:{queue}"])
+        active: int = BackgroundTask.objects.filter(
+            queue_filter([queue]), locked_by__isnull=False, locked_at__gte=self.lease_expired_before(now)).count()
+        return active <= self.queue_limits[queue]
+
+    def claim_next(self, now: datetime, full: Set[str]) -> Optional[BackgroundTask]:
+        """
+        Захватывает готовое задание одним запросом UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED).
+        """
+        available = BackgroundTask.objects.unlocked(now).filter(
+            run_at__lte=now, failed_at=None, task_name__in=list(task_registry._tasks))
+        if self.queues is not None:
+            available = available.filter(queue_filter(self.queues))
+        if full:
+            available = available.exclude(queue_filter(full))
+        candidate = available.order_by(f"{app_settings.BACKGROUND_TASK_PRIORITY_ORDERING}priority", 'run_at') \
+            .values('id')[:1]
+        candidate_sql, candidate_params = candidate.query.sql_with_params()
+        table: str = BackgroundTask._meta.db_table
+        # FOR UPDATE дописывается вручную: ORM разрешает select_for_update только внутри транзакции,
+        # а одиночный UPDATE выполняется в режиме autocommit
+        claimed: List[BackgroundTask] = list(BackgroundTask.objects.raw(
+            f"UPDATE {table} SET locked_by = %s, locked_at = %s "
+            f"WHERE id = ({candidate_sql} FOR UPDATE SKIP LOCKED) RETURNING *",
+            [self.worker_id, now, *candidate_params]))
+        return claimed[0] if claimed else None
+
+    def claim(self) -> Optional[BackgroundTask]:
+        """
+        Захватывает следующее готовое задание.
+
+        Без ограничений очередей захват — один запрос в режиме autocommit.
+        Если задание попало в ограниченную очередь, где уже нет места, захват
+        откатывается и очередь исключается из поиска.
+
+        Returns:
+            Optional[BackgroundTask]: Задание с записанной арендой или None, если готовых заданий нет.
+        """
+        if not self.queue_limits:
+            return self.claim_next(timezone.now(), set())
+        full: Set[str] = set()
+        while True:
+            with transaction.atomic():
+                now: datetime = timezone.now()
+                task: Optional[BackgroundTask] = self.claim_next(now, full)
+                if task is None:
+                    return None
+                queue: str = task.queue or ''
+                if queue not in self.queue_limits or self.within_limit(queue, now):
+                    return task
+                full.add(queue)
+                transaction.set_rollback(True)
+
+    def execute(self, task: BackgroundTask) -> None:
+        """
+        Выполняет захваченное задание, продлевая его аренду во время выполнения.
+        """
+        with self._lock:
+            self._running[task.pk] = task
+        try:
+            bg_runner(task_registry._tasks[task.task_name], task)
+        finally:
+            with self._lock:
+                self._running.pop(task.pk, None)
+                self.processed += 1
+
+    def renew_leases(self) -> int:
+        """
+        Продлевает аренду выполняемых заданий.
+
+        Returns:
+            int: Количество продленных заданий.
+        """
+        with self._lock:
+            running: List[BackgroundTask] = list(self._running.values())
+        if not running:
+            return 0
+        now: datetime = timezone.now()
+        renewed: int = BackgroundTask.objects.filter(id__in=[task.pk for task in running],
+                                                     locked_by=self.worker_id).update(locked_at=now)
+        # bg_runner сохраняет задание целиком, поэтому аренда обновляется и в объекте задания
+        for task in running:
+            task.locked_at = now
+        if renewed < len(running):
+            logger.warning(f"Аренда {len(running) - renewed} заданий потеряна: они могут выполниться повторно")
+        return renewed
+
+    def work(self) -> None:
+        """
+        Цикл потока-обработчика: захватывает и выполняет задания до остановки пула.
+        """
+        try:
+            while not self.stopped.is_set():
+                try:
+                    task: Optional[BackgroundTask] = self.claim()
+                except Exception as e:
+                    logger.log_exception(f"Ошибка захвата фонового задания: {str(e)}")
+                    connection.close()
+                    self.stopped.wait(settings.BACKGROUND_WORKER_POLL_INTERVAL)
+                    continue
+                if task is None:
+                    close_old_connections()
+                    self.stopped.wait(settings.BACKGROUND_WORKER_POLL_INTERVAL)
+                    continue
+                self.execute(task)
+        finally:
+            connection.close()
+
+    def renew(self) -> None:
+        """
+        Цикл потока продления аренды.
+        """
+        try:
+            while not self.stopped.wait(app_settings.BACKGROUND_TASK_MAX_RUN_TIME / 3):
+                try:
+                    self.renew_leases()
+                except DatabaseError as e:
+                    logger.log_exception(f"Ошибка продления аренды фоновых заданий: {str(e)}")
+                    connection.close()
+        finally:
+            connection.close()
+
+    def start(self) -> None:
+        """
+        Запускает потоки-обработчики и поток продления аренды.
+        """
+        self._threads = [threading.Thread(target=self.work, name=f"background-worker-{index}", daemon=True)
+                         for index in range(self.workers)]
+        self._threads.append(threading.Thread(target=self.renew, name='background-lease', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Запущено {self.workers} обработчиков фоновых заданий")
+
+    def stop(self) -> None:
+        """
+        Останавливает пул. Выполняемые задания завершаются, новые не захватываются.
+        """
+        self.stopped.set()
+
+    def join(self) -> None:
+        """
+        Ждет завершения всех потоков пула.
+        """
+        for thread in self._threads:
+            thread.join()
+        logger.info(f"Обработчики фоновых заданий остановлены, выполнено заданий: {self.processed}")
@@ -9,8 +9,27 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todo_list.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+if settings.DEBUG:
+    # Статика админки, которую раньше отдавал runserver
+    django_application = ASGIStaticFilesHandler(django_application)
+
+# Импорт после инициализации Django: модуль использует модели
+from tasks.streaming import TASK_STREAM_PATH, task_event_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """
+    Направляет поток событий задач в отдельное ASGI-приложение, остальные запросы в Django.
+    """
+    if scope['type'] == 'http' and scope['path'] == TASK_STREAM_PATH:
+        await task_event_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,3 @@
+"""
+Backend PostgreSQL с пулом соединений (ENGINE = 'todo_list.db_pool').
+"""
@@ -0,0 +1,359 @@
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import psycopg2
+from psycopg2 import extensions
+from django.conf import settings
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgresDatabaseCreation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+logger = settings.LOGGER.get_logger('db_pool')
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений psycopg2.
+
+    Держит не меньше min_size открытых соединений (открываются методом fill
+    при первом обращении) и не больше max_size. Если свободных соединений
+    нет и достигнут max_size, поток ждет освобождения не дольше timeout
+    секунд. Соединения старше max_lifetime секунд закрываются при возврате
+    или выдаче. При health_check выданное соединение проверяется запросом
+    SELECT 1, неисправное закрывается и заменяется. При возврате состояние
+    сессии сбрасывается (см. putconn).
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], min_size: int, max_size: int,
+                 timeout: float, max_lifetime: float, health_check: bool) -> None:
+        self.name: str = name
+        self.factory: Callable[[], Any] = factory
+        self.min_size: int = min_size
+        self.max_size: int = max_size
+        self.timeout: float = timeout
+        self.max_lifetime: float = max_lifetime
+        self.health_check: bool = health_check
+        self._condition = threading.Condition()
+        self._idle: Deque[Any] = deque()
+        self._created_at: Dict[int, float] = {}
+        self._size: int = 0
+        self._waiting: int = 0
+        self._checkouts: int = 0
+        self._wait_total: float = 0.0
+        self._wait_max: float = 0.0
+        self._timeouts: int = 0
+        self._discarded: int = 0
+        self._closed: bool = False
+
+    def fill(self) -> None:
+        """
+        Открывает соединения до min_size. Соединения открываются без блокировки пула,
+        параллельные getconn в это время создают свои соединения в пределах max_size.
+        """
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            connection = self._create()
+            with self._condition:
+                if not self._closed:
+                    self._idle.append(connection)
+                    self._condition.notify()
+                    continue
+            self._discard(connection)
+            return
+
+    def _create(self, factory: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Открывает новое соединение. Место в пуле должно быть уже зарезервировано в _size.
+        """
+        try:
+            connection = (factory or self.factory)()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection: Any) -> None:
+        """
+        Закрывает соединение и освобождает его место в пуле.
+        """
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self._condition:
+            self._size -= 1
+            self._discarded += 1
+            self._condition.notify()
+
+    def _expired(self, connection: Any) -> bool:
+        created_at: float = self._created_at.get(id(connection), 0.0)
+        return self.max_lifetime > 0 and time.monotonic() - created_at > self.max_lifetime
+
+    def _healthy(self, connection: Any) -> bool:
+        if connection.closed:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, factory: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Выдает соединение из пула, при необходимости ожидая освобождения.
+
+        Args:
+            factory (Optional[Callable[[], Any]]): Функция создания соединения вместо заданной при создании пула.
+
+        Returns:
+            Any: Соединение psycopg2.
+
+        Raises:
+            psycopg2.OperationalError: Если соединение не освободилось за timeout секунд.
+        """
+        started: float = time.monotonic()
+        while True:
+            connection: Optional[Any] = None
+            create: bool = False
+            with self._condition:
+                if self._closed:
+                    raise psycopg2.OperationalError(f"Пул соединений {self.name} закрыт")
+                self._waiting += 1
+                try:
+                    while not self._idle and self._size >= self.max_size:
+                        remaining: float = self.timeout - (time.monotonic() - started)
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            logger.warning(f"Не удалось получить соединение из пула {self.name} за {self.timeout} с")
+                            raise psycopg2.OperationalError(
+                                f"Пул соединений {self.name} исчерпан: нет свободных соединений за {self.timeout} с")
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                if self._idle:
+                    connection = self._idle.pop()
+                else:
+                    # Резервируем место под блокировкой, чтобы параллельные потоки не превысили max_size
+                    self._size += 1
+                    create = True
+
+            if create:
+                connection = self._create(factory)
+            elif self._expired(connection) or not self._healthy(connection):
+                self._discard(connection)
+                continue
+
+            waited: float = time.monotonic() - started
+            with self._condition:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return connection
+
+    def _reset(self, connection: Any) -> bool:
+        """
+        Откатывает незавершенную транзакцию и сбрасывает состояние сессии через DISCARD ALL.
+
+        DISCARD ALL возвращает параметры, заданные через SET (часовой пояс,
+        search_path, таймауты), к значениям при подключении, удаляет временные
+        таблицы, снимает сессионные рекомендательные блокировки и подписки LISTEN.
+
+        Returns:
+            bool: True, если соединение сброшено и может быть выдано снова.
+        """
+        try:
+            status: int = connection.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                return False
+            # DISCARD ALL не выполняется внутри транзакции
+            autocommit: bool = connection.autocommit
+            connection.autocommit = True
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("DISCARD ALL")
+            finally:
+                connection.autocommit = autocommit
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, connection: Any) -> None:
+        """
+        Возвращает соединение в пул.
+
+        Незавершенная транзакция откатывается, состояние сессии сбрасывается
+        (см. _reset). Закрытые, неисправные, устаревшие соединения и
+        соединения, которые не удалось сбросить, закрываются.
+
+        Args:
+            connection (Any): Соединение, полученное из getconn.
+        """
+        if connection.closed or self._closed or self._expired(connection):
+            self._discard(connection)
+            return
+        if not self._reset(connection):
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append(connection)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """
+        Закрывает свободные соединения и запрещает выдачу новых.
+        Выданные соединения закрываются при возврате.
+        """
+        with self._condition:
+            self._closed = True
+            idle: List[Any] = list(self._idle)
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Возвращает состояние и счетчики пула.
+
+        Returns:
+            Dict[str, Any]: Размеры пула, число выданных и ожидающих соединений, время ожидания.
+        """
+        with self._condition:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'checked_out': self._size - len(self._idle),
+                'waiting': self._waiting,
+                'checkouts': self._checkouts,
+                'wait_time_total': round(self._wait_total, 6),
+                'wait_time_max': round(self._wait_max, 6),
+                'wait_time_avg': round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+            }
+
+
+_pools: Dict[Tuple[str, str], ConnectionPool] = {}
+_pools_pid: Optional[int] = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, conn_params: Dict[str, Any], pool_settings: Dict[str, Any],
+             factory: Callable[[], Any]) -> ConnectionPool:
+    """
+    Возвращает пул процесса для алиаса БД и параметров подключения, создавая его при первом обращении.
+
+    После fork пулы создаются заново: соединения родителя нельзя использовать в дочернем процессе.
+
+    Args:
+        alias (str): Алиас базы данных.
+        conn_params (Dict[str, Any]): Параметры подключения psycopg2.
+        pool_settings (Dict[str, Any]): Настройки пула из DATABASES[alias]['POOL'].
+        factory (Callable[[], Any]): Функция создания соединения.
+
+    Returns:
+        ConnectionPool: Пул соединений.
+    """
+    global _pools_pid
+    key: Tuple[str, str] = (alias, repr(sorted(conn_params.items())))
+    created: bool = False
+    pid: int = os.getpid()
+    with _pools_lock:
+        if _pools_pid != pid:
+            _pools.clear()
+            _pools_pid = pid
+        pool: Optional[ConnectionPool] = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                name=f"{alias}:{conn_params.get('dbname', '')}",
+                factory=factory,
+                min_size=pool_settings.get('MIN_SIZE', 0),
+                max_size=pool_settings.get('MAX_SIZE', 10),
+                timeout=pool_settings.get('TIMEOUT', 10),
+                max_lifetime=pool_settings.get('MAX_LIFETIME', 1800),
+                health_check=pool_settings.get('HEALTH_CHECK', True),
+            )
+            _pools[key] = pool
+            created = True
+            logger.info(f"Создан пул соединений {pool.name}: {pool.min_size}..{pool.max_size}")
+    # Начальные соединения открываются без глобальной блокировки: она не должна ждать сеть и другие пулы
+    if created:
+        pool.fill()
+    return pool
+
+
+def close_all_pools() -> None:
+    """
+    Закрывает все пулы процесса.
+    """
+    with _pools_lock:
+        pools: List[ConnectionPool] = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Возвращает статистику всех пулов процесса.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Статистика по имени пула.
+    """
+    with _pools_lock:
+        pools: List[ConnectionPool] = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+class DatabaseCreation(PostgresDatabaseCreation):
+    def _destroy_test_db(self, test_database_name: str, verbosity: int) -> None:
+        # Свободные соединения пула к тестовой базе не дают ее удалить
+        close_all_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    """
+    Backend PostgreSQL, который берет соединения из ConnectionPool вместо
+    открытия нового соединения на каждый запрос и возвращает их в пул при закрытии.
+
+    Настройки пула задаются в DATABASES[alias]['POOL']: MIN_SIZE, MAX_SIZE,
+    TIMEOUT, MAX_LIFETIME, HEALTH_CHECK. CONN_MAX_AGE должен оставаться 0,
+    чтобы соединение возвращалось в пул в конце каждого запроса.
+    """
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params: Dict[str, Any]) -> Any:
+        pool: ConnectionPool = get_pool(self.alias, conn_params, self.settings_dict.get('POOL', {}),
+                                        partial(super().get_new_connection, conn_params))
+        connection = pool.getconn(partial(super().get_new_connection, conn_params))
+        # Родительский get_new_connection задает isolation_level только при создании соединения
+        self.isolation_level = IsolationLevel(self.settings_dict['OPTIONS'].get('isolation_level',
+                                                                                  IsolationLevel.READ_COMMITTED))
+        self.pool: ConnectionPool = pool
+        return connection
+
+    def _close(self) -> None:
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
@@ -28,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'tasks',
     'background_task',
@@ -69,12 +70,28 @@ WSGI_APPLICATION = 'todo_list.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # todo_list.db_pool — PostgreSQL с пулом соединений, включается переменной DB_POOL_ENABLED=1
+        'ENGINE': 'todo_list.db_pool' if os.environ.get('DB_POOL_ENABLED') == '1' else 'django.db.backends.postgresql',
         'NAME': os.environ.get('POSTGRES_DB_TODO', 'todo_db'),
         'USER': os.environ.get('POSTGRES_USER', 'todo_user'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'todo_password'),
         'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Настройки пула для todo_list.db_pool: размеры, ожидание свободного соединения
+        # и максимальный срок жизни соединения (в секундах), проверка соединения при выдаче
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+            'TIMEOUT': 10,
+            'MAX_LIFETIME': 1800,
+            'HEALTH_CHECK': True,
+        },
+        # Порог похожести слов для триграммного поиска задач (оператор <% в tasks.search);
+        # стандартный порог pg_trgm 0.6 не находит слова с одной-двумя опечатками
+        'OPTIONS': {
+            'options': '-c pg_trgm.word_similarity_threshold='
+                       + os.environ.get('TASKS_SEARCH_TRIGRAM_THRESHOLD', '0.4'),
+        },
     }
 }
 
@@ -122,15 +139,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'tasks.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'tasks.throttling.AnonTokenBucketThrottle',
+        'tasks.throttling.UserTokenBucketThrottle',
+        'tasks.throttling.ServiceTokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '15/minute',
-        'user': '15/minute'
+        'user': '15/minute',
+        'service': '600/minute',
     }
 }
 
@@ -145,11 +164,127 @@ LOGGER_CONSOLE = LOGGER.setup_colored_console_logging()
 # Настройки для отслеживания выполненных задач
 TIME_COMPLETED_TASK = True
 TIME_COMPLETED_TASK_INTERVAL = 86400  # 24 часа в секундах
+# Переносить выполненные задачи в архив GET /api/tasks/archive/ (см. tasks.archive) вместо удаления
+TIME_COMPLETED_TASK_ARCHIVE = True
 
 # Настройки для отслеживания просроченных задач
 TIME_DUE_TASK = True
 TIME_DUE_TASK_INTERVAL = 3600  # 1 час в секундах
 
+# Планировщик сроков задач (см. tasks.deadlines): канал уведомлений о сроках, количество ближайших
+# сроков, загружаемых из базы, и максимальная длительность сна между проверками (в секундах)
+DEADLINE_CHANNEL = 'task_deadlines'
+DEADLINE_SCHEDULER_WINDOW = 1000
+DEADLINE_SCHEDULER_MAX_SLEEP = 300
+
+# Пул обработчиков фоновых заданий (см. tasks.workers): число потоков по умолчанию, максимум
+# одновременно выполняемых заданий по очередям (очередь по умолчанию — ''), интервал опроса пустой
+# очереди (в секундах)
+BACKGROUND_WORKERS = 4
+BACKGROUND_WORKER_QUEUE_LIMITS = {}
+BACKGROUND_WORKER_POLL_INTERVAL = 1.0
+# Срок аренды фонового задания (в секундах), по умолчанию библиотеки. Пул продлевает аренду выполняемых
+# заданий, задания упавшего обработчика подхватываются после ее истечения. process_tasks аренду
+# не продлевает, поэтому срок должен с запасом превышать время самого долгого задания: иначе задание
+# подхватывается повторно и выполняется дважды (см. проверку после настроек очистки и очереди)
+MAX_RUN_TIME = 3600
+
+# Максимальное количество задач в одном запросе POST /api/tasks/bulk/
+TASKS_BULK_MAX_ITEMS = 5000
+
+# Размер пачки задач, читаемой одним запросом при выгрузке GET /api/tasks/export/ (см. tasks.export)
+TASK_EXPORT_CHUNK_SIZE = 2000
+
+# Генератор первичных ключей для задач и категорий (см. tasks.ids)
+ID_GENERATOR = 'tasks.ids.SnowflakeIdGenerator'
+# Диапазон номеров узла генератора (first-last в пределах 0..1023), из которого каждый процесс арендует
+# уникальный номер в PostgreSQL, и срок аренды (в секундах). Задается для каждого сервиса отдельно
+ID_GENERATOR_NODE_RANGE = tuple(int(bound) for bound in os.environ.get('ID_GENERATOR_NODE_RANGE', '0-1023').split('-'))
+ID_GENERATOR_LEASE_TTL = 60
+
+# Размер пачки и бюджет времени (в секундах) одного запуска очистки задач
+SWEEP_BATCH_SIZE = 500
+SWEEP_TIME_BUDGET = 60
+
+# Очередь очистки комментариев удаленных задач: интервал обработки и размер пачки,
+# базовая и максимальная задержка повторных попыток, срок захвата пачки обработчиком (в секундах)
+OUTBOX_DRAIN_INTERVAL = 60
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_RETRY_BASE_DELAY = 30
+OUTBOX_RETRY_MAX_DELAY = 3600
+OUTBOX_CLAIM_TIMEOUT = 60
+COMMENTS_SERVICE_TIMEOUT = 10
+
+# Запуск очистки длится до SWEEP_TIME_BUDGET секунд плюс последняя пачка, обработка очереди держит пачку
+# до OUTBOX_CLAIM_TIMEOUT секунд: аренда задания под process_tasks должна быть заметно длиннее
+assert MAX_RUN_TIME >= 10 * max(SWEEP_TIME_BUDGET, OUTBOX_CLAIM_TIMEOUT), \
+    "MAX_RUN_TIME должен быть не меньше 10 * max(SWEEP_TIME_BUDGET, OUTBOX_CLAIM_TIMEOUT)"
+
+# Интервал пересчета статистики задач (см. tasks.stats.reconcile_task_stats), в секундах, и количество
+# пользователей, пересчитываемых в одной транзакции
+TASK_STATS_RECONCILE_INTERVAL = 3600
+TASK_STATS_RECONCILE_BATCH_SIZE = 500
+
+# Журнал изменений задач для GET /api/tasks/changes/ (см. tasks.changefeed): срок хранения записей
+# и интервал очистки (в секундах), количество записей журнала по умолчанию и максимум за запрос
+TASK_CHANGES_RETENTION = 7 * 24 * 3600
+TASK_CHANGES_PRUNE_INTERVAL = 3600
+TASK_CHANGES_PAGE_SIZE = 500
+TASK_CHANGES_MAX_PAGE_SIZE = 2000
+
+# Уведомления об изменении задач для потока GET /api/stream/tasks/ (см. tasks.pubsub, tasks.streaming).
+# При заданном REDIS_URL уведомления идут через канал Redis и доходят из всех процессов
+TASK_EVENTS_REDIS_URL = os.environ.get('REDIS_URL')
+TASK_EVENTS_CHANNEL = 'tasks:events'
+TASK_EVENTS_REDIS_TIMEOUT = 0.5
+TASK_EVENTS_RETRY_INTERVAL = 30
+
+# Поток событий задач: интервал keepalive и таймаут отправки клиенту (в секундах), максимум потоков
+# на пользователя в процессе, число и задержка повторного чтения журнала после уведомления
+TASK_STREAM_HEARTBEAT = 15
+TASK_STREAM_SEND_TIMEOUT = 30
+TASK_STREAM_MAX_PER_USER = 5
+TASK_STREAM_RETRIES = 3
+TASK_STREAM_RETRY_DELAY = 0.2
+
+# За сколько секунд до истечения обновлять сервисный токен для межсервисных вызовов
+SERVICE_TOKEN_REFRESH_MARGIN = 60
+
+# Кэш ответов списка и деталей задач (см. tasks.cache). При заданном REDIS_URL
+# используется общий для всех процессов Redis, иначе локальный кэш процесса
+TASKS_CACHE_ALIAS = 'tasks'
+TASKS_CACHE_TIMEOUT = 300
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    TASKS_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tasks',
+    },
+}
+
+# Кэш состояния пользователя для JWT-аутентификации (см. tasks.authentication)
+AUTH_USER_CACHE_ALIAS = TASKS_CACHE_ALIAS
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Ограничение запросов (см. tasks.throttling): общий Redis для всех процессов,
+# при его отсутствии или недоступности — лимитер в памяти процесса
+THROTTLE_REDIS_URL = os.environ.get('REDIS_URL')
+THROTTLE_REDIS_TIMEOUT = 0.5
+THROTTLE_REDIS_RETRY_INTERVAL = 30
+THROTTLE_LOCAL_MAX_KEYS = 10000
+# Сервисные учетные записи (бот, микросервисы) ограничиваются отдельной корзиной 'service'
+THROTTLE_SERVICE_USERNAMES = [username for username in [os.environ.get('API_USERNAME_TODO')] if username]
+
+# Поиск задач (см. tasks.search): конфигурация полнотекстового поиска и минимальная
+# длина запроса, начиная с которой используется полнотекстовый поиск вместо триграммного
+TASKS_SEARCH_CONFIG = 'russian'
+TASKS_SEARCH_FTS_MIN_LENGTH = 3
+
 RUNNING_TESTS = False  # Это будет True, когда запускаются тесты
 
 # Добавьте эту строку в конец settings.py
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from tasks.views import TaskViewSet, CategoryViewSet, UserViewSet
+from tasks.views import TaskViewSet, CategoryViewSet, UserViewSet, MetricsView
+from tasks.async_views import AsyncTaskListView, AsyncTaskDetailView
 from tasks.token import TokenPairView, Token2RefreshView
 
 router = DefaultRouter()
@@ -12,6 +13,9 @@ router.register(r'users', UserViewSet)
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+    path('api/async/tasks/', AsyncTaskListView.as_view(), name='async_task_list'),
+    path('api/async/tasks/<str:pk>/', AsyncTaskDetailView.as_view(), name='async_task_detail'),
     path('api/token/', TokenPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', Token2RefreshView.as_view(), name='token_refresh'),
 ]
\ No newline at end of file
@@ -137,3 +137,39 @@ class CommentCRUD:
         except SQLAlchemyError as e:
             db.rollback()
             logger.log_exception(f"Ошибка при удалении комментария с ID {comment_id}: {str(e)}")
+
+    def delete_comments_by_task(self, db: Session, task_id: str) -> int:
+        """
+        Удаляет все комментарии задачи одним запросом DELETE.
+
+        Args:
+            db (Session): Сессия базы данных.
+            task_id (str): ID задачи.
+
+        Returns:
+            int: Количество удаленных комментариев.
+        """
+        return self.delete_comments_by_tasks(db, [task_id])
+
+    def delete_comments_by_tasks(self, db: Session, task_ids: List[str]) -> int:
+        """
+        Удаляет комментарии нескольких задач одним запросом DELETE.
+
+        Args:
+            db (Session): Сессия базы данных.
+            task_ids (List[str]): ID задач.
+
+        Returns:
+            int: Количество удаленных комментариев.
+        """
+        try:
+            deleted: int = (db.query(models.Comment)
+                            .filter(models.Comment.task_id.in_(task_ids))
+                            .delete(synchronize_session=False))
+            db.commit()
+            logger.info(f"Удалено {deleted} комментариев для {len(task_ids)} задач")
+            return deleted
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.log_exception(f"Ошибка при удалении комментариев для задач {task_ids}: {str(e)}")
+            raise
@@ -219,6 +219,65 @@ async def delete_comment(
         logger.log_exception(f"Ошибка при удалении комментария с ID {comment_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
+@app.post("/comments/bulk-delete", response_model=schemas.DeleteResult)
+async def bulk_delete_comments(
+    request: schemas.BulkDeleteRequest,
+    db: Session = Depends(get_db),
+    token: str = Depends(get_token)
+) -> schemas.DeleteResult:
+    """
+    Удаляет комментарии нескольких задач одним запросом к базе данных.
+
+    Args:
+        request (schemas.BulkDeleteRequest): ID задач, комментарии которых нужно удалить.
+        db (Session): Сессия базы данных.
+        token (str): Токен авторизации.
+
+    Returns:
+        schemas.DeleteResult: Количество удаленных комментариев.
+
+    Raises:
+        HTTPException: Если произошла ошибка при удалении комментариев.
+    """
+    try:
+        deleted: int = comment_crud.delete_comments_by_tasks(db, request.task_ids) if request.task_ids else 0
+        logger.info(f"Удалено {deleted} комментариев для {len(request.task_ids)} задач")
+        return schemas.DeleteResult(deleted=deleted)
+    except Exception as e:
+        logger.log_exception(f"Ошибка при массовом удалении комментариев: {str(e)}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
+@app.delete("/tasks/{task_id}/comments", response_model=schemas.DeleteResult)
+async def delete_task_comments(
+    task_id: str,
+    db: Session = Depends(get_db),
+    token: str = Depends(get_token)
+) -> schemas.DeleteResult:
+    """
+    Удаляет все комментарии задачи одним запросом к базе данных.
+
+    Существование задачи не проверяется: эндпоинт вызывается бэкендом
+    при удалении задачи.
+
+    Args:
+        task_id (str): ID задачи.
+        db (Session): Сессия базы данных.
+        token (str): Токен авторизации.
+
+    Returns:
+        schemas.DeleteResult: Количество удаленных комментариев.
+
+    Raises:
+        HTTPException: Если произошла ошибка при удалении комментариев.
+    """
+    try:
+        deleted: int = comment_crud.delete_comments_by_task(db, task_id)
+        logger.info(f"Удалено {deleted} комментариев для задачи с ID {task_id}")
+        return schemas.DeleteResult(deleted=deleted)
+    except Exception as e:
+        logger.log_exception(f"Ошибка при удалении комментариев для задачи с ID {task_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
 @app.get("/tasks/{task_id}/comments", response_model=List[schemas.Comment])
 @cache(expire=60)
 async def read_task_comments(
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class TaskInfo(BaseModel):
     id: str
@@ -18,4 +18,10 @@ class Comment(CommentBase):
     task: Optional[TaskInfo] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class BulkDeleteRequest(BaseModel):
+    task_ids: List[str]
+
+class DeleteResult(BaseModel):
+    deleted: int
\ No newline at end of file
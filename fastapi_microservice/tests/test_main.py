@@ -13,6 +13,8 @@ from fastapi_cache.backends.inmemory import InMemoryBackend
 
 
 class TestMain(unittest.TestCase):
+    auth_headers = {"Authorization": "Bearer test-token"}
+
     @classmethod
     def setUpClass(cls):
         # Создаем тестовую базу данных в памяти
@@ -22,6 +24,7 @@ class TestMain(unittest.TestCase):
             poolclass=StaticPool
         )
         TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=cls.engine)
+        cls.TestingSessionLocal = TestingSessionLocal
         Base.metadata.create_all(bind=cls.engine)
 
         def override_get_db():
@@ -138,5 +141,38 @@ class TestMain(unittest.TestCase):
         self.assertGreaterEqual(len(data), 2)
 
 
+    def create_comments(self, task_id, count):
+        db = self.TestingSessionLocal()
+        try:
+            for i in range(count):
+                crud.CommentCRUD().create_comment(db, schemas.CommentCreate(content=f"Comment {i}", task_id=task_id, user_id=1))
+        finally:
+            db.close()
+
+    def count_comments(self, task_id):
+        db = self.TestingSessionLocal()
+        try:
+            return len(crud.CommentCRUD().get_comments_by_task(db, task_id))
+        finally:
+            db.close()
+
+    def test_delete_task_comments(self):
+        self.create_comments("3", 5)
+        self.create_comments("4", 1)
+        response = self.client.delete("/tasks/3/comments", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"deleted": 5})
+        self.assertEqual(self.count_comments("3"), 0)
+        self.assertEqual(self.count_comments("4"), 1)
+
+    def test_bulk_delete_comments(self):
+        self.create_comments("5", 3)
+        self.create_comments("6", 2)
+        self.create_comments("7", 1)
+        response = self.client.post("/comments/bulk-delete", json={"task_ids": ["5", "6", "8"]}, headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"deleted": 5})
+        self.assertEqual(self.count_comments("7"), 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -8,7 +8,7 @@ from handlers import (
     on_create_task, on_task_description, on_task_due_date, on_task_categories,
     on_create_category, on_create_comment, on_delete_comment, on_category_del,
     on_category_selected, on_save_categories, on_update_title, on_update_description,
-    on_update_due_date
+    on_update_due_date, on_tasks_opened, on_tasks_next_page
 )
 from getters import (
     check_user, get_tasks, get_task_details, get_categories, get_categories_for_assignment,
@@ -31,7 +31,7 @@ main_dialog = Dialog(
     ),
     Window(
         Format("{main_menu}"),
-        Button(Format("{my_tasks}"), id="tasks", on_click=lambda c, b, m: m.switch_to(MainSG.tasks)),
+        Button(Format("{my_tasks}"), id="tasks", on_click=on_tasks_opened),
         Button(Format("{categories}"), id="categories", on_click=lambda c, b, m: m.switch_to(MainSG.categories)),
         state=MainSG.main,
         getter=check_user
@@ -48,6 +48,7 @@ main_dialog = Dialog(
             ),
             width=1,
         ),
+        Button(Format("{next_page}"), id="tasks_next_page", on_click=on_tasks_next_page, when="has_next_page"),
         Button(Format("{create_task}"), id="create_task", on_click=lambda c, b, m: m.switch_to(MainSG.create_task)),
         Button(Format("{back}"), id="back", on_click=lambda c, b, m: m.switch_to(MainSG.main)),
         getter=get_tasks,
@@ -74,11 +74,16 @@ async def get_tasks(dialog_manager: DialogManager, **kwargs) -> Dict[str, Any]:
     try:
         user_token: str = dialog_manager.dialog_data.get("user_token")
         logger.info("Получение списка задач")
-        tasks: List[Dict[str, Any]] = await api_service.get_tasks(user_token)
+        cursor: Optional[str] = dialog_manager.dialog_data.get("tasks_cursor")
+        # Экран списка показывает только заголовки задач
+        tasks, next_cursor = await api_service.get_tasks(user_token, cursor, fields=["id", "title"])
+        dialog_manager.dialog_data["tasks_next_cursor"] = next_cursor
         locale: str = dialog_manager.dialog_data.get("locale", "ru")
         logger.info(f"Получено {len(tasks)} задач")
         return {
             "tasks": tasks,
+            "has_next_page": next_cursor is not None,
+            "next_page": localization.get_text("next_page", locale),
             "create_task": localization.get_text("create_task", locale),
             "no_tasks": localization.get_text("no_tasks", locale),
             "my_tasks": localization.get_text("my_tasks", locale),
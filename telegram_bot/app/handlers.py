@@ -32,6 +32,37 @@ async def on_task_selected(c: CallbackQuery, widget: Any, manager: DialogManager
         logger.log_exception(f"Ошибка при выборе задачи с ID {item_id}")
         await c.answer("Произошла ошибка при выборе задачи. Попробуйте еще раз.")
 
+async def on_tasks_opened(c: CallbackQuery, button: Button, manager: DialogManager) -> None:
+    """
+    Обработчик открытия списка задач. Сбрасывает курсор на первую страницу.
+
+    Args:
+        c (CallbackQuery): Объект обратного вызова.
+        button (Button): Нажатая кнопка.
+        manager (DialogManager): Менеджер диалога.
+
+    Returns:
+        None
+    """
+    manager.dialog_data.pop("tasks_cursor", None)
+    await manager.switch_to(MainSG.tasks)
+
+async def on_tasks_next_page(c: CallbackQuery, button: Button, manager: DialogManager) -> None:
+    """
+    Обработчик перехода на следующую страницу списка задач.
+
+    Args:
+        c (CallbackQuery): Объект обратного вызова.
+        button (Button): Нажатая кнопка.
+        manager (DialogManager): Менеджер диалога.
+
+    Returns:
+        None
+    """
+    next_cursor: Optional[str] = manager.dialog_data.get("tasks_next_cursor")
+    logger.info(f"Переход на следующую страницу задач, курсор: {next_cursor}")
+    manager.dialog_data["tasks_cursor"] = next_cursor
+
 async def on_language_selected(c: CallbackQuery, select: Any, manager: DialogManager) -> None:
     """
     Обработчик выбора языка.
@@ -1,6 +1,8 @@
 import aiohttp
 import asyncio
 from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlencode, urlparse
 from config import config
 from models.user import User
 
@@ -15,7 +17,10 @@ class APIService:
         fastapi_url (str): URL FastAPI сервера.
         session (Optional[aiohttp.ClientSession]): Сессия для выполнения HTTP-запросов.
         admin_token (Optional[str]): Токен администратора для авторизации.
+        etag_cache (OrderedDict): ETag и данные последних ответов для условных запросов.
     """
+    ETAG_CACHE_SIZE: int = 1000
+
     def __init__(self):
         """
         Инициализирует объект APIService.
@@ -24,6 +29,7 @@ class APIService:
         self.fastapi_url: str = config.FASTAPI_BASE_URL
         self.session: Optional[aiohttp.ClientSession] = None
         self.admin_token: Optional[str] = None
+        self.etag_cache: "OrderedDict[Tuple[str, str], Tuple[str, Any]]" = OrderedDict()
         logger.info("APIService инициализирован")
 
     async def create_session(self) -> None:
@@ -130,6 +136,40 @@ class APIService:
             logger.error(f"Ошибка создания пользователя: {username}")
             return None
 
+    async def get_json_conditional(self, user_token: str, url: str,
+                                   params: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        """
+        Выполняет GET с заголовком If-None-Match и возвращает сохраненные данные при ответе 304.
+
+        Args:
+            user_token (str): Токен пользователя.
+            url (str): URL запроса.
+            params (Optional[Dict[str, str]]): Параметры запроса.
+
+        Returns:
+            Tuple[int, Any]: Статус ответа (200 при использовании сохраненных данных) и данные.
+        """
+        key: Tuple[str, str] = (user_token, f"{url}?{urlencode(sorted((params or {}).items()))}")
+        headers: Dict[str, str] = self.get_user_headers(user_token)
+        cached: Optional[Tuple[str, Any]] = self.etag_cache.get(key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        async with self.session.get(url, params=params or {}, headers=headers) as response:
+            if response.status == 304 and cached:
+                self.etag_cache.move_to_end(key)
+                logger.info(f"Данные не изменились: {url}")
+                return 200, cached[1]
+            if response.status != 200:
+                return response.status, None
+            data = await response.json()
+            etag: Optional[str] = response.headers.get("ETag")
+            if etag:
+                self.etag_cache[key] = (etag, data)
+                self.etag_cache.move_to_end(key)
+                if len(self.etag_cache) > self.ETAG_CACHE_SIZE:
+                    self.etag_cache.popitem(last=False)
+            return 200, data
+
     async def get_task(self, user_token: str, task_id: str) -> Optional[Dict[str, Any]]:
         """
         Получает информацию о задаче по её ID.
@@ -150,23 +190,32 @@ class APIService:
             logger.error(f"Ошибка получения задачи с ID: {task_id}")
             return None
 
-    async def get_tasks(self, user_token: str) -> List[Dict[str, Any]]:
+    async def get_tasks(self, user_token: str, cursor: Optional[str] = None,
+                        fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """
-        Получает список всех задач пользователя.
+        Получает одну страницу задач пользователя.
 
         Args:
             user_token (str): Токен пользователя.
+            cursor (Optional[str]): Курсор страницы, None для первой страницы.
+            fields (Optional[List[str]]): Поля задач, которые нужно получить, None для всех полей.
 
         Returns:
-            List[Dict[str, Any]]: Список задач пользователя.
-        """
-        async with self.session.get(f"{self.base_url}/tasks/", headers=self.get_user_headers(user_token)) as response:
-            if response.status == 200:
-                tasks = await response.json()
-                logger.info(f"Получено {len(tasks)} задач")
-                return tasks
-            logger.error("Ошибка получения списка задач")
-            return []
+            Tuple[List[Dict[str, Any]], Optional[str]]: Задачи страницы и курсор следующей страницы.
+        """
+        params: Dict[str, str] = {"cursor": cursor} if cursor else {}
+        if fields:
+            params["fields"] = ",".join(fields)
+        status, data = await self.get_json_conditional(user_token, f"{self.base_url}/tasks/", params)
+        if status == 200:
+            tasks: List[Dict[str, Any]] = data["results"]
+            next_cursor: Optional[str] = None
+            if data.get("next"):
+                next_cursor = parse_qs(urlparse(data["next"]).query).get("cursor", [None])[0]
+            logger.info(f"Получено {len(tasks)} задач")
+            return tasks, next_cursor
+        logger.error("Ошибка получения списка задач")
+        return [], None
 
     async def create_task(self, user_token: str, title: str, description: str, due_date: str, categories: List[str]) -> Optional[Dict[str, Any]]:
         """
@@ -198,7 +247,7 @@ class APIService:
 
     async def get_categories(self, user_token: str) -> List[Dict[str, Any]]:
         """
-        Получает список всех категорий пользователя.
+        Получает список всех категорий пользователя, проходя по страницам списка.
 
         Args:
             user_token (str): Токен пользователя.
@@ -206,13 +255,20 @@ class APIService:
         Returns:
             List[Dict[str, Any]]: Список категорий пользователя.
         """
-        async with self.session.get(f"{self.base_url}/categories/", headers=self.get_user_headers(user_token)) as response:
-            if response.status == 200:
-                categories = await response.json()
-                logger.info(f"Получено {len(categories)} категорий")
-                return categories
-            logger.error("Ошибка получения списка категорий")
-            return []
+        categories: List[Dict[str, Any]] = []
+        params: Dict[str, str] = {}
+        while True:
+            status, data = await self.get_json_conditional(user_token, f"{self.base_url}/categories/", params)
+            if status != 200:
+                logger.error("Ошибка получения списка категорий")
+                return []
+            categories.extend(data["results"])
+            cursor: Optional[str] = parse_qs(urlparse(data["next"]).query).get("cursor", [None])[0] if data.get("next") else None
+            if not cursor:
+                break
+            params = {"cursor": cursor}
+        logger.info(f"Получено {len(categories)} категорий")
+        return categories
 
     async def create_category(self, user_token: str, name: str) -> Optional[Dict[str, Any]]:
         """